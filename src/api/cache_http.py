@@ -0,0 +1,264 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DIA = 24 * 3600
+
+# Vigencia (segundos) de las respuestas de cada endpoint, por host y prefijo de ruta.
+# Los metadatos de proyectos e instituciones cambian poco; los recuentos de citas de
+# OpenAlex, más a menudo
+TTL_POR_ENDPOINT = {
+    "api.openaire.eu/search/publications": 30 * DIA,
+    "api.openaire.eu/search/persons": 30 * DIA,
+    "api.openaire.eu/graph/v1/projects": 90 * DIA,
+    "api.openaire.eu/graph/v1/organizations": 90 * DIA,
+    "api.openalex.org/works": 7 * DIA,
+    "api.openalex.org/authors": 30 * DIA,
+    "api.openalex.org/institutions": 90 * DIA,
+}
+TTL_POR_DEFECTO = 7 * DIA
+
+# Vigencia de las respuestas negativas (404 o sin resultados): un registro que hoy no
+# existe puede aparecer pronto
+TTL_NEGATIVO = 3 * DIA
+
+# Elementos de un resultado en el XML de OpenAIRE (no confundir con el contenedor
+# <results>, que aparece también en las búsquedas vacías) y recuento total de resultados
+_RESULTADO_XML = re.compile(rb"<(?:result|person)[\s>/]")
+_TOTAL_CERO_XML = re.compile(rb"<total>\s*0\s*</total>")
+
+# Tamaño máximo de los cuerpos guardados; al superarlo se retiran los menos usados
+TAMANO_MAXIMO = 512 * 2**20
+
+
+def normalizar_url(url, params=None):
+    """
+    Construye la URL canónica de una petición: host en minúsculas y parámetros de la
+    consulta (los de la URL y los de `params`) codificados de forma uniforme y ordenados.
+
+    Args:
+        url (str): URL de la petición
+        params (dict, optional): Parámetros adicionales de la consulta
+
+    Returns:
+        str: URL normalizada
+    """
+    preparada = requests.Request("GET", url, params=params).prepare().url
+    partes = urlsplit(preparada)
+    consulta = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+    return urlunsplit((partes.scheme.lower(), partes.netloc.lower(), partes.path, consulta, ""))
+
+
+def endpoint_de(url_normalizada):
+    """Devuelve el endpoint (host y prefijo de ruta de TTL_POR_ENDPOINT) de una URL, o su host."""
+    partes = urlsplit(url_normalizada)
+    ruta = partes.netloc + partes.path
+    for endpoint in TTL_POR_ENDPOINT:
+        if ruta.startswith(endpoint):
+            return endpoint
+    return partes.netloc
+
+
+def es_respuesta_negativa(estado, contenido):
+    """
+    Indica si una respuesta es negativa: un 404 o una búsqueda sin resultados (JSON con
+    `results` vacío o XML de OpenAIRE con `<total>0</total>` o sin ningún `<result>`).
+    """
+    if estado == 404:
+        return True
+    if estado != 200:
+        return False
+    inicio = contenido.lstrip()[:1]
+    if inicio == b"{":
+        try:
+            return json.loads(contenido).get("results") == []
+        except (ValueError, AttributeError):
+            return False
+    if inicio == b"<":
+        return bool(_TOTAL_CERO_XML.search(contenido)) or not _RESULTADO_XML.search(contenido)
+    return False
+
+
+class CacheHTTP:
+    """
+    Cache persistente (SQLite) de respuestas GET de las APIs bibliográficas, indexada
+    por la URL normalizada de cada petición.
+
+    Solo se guardan las respuestas 200 y las negativas (404 o sin resultados); los
+    errores del servidor o de límite de peticiones se vuelven a pedir. Cada respuesta
+    caduca según la vigencia de su endpoint (TTL_POR_ENDPOINT) o, si es negativa, según
+    TTL_NEGATIVO. Si los cuerpos guardados superan `tamano_maximo`, se retiran primero
+    las entradas caducadas y después las usadas hace más tiempo.
+
+    Se puede usar desde varios hilos a la vez.
+    """
+
+    def __init__(self, ruta, ttl_por_endpoint=None, ttl_por_defecto=TTL_POR_DEFECTO,
+                 ttl_negativo=TTL_NEGATIVO, tamano_maximo=TAMANO_MAXIMO):
+        """
+        Abre (o crea) la cache.
+
+        Args:
+            ruta (str): Ruta del archivo SQLite
+            ttl_por_endpoint (dict, optional): Vigencias que sustituyen a las de TTL_POR_ENDPOINT
+            ttl_por_defecto (float): Vigencia de los endpoints sin una propia
+            ttl_negativo (float): Vigencia máxima de las respuestas negativas
+            tamano_maximo (int): Bytes máximos de los cuerpos guardados
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self.ruta = ruta
+        self.ttl_por_endpoint = dict(TTL_POR_ENDPOINT, **(ttl_por_endpoint or {}))
+        self.ttl_por_defecto = ttl_por_defecto
+        self.ttl_negativo = ttl_negativo
+        self.tamano_maximo = tamano_maximo
+        self.aciertos = 0
+        self.aciertos_negativos = 0
+        self.fallos = 0
+        self.caducadas = 0
+        self.bytes_ahorrados = 0
+        self._bloqueo = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                estado INTEGER NOT NULL,
+                cabeceras TEXT NOT NULL,
+                codificacion TEXT,
+                contenido BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                negativa INTEGER NOT NULL,
+                guardada REAL NOT NULL,
+                expira REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            )""")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS respuestas_acceso ON respuestas (ultimo_acceso)")
+        self._conexion.commit()
+        self._tamano_total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+
+    @staticmethod
+    def clave(url_normalizada):
+        """Hash de la URL normalizada que identifica la entrada."""
+        return hashlib.sha256(url_normalizada.encode("utf-8")).hexdigest()
+
+    def ttl(self, endpoint, negativa=False):
+        """Vigencia en segundos de una respuesta del endpoint."""
+        ttl = self.ttl_por_endpoint.get(endpoint, self.ttl_por_defecto)
+        return min(ttl, self.ttl_negativo) if negativa else ttl
+
+    def obtener(self, url, params=None):
+        """
+        Devuelve la respuesta guardada de una petición, o None si no está o ha caducado.
+
+        Returns:
+            requests.Response: Respuesta reconstruida desde la cache
+        """
+        url_normalizada = normalizar_url(url, params)
+        clave = self.clave(url_normalizada)
+        ahora = time.time()
+        with self._bloqueo:
+            fila = self._conexion.execute(
+                "SELECT estado, cabeceras, codificacion, contenido, negativa, expira FROM respuestas WHERE clave = ?",
+                (clave,)).fetchone()
+            if fila is None or fila[5] <= ahora:
+                self.fallos += 1
+                self.caducadas += fila is not None
+                return None
+            self._conexion.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+            self._conexion.commit()
+            estado, cabeceras, codificacion, contenido, negativa, _ = fila
+            self.aciertos += 1
+            self.aciertos_negativos += negativa
+            self.bytes_ahorrados += len(contenido)
+
+        respuesta = requests.Response()
+        respuesta.status_code = estado
+        respuesta.headers = CaseInsensitiveDict(json.loads(cabeceras))
+        respuesta.encoding = codificacion
+        respuesta._content = contenido
+        respuesta.url = url_normalizada
+        return respuesta
+
+    def guardar(self, url, params, respuesta):
+        """
+        Guarda una respuesta si es cacheable (200 o negativa).
+
+        Args:
+            url (str): URL de la petición
+            params (dict): Parámetros de la petición
+            respuesta (requests.Response): Respuesta recibida
+
+        Returns:
+            bool: True si la respuesta se ha guardado
+        """
+        contenido = respuesta.content or b""
+        negativa = es_respuesta_negativa(respuesta.status_code, contenido)
+        if respuesta.status_code != 200 and not negativa:
+            return False
+
+        url_normalizada = normalizar_url(url, params)
+        clave = self.clave(url_normalizada)
+        endpoint = endpoint_de(url_normalizada)
+        cabeceras = {k: v for k, v in respuesta.headers.items() if k.lower() == "content-type"}
+        ahora = time.time()
+        with self._bloqueo:
+            anterior = self._conexion.execute("SELECT tamano FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave, url_normalizada, endpoint, respuesta.status_code, json.dumps(cabeceras), respuesta.encoding,
+                 contenido, len(contenido), int(negativa), ahora, ahora + self.ttl(endpoint, negativa), ahora))
+            self._tamano_total += len(contenido) - (anterior[0] if anterior else 0)
+            if self._tamano_total > self.tamano_maximo:
+                self._liberar(ahora)
+            self._conexion.commit()
+        return True
+
+    def _liberar(self, ahora):
+        """Retira entradas caducadas y, si no basta, las menos usadas hasta quedar en el 90% del máximo."""
+        self._conexion.execute("DELETE FROM respuestas WHERE expira <= ?", (ahora,))
+        self._tamano_total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        objetivo = 0.9 * self.tamano_maximo
+        if self._tamano_total <= objetivo:
+            return
+        retirar = []
+        for clave, tamano in self._conexion.execute("SELECT clave, tamano FROM respuestas ORDER BY ultimo_acceso"):
+            if self._tamano_total <= objetivo:
+                break
+            retirar.append((clave,))
+            self._tamano_total -= tamano
+        self._conexion.executemany("DELETE FROM respuestas WHERE clave = ?", retirar)
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: aciertos (y cuántos negativos), fallos, caducadas, bytes ahorrados,
+                entradas y bytes guardados
+        """
+        with self._bloqueo:
+            entradas = self._conexion.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "aciertos_negativos": self.aciertos_negativos,
+            "fallos": self.fallos,
+            "caducadas": self.caducadas,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "bytes_ahorrados": self.bytes_ahorrados,
+            "entradas": entradas,
+            "bytes_guardados": self._tamano_total,
+        }
+
+    def cerrar(self):
+        """Cierra la base de datos."""
+        with self._bloqueo:
+            self._conexion.close()
@@ -0,0 +1,176 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Conexiones reutilizables por host y número de hosts con pool propio
+CONEXIONES_POR_HOST = 10
+HOSTS_CON_POOL = 4
+
+# Timeout por defecto: (conexión, lectura) en segundos
+TIMEOUT_HTTP = (5, 10)
+
+# Respuestas de límite de peticiones o servicio saturado que se reintentan
+ESTADOS_REINTENTABLES = (429, 503)
+MAX_REINTENTOS_HTTP = 4
+ESPERA_INICIAL_HTTP = 1.0
+# Espera máxima entre reintentos, aunque Retry-After pida más
+ESPERA_MAXIMA_HTTP = 60.0
+
+_cliente_por_defecto = None
+_bloqueo_cliente = threading.Lock()
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP compartido por las funciones de las APIs (OpenAIRE, OpenAlex).
+
+    Envuelve una `requests.Session` con un pool de conexiones keep-alive por host, de
+    modo que las consultas sucesivas a un mismo servicio reutilizan la conexión TLS en
+    lugar de abrir una nueva en cada llamada. Con una `CacheHTTP`, las respuestas ya
+    guardadas se sirven sin salir a la red.
+
+    Las respuestas 429 (límite de peticiones) y 503 (servicio saturado) se reintentan
+    esperando lo que indique su cabecera Retry-After o, si no la traen, con backoff
+    exponencial (con algo de aleatoriedad), como los envíos a GROBID.
+    """
+
+    def __init__(self, conexiones_por_host=CONEXIONES_POR_HOST, hosts_con_pool=HOSTS_CON_POOL,
+                 timeout=TIMEOUT_HTTP, cabeceras=None, cache=None, max_reintentos=MAX_REINTENTOS_HTTP,
+                 espera_inicial=ESPERA_INICIAL_HTTP, espera_maxima=ESPERA_MAXIMA_HTTP):
+        """
+        Crea la sesión y monta el adaptador con los pools de conexiones.
+
+        Args:
+            conexiones_por_host (int): Conexiones que se mantienen abiertas por host. Debe
+                cubrir el número de peticiones simultáneas a un mismo host.
+            hosts_con_pool (int): Número de hosts distintos con pool propio
+            timeout (float | tuple): Timeout por defecto, en segundos o como (conexión, lectura)
+            cabeceras (dict, optional): Cabeceras añadidas a todas las peticiones
+            cache (CacheHTTP, optional): Cache persistente de respuestas
+            max_reintentos (int): Reintentos de cada petición ante un 429 o un 503
+            espera_inicial (float): Segundos antes del primer reintento sin Retry-After
+            espera_maxima (float): Segundos máximos de espera entre reintentos
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self.max_reintentos = max_reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=hosts_con_pool, pool_maxsize=conexiones_por_host)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+        if cabeceras:
+            self.sesion.headers.update(cabeceras)
+        # Peticiones enviadas a la red (incluidos los reintentos) y reintentos; se
+        # actualizan desde varios hilos
+        self.peticiones = 0
+        self.reintentos = 0
+        self._bloqueo = threading.Lock()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """
+        Envía una petición GET por la sesión compartida, o la responde desde la cache.
+
+        Args:
+            url (str): URL de la petición
+            params (dict, optional): Parámetros de la consulta
+            timeout (float | tuple, optional): Timeout de esta petición. Por defecto, el del cliente.
+            **kwargs: Argumentos adicionales de `requests.Session.get`
+
+        Returns:
+            requests.Response: Respuesta recibida (la última, si se agotan los reintentos)
+        """
+        if self.cache is not None:
+            respuesta = self.cache.obtener(url, params)
+            if respuesta is not None:
+                return respuesta
+        espera = self.espera_inicial
+        for intento in range(self.max_reintentos + 1):
+            with self._bloqueo:
+                self.peticiones += 1
+            respuesta = self.sesion.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+            if respuesta.status_code not in ESTADOS_REINTENTABLES or intento == self.max_reintentos:
+                break
+            retry_after = espera_retry_after(respuesta)
+            pausa = retry_after if retry_after is not None else espera + random.uniform(0, espera / 2)
+            pausa = min(pausa, self.espera_maxima)
+            print(f"     {respuesta.status_code} de {url.split('?')[0]}, reintento en {pausa:.1f}s")
+            with self._bloqueo:
+                self.reintentos += 1
+            time.sleep(pausa)
+            espera *= 2
+        if self.cache is not None:
+            self.cache.guardar(url, params, respuesta)
+        return respuesta
+
+    def conexiones_abiertas(self):
+        """Número de conexiones creadas por los pools de la sesión (por host)."""
+        conexiones = {}
+        for adaptador in set(self.sesion.adapters.values()):
+            pools = adaptador.poolmanager.pools
+            for clave in pools.keys():
+                pool = pools[clave]
+                conexiones[pool.host] = conexiones.get(pool.host, 0) + pool.num_connections
+        return conexiones
+
+    def cerrar(self):
+        """Cierra la sesión y sus conexiones (y la cache, si hay)."""
+        self.sesion.close()
+        if self.cache is not None:
+            self.cache.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def espera_retry_after(respuesta):
+    """
+    Segundos que pide esperar la cabecera Retry-After de una respuesta (en segundos o
+    como fecha HTTP), o None si no la trae o no se entiende.
+    """
+    valor = respuesta.headers.get("Retry-After")
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def obtener_cliente():
+    """Devuelve el cliente HTTP compartido, creándolo la primera vez que se usa."""
+    global _cliente_por_defecto
+    with _bloqueo_cliente:
+        if _cliente_por_defecto is None:
+            _cliente_por_defecto = ClienteHTTP()
+        return _cliente_por_defecto
+
+
+def configurar_cliente(cliente):
+    """
+    Sustituye el cliente HTTP compartido (p. ej. por uno con otro tamaño de pool u otros
+    timeouts, o por uno de pruebas).
+
+    Args:
+        cliente (ClienteHTTP): Cliente que usarán todas las funciones de las APIs
+
+    Returns:
+        ClienteHTTP: Cliente anterior (o None si aún no se había creado)
+    """
+    global _cliente_por_defecto
+    with _bloqueo_cliente:
+        anterior = _cliente_por_defecto
+        _cliente_por_defecto = cliente
+        return anterior
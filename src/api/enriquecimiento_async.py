@@ -0,0 +1,153 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from api.openaire_api import (
+    buscar_por_titulo,
+    buscar_autor_en_openaire,
+    buscar_proyectos_por_titulo,
+    buscar_proyecto_por_id,
+    combinar_paper_openaire,
+    combinar_autor_openaire,
+)
+from api.openalex_api import (
+    buscar_trabajo_openalex,
+    buscar_autor_openalex,
+    buscar_organizacion_openalex,
+    autores_desde_openalex,
+    organizaciones_desde_openalex,
+    combinar_paper_openalex,
+    combinar_autor_openalex,
+    combinar_organizacion_openalex,
+)
+
+HOST_OPENAIRE = "api.openaire.eu"
+HOST_OPENALEX = "api.openalex.org"
+
+# Peticiones simultáneas por host. No deben superar las conexiones por host del
+# cliente HTTP (ver api.cliente_http.CONEXIONES_POR_HOST)
+LIMITES_POR_HOST = {
+    HOST_OPENAIRE: 4,
+    HOST_OPENALEX: 8,
+}
+
+
+class MotorEnriquecimiento:
+    """
+    Enriquece papers con OpenAIRE y OpenAlex lanzando a la vez las consultas de todos
+    los papers, autores, organizaciones y proyectos.
+
+    Cada consulta es una de las funciones bloqueantes de `api.openaire_api` o
+    `api.openalex_api`, ejecutada en un hilo; un semáforo por host limita cuántas hay
+    en curso contra cada servicio, de modo que el tiempo total lo marcan los límites de
+    las APIs y no la latencia de cada petición. Los resultados se combinan sobre los
+    mismos objetos Paper, Author y Organization, en el mismo orden que el
+    enriquecimiento secuencial (OpenAIRE y después OpenAlex).
+    """
+
+    def __init__(self, limites_por_host=None):
+        """
+        Args:
+            limites_por_host (dict, optional): Peticiones simultáneas por host. Por
+                defecto, LIMITES_POR_HOST.
+        """
+        self.limites_por_host = dict(LIMITES_POR_HOST, **(limites_por_host or {}))
+        self._semaforos = {}
+        self._executor = None
+
+    async def _consultar(self, host, funcion, *args):
+        """Ejecuta una consulta bloqueante en un hilo, respetando el límite de su host."""
+        if host not in self._semaforos:
+            self._semaforos[host] = asyncio.Semaphore(self.limites_por_host[host])
+        async with self._semaforos[host]:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, funcion, *args)
+
+    async def _completar_openaire(self, paper):
+        combinar_paper_openaire(paper, await self._consultar(HOST_OPENAIRE, buscar_por_titulo, paper.title))
+        # Validar y completar autores
+        encontrados = await asyncio.gather(*(
+            self._consultar(HOST_OPENAIRE, buscar_autor_en_openaire, autor.nombre) for autor in paper.autores
+        ))
+        paper.autores = [
+            autor for autor, autor_completo in zip(paper.autores, encontrados)
+            if combinar_autor_openaire(autor, autor_completo)
+        ]
+
+    async def _completar_openalex(self, paper):
+        resultado = await self._consultar(HOST_OPENALEX, buscar_trabajo_openalex, paper.title)
+        if resultado is None:
+            return
+        # Solo se complementan los autores y organizaciones con los que se queda el paper
+        autores = paper.autores or autores_desde_openalex(resultado)
+        organizaciones = paper.organization or organizaciones_desde_openalex(resultado)
+        resultados_autores, resultados_organizaciones = await asyncio.gather(
+            asyncio.gather(*(
+                self._consultar(HOST_OPENALEX, buscar_autor_openalex, autor.nombre) for autor in autores
+            )),
+            asyncio.gather(*(
+                self._consultar(HOST_OPENALEX, buscar_organizacion_openalex, organizacion.nombre)
+                for organizacion in organizaciones
+            )),
+        )
+        for autor, resultado_autor in zip(autores, resultados_autores):
+            combinar_autor_openalex(autor, resultado_autor)
+        for organizacion, resultado_organizacion in zip(organizaciones, resultados_organizaciones):
+            combinar_organizacion_openalex(organizacion, resultado_organizacion)
+        combinar_paper_openalex(paper, resultado, autores, organizaciones)
+
+    async def _buscar_proyectos(self, paper):
+        proyecto_ids = await self._consultar(HOST_OPENAIRE, buscar_proyectos_por_titulo, paper)
+        proyectos = await asyncio.gather(*(
+            self._consultar(HOST_OPENAIRE, buscar_proyecto_por_id, proyecto_id, paper) for proyecto_id in proyecto_ids
+        ))
+        return [proyecto for proyecto in proyectos if proyecto]
+
+    async def _enriquecer_paper(self, paper, proyectos):
+        async def completar():
+            await self._completar_openaire(paper)
+            await self._completar_openalex(paper)
+
+        # Los proyectos solo dependen del título, así que se buscan a la vez que se completa el paper
+        if proyectos:
+            _, encontrados = await asyncio.gather(completar(), self._buscar_proyectos(paper))
+            return encontrados
+        await completar()
+        return []
+
+    async def enriquecer(self, papers, proyectos=True):
+        """
+        Enriquece todos los papers a la vez (versión asíncrona de `enriquecer_papers`).
+
+        Returns:
+            list: Proyectos de cada paper, en el orden de `papers`
+        """
+        with ThreadPoolExecutor(max_workers=sum(self.limites_por_host.values())) as executor:
+            self._executor = executor
+            self._semaforos = {}
+            try:
+                return await asyncio.gather(*(self._enriquecer_paper(paper, proyectos) for paper in papers))
+            finally:
+                self._executor = None
+
+
+def enriquecer_papers(papers, proyectos=True, limites_por_host=None):
+    """
+    Enriquece los papers con OpenAIRE y OpenAlex y busca sus proyectos, con las
+    consultas de todos los papers en paralelo (ver MotorEnriquecimiento).
+
+    Args:
+        papers (list): Papers a enriquecer; se modifican en el sitio
+        proyectos (bool): Buscar también los proyectos asociados a cada paper
+        limites_por_host (dict, optional): Peticiones simultáneas por host
+
+    Returns:
+        list: Lista de proyectos (objetos Project) de cada paper, en el orden de `papers`
+    """
+    if not papers:
+        return []
+    inicio = time.perf_counter()
+    resultado = asyncio.run(MotorEnriquecimiento(limites_por_host).enriquecer(papers, proyectos))
+    duracion = time.perf_counter() - inicio
+    print(f"\n=== Enriquecidos {len(papers)} papers en {duracion:.1f} s "
+          f"({sum(len(p) for p in resultado)} proyectos encontrados) ===")
+    return resultado
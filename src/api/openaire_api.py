@@ -1,11 +1,15 @@
-import requests
 import xml.etree.ElementTree as ET
+from api.cliente_http import obtener_cliente
 from models.author import Author
 from models.paper import Paper
 from models.organization import Organization
 from models.project import Project
 from datetime import datetime
 
+# Resultado de una búsqueda que no se pudo completar (error de red, límite de peticiones
+# o error del servidor); a diferencia de None, no significa que el registro no exista
+CONSULTA_FALLIDA = object()
+
 def parsear_xml_openaire(xml_data):
     try:
         root = ET.fromstring(xml_data)
@@ -143,7 +147,7 @@ def buscar_por_titulo(titulo):
     try:
         print(f"\n Buscando en OpenAIRE: {titulo}\n")
         api_url = f"https://api.openaire.eu/search/publications?title={titulo}&format=xml"
-        response = requests.get(api_url, timeout=10)
+        response = obtener_cliente().get(api_url)
         if response.status_code == 200:
             return parsear_xml_openaire(response.text)
         else:
@@ -157,11 +161,12 @@ from api.openaire_api import buscar_por_titulo
 
 def buscar_autor_en_openaire(nombre_autor):
     """
-    Busca un autor por nombre en OpenAIRE y devuelve un objeto Author si lo encuentra.
+    Busca un autor por nombre en OpenAIRE y devuelve un objeto Author si lo encuentra,
+    None si no existe o CONSULTA_FALLIDA si la búsqueda no se pudo completar.
     """
     try:
         api_url = f"https://api.openaire.eu/search/persons?title={nombre_autor}&format=xml"
-        response = requests.get(api_url, timeout=10)
+        response = obtener_cliente().get(api_url)
         if response.status_code == 200:
             root = ET.fromstring(response.text)
             creator = root.find('.//person')
@@ -176,9 +181,14 @@ def buscar_autor_en_openaire(nombre_autor):
                     profesion=profesion,
                     trabajos=trabajos
                 )
-        return None
-    except Exception:
-        return None
+            return None
+        if response.status_code == 404:
+            return None
+        print(f"Error al buscar el autor '{nombre_autor}' en OpenAIRE (Error {response.status_code})")
+        return CONSULTA_FALLIDA
+    except Exception as e:
+        print(f"Error al buscar el autor '{nombre_autor}' en OpenAIRE: {e}")
+        return CONSULTA_FALLIDA
 
 def completar_paper_con_openaire(paper):
     """
@@ -194,8 +204,27 @@ def completar_paper_con_openaire(paper):
         pass  # Puede haber autores/organizaciones incompletos
 
     # Buscar información en la API usando el título
-    paper_api = buscar_por_titulo(paper.title)
+    combinar_paper_openaire(paper, buscar_por_titulo(paper.title))
+
+    # Validar y completar autores
+    paper.autores = [
+        autor for autor in paper.autores
+        if combinar_autor_openaire(autor, buscar_autor_en_openaire(autor.nombre))
+    ]
+
+    return paper
+
+def combinar_paper_openaire(paper, paper_api):
+    """
+    Completa los campos vacíos de un Paper con los del Paper obtenido de OpenAIRE.
 
+    Args:
+        paper (Paper): Paper a completar (se modifica)
+        paper_api (Paper): Resultado de `buscar_por_titulo`, o None
+
+    Returns:
+        Paper: El mismo paper
+    """
     if paper_api:
         if not paper.doi:
             paper.doi = paper_api.doi
@@ -213,22 +242,31 @@ def completar_paper_con_openaire(paper):
             paper.autores = paper_api.autores
         if (not paper.organization or len(paper.organization) == 0) and hasattr(paper_api, "organization"):
             paper.organization = paper_api.organization
+    return paper
 
-    # Validar y completar autores
-    autores_validados = []
-    for autor in paper.autores:
-        autor_completo = buscar_autor_en_openaire(autor.nombre)
-        if autor_completo:
-            if not autor.rdf_type:
-                autor.rdf_type = autor_completo.rdf_type
-            if not autor.profesion:
-                autor.profesion = autor_completo.profesion
-            if not autor.trabajos:
-                autor.trabajos = autor_completo.trabajos
-            autores_validados.append(autor)
-    paper.autores = autores_validados
+def combinar_autor_openaire(autor, autor_completo):
+    """
+    Completa los campos vacíos de un autor con los encontrados en OpenAIRE.
 
-    return paper
+    Args:
+        autor (Author): Autor a completar (se modifica)
+        autor_completo (Author): Resultado de `buscar_autor_en_openaire`, o None
+
+    Returns:
+        bool: True si el autor se conserva: se encontró en OpenAIRE (autor validado) o
+            la búsqueda falló y no se puede descartar
+    """
+    if autor_completo is CONSULTA_FALLIDA:
+        return True
+    if not autor_completo:
+        return False
+    if not autor.rdf_type:
+        autor.rdf_type = autor_completo.rdf_type
+    if not autor.profesion:
+        autor.profesion = autor_completo.profesion
+    if not autor.trabajos:
+        autor.trabajos = autor_completo.trabajos
+    return True
 
 def buscar_organizacion(nombre, pagina=1, resultados_por_pagina=1):
     """
@@ -252,7 +290,7 @@ def buscar_organizacion(nombre, pagina=1, resultados_por_pagina=1):
             "sortBy": "relevance DESC"
         }
         
-        response = requests.get(api_url, params=params, timeout=10)
+        response = obtener_cliente().get(api_url, params=params)
         
         if response.status_code == 200:
             return parsear_json_organizacion_openaire(response.json())
@@ -278,7 +316,7 @@ def buscar_proyectos_por_titulo(paper):
         print(f"\nBuscando proyectos en OpenAIRE para el paper: {titulo}\n")
         
         api_url = f"https://api.openaire.eu/search/publications?title={titulo}&format=xml"
-        response = requests.get(api_url, timeout=10)
+        response = obtener_cliente().get(api_url)
         
         if response.status_code != 200:
             print(f"Error al consultar OpenAIRE (Error {response.status_code})")
@@ -334,7 +372,7 @@ def buscar_proyecto_por_id(proyecto_id, paper=None):
             "sortBy": "relevance DESC"
         }
         
-        response = requests.get(api_url, params=params, timeout=10)
+        response = obtener_cliente().get(api_url, params=params)
         
         if response.status_code != 200:
             print(f"Error al consultar OpenAIRE (Error {response.status_code})")
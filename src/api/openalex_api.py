@@ -1,8 +1,99 @@
 import requests
+from api.cliente_http import obtener_cliente
 from models.paper import Paper
 from models.author import Author
 from models.organization import Organization
 
+def buscar_trabajo_openalex(titulo):
+    """
+    Busca un trabajo por título en OpenAlex.
+
+    Args:
+        titulo (str): Título del paper
+
+    Returns:
+        dict: Primer resultado de OpenAlex, o None si no hay resultados o hay un error
+    """
+    try:
+        titulo_codificado = requests.utils.quote(titulo)
+        api_url = f"https://api.openalex.org/works?filter=title.search:{titulo_codificado}"
+        response = obtener_cliente().get(api_url)
+
+        if response.status_code != 200:
+            print(f"Error al consultar OpenAlex (Error {response.status_code})")
+            return None
+        resultados = response.json().get("results", [])
+        if not resultados:
+            print("No se encontraron resultados en OpenAlex.")
+            return None
+        return resultados[0]  # Tomar el primer resultado relevante
+
+    except Exception as e:
+        print(f"Error al consultar OpenAlex para '{titulo}': {e}")
+        return None
+
+
+def autores_desde_openalex(resultado):
+    """Crea los autores de un trabajo de OpenAlex (sin complementarlos)."""
+    autores = []
+    for autor_data in resultado.get("authorships", []):
+        autor_nombre = autor_data.get("author", {}).get("display_name", "Nombre no disponible")
+        autor_rdf_type = autor_data.get("author", {}).get("type")
+        autor_profesion = autor_data.get("author", {}).get("affiliation", {}).get("name", "No especificado")
+        autor_trabajos = autor_data.get("author", {}).get("works_count", 0)
+        autores.append(Author(
+            nombre=autor_nombre,
+            rdf_type=autor_rdf_type,
+            profesion=autor_profesion,
+            trabajos=autor_trabajos
+        ))
+    return autores
+
+
+def organizaciones_desde_openalex(resultado):
+    """Crea las organizaciones de los autores de un trabajo de OpenAlex (sin complementarlas)."""
+    # Procesar instituciones del autor (puedes mejorar esto para evitar duplicados)
+    organizaciones = []
+    for autor_data in resultado.get("authorships", []):
+        for inst_data in autor_data.get("institutions", []):
+            organizaciones.append(Organization(
+                nombre=inst_data.get("display_name"),
+                lugar=inst_data.get("country_code"),
+                rdftype=inst_data.get("type"),
+                trabajos=inst_data.get("works_count", 0),
+                links=inst_data.get("id")
+            ))
+    return organizaciones
+
+
+def combinar_paper_openalex(paper_obj, resultado, autores, organizaciones):
+    """
+    Completa los campos vacíos de un Paper con un trabajo de OpenAlex. Los autores y
+    organizaciones solo se usan si el paper no tiene.
+
+    Args:
+        paper_obj (Paper): Paper a completar (se modifica)
+        resultado (dict): Resultado de `buscar_trabajo_openalex`
+        autores (list): Autores del resultado (ver `autores_desde_openalex`)
+        organizaciones (list): Organizaciones del resultado
+
+    Returns:
+        Paper: El mismo paper
+    """
+    if not paper_obj.doi: paper_obj.doi = resultado.get("doi")
+    if not paper_obj.date: paper_obj.date = resultado.get("publication_date")
+    if not paper_obj.idioma: paper_obj.idioma = resultado.get("language")
+    if not paper_obj.veces_citado: paper_obj.veces_citado = resultado.get("cited_by_count")
+    if not paper_obj.paginas: paper_obj.paginas = resultado.get("biblio", {}).get("pages")
+    if not paper_obj.rdf_type: paper_obj.rdf_type = resultado.get("type")
+    if not paper_obj.autores or len(paper_obj.autores) == 0:
+        paper_obj.autores = autores
+    if not paper_obj.organization or len(paper_obj.organization) == 0:
+        paper_obj.organization = organizaciones
+    if not paper_obj.title: paper_obj.title = resultado.get("title")
+    return paper_obj
+
+
 def buscar_por_titulo_openalex(titulo_o_paper):
     """
     Si recibe un string, busca y retorna un Paper.
@@ -17,164 +108,112 @@ def buscar_por_titulo_openalex(titulo_o_paper):
         paper_obj = None
         titulo = titulo_o_paper
 
-    try:
-        titulo_codificado = requests.utils.quote(titulo)
-        api_url = f"https://api.openalex.org/works?filter=title.search:{titulo_codificado}"
-        response = requests.get(api_url, timeout=10)
+    resultado = buscar_trabajo_openalex(titulo)
+    if resultado is None:
+        return paper_obj if paper_obj else None
 
-        if response.status_code == 200:
-            datos = response.json()
-            resultados = datos.get("results", [])
+    # Complementar información de autores y organizaciones usando OpenAlex
+    autores = [complementar_autor_con_openalex(autor) for autor in autores_desde_openalex(resultado)]
+    organizaciones = [complementar_organizacion_con_openalex(org) for org in organizaciones_desde_openalex(resultado)]
 
-            if resultados:
-                resultado = resultados[0]  # Tomar el primer resultado relevante
-
-                # Extraer información básica
-                titulo_encontrado = resultado.get("title")
-                doi = resultado.get("doi")
-                fecha = resultado.get("publication_date")
-                idioma = resultado.get("language")
-                veces_citado = resultado.get("cited_by_count")
-                paginas = resultado.get("biblio", {}).get("pages")
-                rdf_type = resultado.get("type")
-
-                # Crear lista de autores
-                autores = []
-                for autor_data in resultado.get("authorships", []):
-                    autor_nombre = autor_data.get("author", {}).get("display_name", "Nombre no disponible")
-                    autor_rdf_type = autor_data.get("author", {}).get("type")
-                    autor_profesion = autor_data.get("author", {}).get("affiliation", {}).get("name", "No especificado")
-                    autor_trabajos = autor_data.get("author", {}).get("works_count", 0)
-                    autor = Author(
-                        nombre=autor_nombre,
-                        rdf_type=autor_rdf_type,
-                        profesion=autor_profesion,
-                        trabajos=autor_trabajos
-                    )
-                    # Complementar información del autor usando OpenAlex
-                    autor = complementar_autor_con_openalex(autor)
-                    autores.append(autor)
-
-                # Procesar instituciones del autor (puedes mejorar esto para evitar duplicados)
-                organizaciones = []
-                for autor_data in resultado.get("authorships", []):
-                    for inst_data in autor_data.get("institutions", []):
-                        org_nombre = inst_data.get("display_name")
-                        org_lugar = inst_data.get("country_code")
-                        org_rdf_type = inst_data.get("type")
-                        org_trabajos = inst_data.get("works_count", 0)
-                        org_links = inst_data.get("id")
-                        organizacion = Organization(
-                            nombre=org_nombre,
-                            lugar=org_lugar,
-                            rdftype=org_rdf_type,
-                            trabajos=org_trabajos,
-                            links=org_links
-                        )
-                        # Complementar información de la organización usando OpenAlex
-                        organizacion = complementar_organizacion_con_openalex(organizacion)
-                        organizaciones.append(organizacion)
-
-                # Si se recibió un objeto Paper, complementar sus atributos
-                if paper_obj:
-                    if not paper_obj.doi: paper_obj.doi = doi
-                    if not paper_obj.date: paper_obj.date = fecha
-                    if not paper_obj.idioma: paper_obj.idioma = idioma
-                    if not paper_obj.veces_citado: paper_obj.veces_citado = veces_citado
-                    if not paper_obj.paginas: paper_obj.paginas = paginas
-                    if not paper_obj.rdf_type: paper_obj.rdf_type = rdf_type
-                    if not paper_obj.autores or len(paper_obj.autores) == 0:
-                        paper_obj.autores = autores
-                    else:
-                        # Complementar cada autor existente
-                        for i, autor in enumerate(paper_obj.autores):
-                            paper_obj.autores[i] = complementar_autor_con_openalex(autor)
-                    if not paper_obj.organization or len(paper_obj.organization) == 0:
-                        paper_obj.organization = organizaciones
-                    else:
-                        # Complementar cada organización existente
-                        for i, org in enumerate(paper_obj.organization):
-                            paper_obj.organization[i] = complementar_organizacion_con_openalex(org)
-                    if not paper_obj.title: paper_obj.title = titulo_encontrado
-                    print("\nPaper complementado con OpenAlex:")
-                    paper_obj.mostrar_info()
-                    return paper_obj
-                else:
-                    # Si no, crear un nuevo objeto Paper
-                    paper = Paper(
-                        title=titulo_encontrado,
-                        doi=doi,
-                        date=fecha,
-                        idioma=idioma,
-                        veces_citado=veces_citado,
-                        paginas=paginas,
-                        rdf_type=rdf_type,
-                        autores=autores,
-                        organization=organizaciones
-                    )
-                    print(f"\nResultado OpenAlex:")
-                    paper.mostrar_info()
-                    return paper
-
-            else:
-                print("No se encontraron resultados en OpenAlex.")
-                return paper_obj if paper_obj else None
-        else:
-            print(f"Error al consultar OpenAlex (Error {response.status_code})")
-            return paper_obj if paper_obj else None
+    # Si se recibió un objeto Paper, complementar sus atributos
+    if paper_obj:
+        if paper_obj.autores:
+            # Complementar cada autor existente
+            for i, autor in enumerate(paper_obj.autores):
+                paper_obj.autores[i] = complementar_autor_con_openalex(autor)
+        if paper_obj.organization:
+            # Complementar cada organización existente
+            for i, org in enumerate(paper_obj.organization):
+                paper_obj.organization[i] = complementar_organizacion_con_openalex(org)
+        combinar_paper_openalex(paper_obj, resultado, autores, organizaciones)
+        print("\nPaper complementado con OpenAlex:")
+        paper_obj.mostrar_info()
+        return paper_obj
 
-    except Exception as e:
-        print(f"Error al consultar OpenAlex para '{titulo}': {e}")
-        return paper_obj if paper_obj else None
+    # Si no, crear un nuevo objeto Paper
+    paper = Paper(
+        title=resultado.get("title"),
+        doi=resultado.get("doi"),
+        date=resultado.get("publication_date"),
+        idioma=resultado.get("language"),
+        veces_citado=resultado.get("cited_by_count"),
+        paginas=resultado.get("biblio", {}).get("pages"),
+        rdf_type=resultado.get("type"),
+        autores=autores,
+        organization=organizaciones
+    )
+    print(f"\nResultado OpenAlex:")
+    paper.mostrar_info()
+    return paper
 
 
-def complementar_autor_con_openalex(autor):
-    """
-    Busca información adicional del autor en OpenAlex y complementa el objeto Author.
-    """
+def buscar_autor_openalex(nombre):
+    """Busca un autor por nombre en OpenAlex y devuelve el primer resultado (dict), o None."""
     try:
-        nombre_codificado = requests.utils.quote(autor.nombre)
+        nombre_codificado = requests.utils.quote(nombre)
         api_url = f"https://api.openalex.org/authors?filter=display_name.search:{nombre_codificado}"
-        response = requests.get(api_url, timeout=10)
+        response = obtener_cliente().get(api_url)
         if response.status_code == 200:
-            datos = response.json()
-            resultados = datos.get("results", [])
+            resultados = response.json().get("results", [])
             if resultados:
-                resultado = resultados[0]
-                # Solo actualiza si el campo está vacío o es None
-                if not autor.rdf_type: autor.rdf_type = resultado.get("type")
-                if not autor.trabajos: autor.trabajos = resultado.get("works_count")
-                if not autor.profesion: autor.profesion = resultado.get("last_known_institution", {}).get("display_name")
-                # Puedes agregar más campos según tu modelo Author
-        return autor
+                return resultados[0]
+        return None
     except Exception as e:
-        print(f"Error al complementar autor '{autor.nombre}' en OpenAlex: {e}")
-        return autor
+        print(f"Error al complementar autor '{nombre}' en OpenAlex: {e}")
+        return None
 
-def complementar_organizacion_con_openalex(organizacion):
+
+def combinar_autor_openalex(autor, resultado):
+    """Completa los campos vacíos de un autor con un resultado de OpenAlex (o None)."""
+    if resultado:
+        # Solo actualiza si el campo está vacío o es None
+        if not autor.rdf_type: autor.rdf_type = resultado.get("type")
+        if not autor.trabajos: autor.trabajos = resultado.get("works_count")
+        if not autor.profesion: autor.profesion = (resultado.get("last_known_institution") or {}).get("display_name")
+        # Puedes agregar más campos según tu modelo Author
+    return autor
+
+
+def complementar_autor_con_openalex(autor):
     """
-    Busca información adicional de la organización en OpenAlex y complementa el objeto Organization.
+    Busca información adicional del autor en OpenAlex y complementa el objeto Author.
     """
+    return combinar_autor_openalex(autor, buscar_autor_openalex(autor.nombre))
+
+
+def buscar_organizacion_openalex(nombre):
+    """Busca una institución por nombre en OpenAlex y devuelve el primer resultado (dict), o None."""
     try:
-        if not organizacion.nombre:
-            return organizacion
-        nombre_codificado = requests.utils.quote(organizacion.nombre)
+        if not nombre:
+            return None
+        nombre_codificado = requests.utils.quote(nombre)
         api_url = f"https://api.openalex.org/institutions?filter=display_name.search:{nombre_codificado}"
-        response = requests.get(api_url, timeout=10)
+        response = obtener_cliente().get(api_url)
         if response.status_code == 200:
-            datos = response.json()
-            resultados = datos.get("results", [])
+            resultados = response.json().get("results", [])
             if resultados:
-                resultado = resultados[0]
-                # Solo actualiza si el campo está vacío o es None
-                if not organizacion.rdftype: organizacion.rdftype = resultado.get("type")
-                if not organizacion.lugar: organizacion.lugar = resultado.get("country_code")
-                if not organizacion.trabajos: organizacion.trabajos = resultado.get("works_count")
-                if not organizacion.links: organizacion.links = resultado.get("id")
-                # Puedes agregar más campos según tu modelo Organization
-        return organizacion
+                return resultados[0]
+        return None
     except Exception as e:
-        print(f"Error al complementar organización '{organizacion.nombre}' en OpenAlex: {e}")
-        return organizacion
-    
+        print(f"Error al complementar organización '{nombre}' en OpenAlex: {e}")
+        return None
+
 
+def combinar_organizacion_openalex(organizacion, resultado):
+    """Completa los campos vacíos de una organización con un resultado de OpenAlex (o None)."""
+    if resultado:
+        # Solo actualiza si el campo está vacío o es None
+        if not organizacion.rdftype: organizacion.rdftype = resultado.get("type")
+        if not organizacion.lugar: organizacion.lugar = resultado.get("country_code")
+        if not organizacion.trabajos: organizacion.trabajos = resultado.get("works_count")
+        if not organizacion.links: organizacion.links = resultado.get("id")
+        # Puedes agregar más campos según tu modelo Organization
+    return organizacion
+
+
+def complementar_organizacion_con_openalex(organizacion):
+    """
+    Busca información adicional de la organización en OpenAlex y complementa el objeto Organization.
+    """
+    return combinar_organizacion_openalex(organizacion, buscar_organizacion_openalex(organizacion.nombre))
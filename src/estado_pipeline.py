@@ -0,0 +1,136 @@
+import os
+import pickle
+
+
+class EstadoPipeline:
+    """
+    Resultado acumulado de las ejecuciones anteriores del pipeline: papers ya
+    enriquecidos, sus proyectos y sus resúmenes, indexados por nombre de archivo.
+
+    Junto con el manifiesto de PDFs permite que una ejecución solo extraiga, enriquezca
+    y compare los papers nuevos o modificados, y retire los de PDFs eliminados.
+    """
+
+    def __init__(self, ruta):
+        """
+        Carga el estado de la ruta indicada (o uno vacío si todavía no existe).
+
+        Args:
+            ruta (str): Ruta del archivo pickle del estado
+        """
+        self.ruta = ruta
+        self.papers = {}
+        self.proyectos = {}
+        self.resumenes = {}
+        # Opciones con las que se calcularon los enlaces de similitud (k, mutuos, índice...)
+        self.similitud = None
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                datos = pickle.load(f)
+            self.papers = datos["papers"]
+            self.proyectos = datos["proyectos"]
+            self.resumenes = datos["resumenes"]
+            self.similitud = datos.get("similitud")
+            # Los enlaces de similitud se guardan como nombres de archivo
+            for filename, similares in datos["similares"].items():
+                self.papers[filename].papersSimilares = [self.papers[s] for s in similares]
+            self._completar_archivos()
+
+    def _completar_archivos(self):
+        """
+        Asigna a los papers de estados antiguos el nombre de su PDF, y pasa sus
+        similitudes, que se guardaban por título, a la `clave` de cada paper similar.
+        """
+        antiguos = [(f, paper) for f, paper in self.papers.items() if getattr(paper, "archivo", None) is None]
+        for f, paper in antiguos:
+            paper.archivo = f
+        for _, paper in antiguos:
+            por_titulo = getattr(paper, "similitudes", {})
+            paper.similitudes = {similar.clave: por_titulo[similar.title]
+                                 for similar in paper.papersSimilares if similar.title in por_titulo}
+
+    def agregar(self, filename, paper, resumen, proyectos=None):
+        """Añade (o sustituye) el paper de un PDF junto a su resumen y proyectos."""
+        paper.archivo = filename
+        self.papers[filename] = paper
+        self.resumenes[filename] = resumen
+        self.proyectos[filename] = list(proyectos or [])
+
+    def eliminar(self, filenames):
+        """
+        Retira los papers de los PDFs indicados y todas las referencias a ellos
+        (papers similares y papers de proyectos).
+
+        Args:
+            filenames (iterable): Nombres de archivo a retirar
+
+        Returns:
+            list: Papers retirados
+        """
+        retirados = [self.papers.pop(f) for f in filenames if f in self.papers]
+        for f in filenames:
+            self.resumenes.pop(f, None)
+            self.proyectos.pop(f, None)
+        if not retirados:
+            return retirados
+
+        ids_retirados = {id(paper) for paper in retirados}
+        claves_retiradas = {paper.clave for paper in retirados}
+        for paper in self.papers.values():
+            paper.papersSimilares = [p for p in paper.papersSimilares if id(p) not in ids_retirados]
+            for clave in claves_retiradas & set(getattr(paper, "similitudes", {})):
+                del paper.similitudes[clave]
+        for proyectos in self.proyectos.values():
+            for proyecto in proyectos:
+                if proyecto.papers:
+                    proyecto.papers = [p for p in proyecto.papers if id(p) not in ids_retirados]
+        return retirados
+
+    def quitar_similares(self):
+        """Elimina todos los enlaces de similitud, para recalcularlos desde cero."""
+        for paper in self.papers.values():
+            paper.papersSimilares = []
+            paper.similitudes = {}
+
+    def lista_papers(self):
+        """Devuelve todos los papers, ordenados por nombre de archivo."""
+        return [self.papers[f] for f in sorted(self.papers)]
+
+    def lista_proyectos(self):
+        """Devuelve todos los proyectos, ordenados por nombre de archivo del paper."""
+        return [proyecto for f in sorted(self.proyectos) for proyecto in self.proyectos[f]]
+
+    def lista_resumenes(self):
+        """Devuelve `filename` y `abstract` de cada paper, en el mismo orden que `lista_papers`."""
+        return [{"filename": f, "abstract": self.resumenes[f]} for f in sorted(self.papers)]
+
+    def guardar(self):
+        """
+        Escribe el estado en disco de forma atómica.
+
+        Los papers similares se guardan como nombres de archivo: serializar las
+        referencias entre papers recorrería cadenas de similitud arbitrariamente largas.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        filename_de = {id(paper): f for f, paper in self.papers.items()}
+        similares = {
+            f: [filename_de[id(p)] for p in paper.papersSimilares if id(p) in filename_de]
+            for f, paper in self.papers.items()
+        }
+        originales = {f: paper.papersSimilares for f, paper in self.papers.items()}
+        temporal = self.ruta + ".tmp"
+        try:
+            for paper in self.papers.values():
+                paper.papersSimilares = []
+            with open(temporal, "wb") as f:
+                pickle.dump({
+                    "papers": self.papers,
+                    "proyectos": self.proyectos,
+                    "resumenes": self.resumenes,
+                    "similares": similares,
+                    "similitud": self.similitud,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            for f, paper in self.papers.items():
+                paper.papersSimilares = originales[f]
+        os.replace(temporal, self.ruta)
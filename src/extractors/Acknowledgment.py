@@ -1,33 +1,17 @@
 import os
 import sys
 import argparse
-import requests
 import xml.etree.ElementTree as ET
-from transformers import pipeline
 from models.organization import Organization
-
-# Configurar salida UTF-8
-sys.stdout.reconfigure(encoding='utf-8')
-
-# Argumentos de entrada
-parser = argparse.ArgumentParser(description="Extraer el acknowledgment de PDFs usando GROBID.")
-parser.add_argument("-i", "--input", default="data", help="Carpeta que contiene los archivos PDF.")
-args = parser.parse_args()
-PDF_DIRECTORY = args.input
-
-if not os.path.exists(PDF_DIRECTORY):
-    print(f"La carpeta '{PDF_DIRECTORY}' no existe.")
-    exit(1)
+from extractors.ner import extract_organizations_from_acknowledgment, extraer_organizaciones_en_lote
+from extractors.tei_cache import CacheTEI, calcular_hash_pdf
+from extractors.tei_parser import extraer_campos_tei
+from extractors.grobid_extractor import (
+    enviar_pdf_a_grobid, OPCIONES_GROBID, GROBID_SERVIDOR, ENDPOINT_TEXTO_COMPLETO,
+)
 
 # Endpoint de GROBID
-GROBID_URL = "http://localhost:8070/api/processFulltextDocument"
-
-# Configurar el modelo NER de Hugging Face (solo cargar una vez)
-ner_pipeline = pipeline(
-    "ner",
-    model="Jean-Baptiste/roberta-large-ner-english",
-    aggregation_strategy="simple"
-)
+GROBID_URL = GROBID_SERVIDOR + ENDPOINT_TEXTO_COMPLETO
 
 # Namespaces TEI
 namespaces = {"tei": "http://www.tei-c.org/ns/1.0"}
@@ -42,86 +26,161 @@ def extract_acknowledgment(root):
             ack_texts.append(text.strip())
     return " ".join(ack_texts).strip()
 
-def extract_organizations_from_acknowledgment(acknowledgment_text):
-    # Usar el modelo NER de Hugging Face para detectar las organizaciones
-    entities = ner_pipeline(acknowledgment_text)
-    
-    organizations = {ent["word"]                    
-                     for ent in entities
-                     if ent["entity_group"] == "ORG"   # sólo entidades de tipo ORG
-       and ent["score"] >= 0.85       # umbral de confianza
-    }
+def obtener_acknowledgment(pdf_path=None, fuente=None, cache=None, grobid_url=GROBID_URL, opciones=None):
+    """
+    Obtiene el texto del acknowledgment reutilizando el TEI ya extraído cuando es posible.
 
+    La fuente puede ser la raíz de un TEI ya parseado, un registro de `iterar_pdfs`
+    (con la clave `acknowledgment`), el contenido de un TEI (p. ej. el devuelto por
+    `CacheTEI.obtener`) o la ruta a un archivo TEI. Sin fuente, se busca la respuesta
+    de GROBID del PDF en la cache TEI y solo si no está se envía el PDF a GROBID
+    (guardando la respuesta en la cache).
 
-    return organizations
+    Sin `opciones`, sirve cualquier respuesta de texto completo guardada para el PDF
+    (p. ej. la de `iterar_pdfs` en modo "completo" o "escalonado", sea cual sea su
+    nivel de consolidación): el acknowledgment no depende de la consolidación.
 
-def agregar_organizaciones_de_acknowledgment_a_paper(paper, pdf_path, grobid_url="http://localhost:8070/api/processFulltextDocument"):
+    Args:
+        pdf_path (str, optional): Ruta al archivo PDF
+        fuente (Element | dict | bytes | str, optional): TEI parseado, registro extraído,
+            contenido TEI o ruta a un archivo TEI
+        cache (CacheTEI, optional): Cache TEI. Defaults to `xml_responses` junto a la carpeta del PDF.
+        grobid_url (str): Endpoint de GROBID
+        opciones (dict, optional): Opciones de GROBID con las que se obtuvo el TEI
+            buscado. Por defecto, cualquiera; si no hay ninguno, se envía el PDF con
+            OPCIONES_GROBID.
+
+    Returns:
+        str: Texto del acknowledgment ("" si no hay), o None si no se pudo obtener el TEI
+    """
+    if isinstance(fuente, ET.Element):
+        return extract_acknowledgment(fuente)
+    if isinstance(fuente, dict):
+        return fuente.get("acknowledgment", "")
+    if isinstance(fuente, str) and fuente.lstrip().startswith("<"):
+        fuente = fuente.encode("utf-8")
+    if isinstance(fuente, (bytes, str)):
+        return extraer_campos_tei(fuente)["acknowledgment"]
+
+    if pdf_path is None:
+        raise ValueError("Se necesita una fuente TEI o la ruta del PDF.")
+
+    if cache is None:
+        cache = CacheTEI(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(pdf_path))), "xml_responses"))
+
+    sha256_pdf = calcular_hash_pdf(pdf_path)
+    clave = None if opciones is not None else cache.buscar(sha256_pdf, grobid_url)
+    opciones = OPCIONES_GROBID if opciones is None else opciones
+    clave = clave or CacheTEI.clave(sha256_pdf, grobid_url, opciones)
+    tei = cache.obtener(clave)
+    if tei is None:
+        response = enviar_pdf_a_grobid(pdf_path, grobid_url, opciones)
+        if response.status_code != 200:
+            print(f"    Error {response.status_code} al procesar {pdf_path}")
+            return None
+        tei = response.content
+        cache.guardar(clave, tei, {
+            "archivo": os.path.basename(pdf_path),
+            "sha256": sha256_pdf,
+            "url": grobid_url,
+            "opciones": opciones,
+        })
+    return extraer_campos_tei(tei)["acknowledgment"]
+
+
+def agregar_organizaciones_de_acknowledgment_a_paper(paper, pdf_path=None, grobid_url=GROBID_URL,
+                                                     fuente=None, cache=None):
     """
     Procesa el acknowledgment del PDF y agrega organizaciones detectadas al objeto Paper.
+
+    GROBID solo se consulta si no se indica una fuente y el PDF no está en la cache TEI.
+
     Args:
         paper (Paper): Objeto Paper a complementar.
-        pdf_path (str): Ruta al archivo PDF.
+        pdf_path (str, optional): Ruta al archivo PDF.
         grobid_url (str): Endpoint de GROBID.
+        fuente (Element | dict | bytes | str, optional): TEI parseado, registro extraído,
+            contenido TEI o ruta a un archivo TEI.
+        cache (CacheTEI, optional): Cache TEI donde buscar la respuesta de GROBID.
     """
-    with open(pdf_path, "rb") as f:
-        response = requests.post(grobid_url, files={"input": f}, data={"consolidate": "1"})
-
-    if response.status_code != 200:
-        print(f"    Error {response.status_code} al procesar {pdf_path}")
-        return
+    nombre = os.path.basename(pdf_path) if pdf_path else paper.title
 
     try:
-        root = ET.fromstring(response.text)
-        acknowledgment = extract_acknowledgment(root)
-
-        if acknowledgment:
-            print(f"Acknowledgment extraído de {os.path.basename(pdf_path)}:")
-            print(acknowledgment)
-
-            organizations = extract_organizations_from_acknowledgment(acknowledgment)
-            if organizations:
-                print("Organizaciones detectadas:")
-                for org_name in organizations:
-                    print(f"  - {org_name}")
-                    # Evitar duplicados
-                    if not any(org.nombre == org_name for org in paper.organization):
-                        paper.organization.append(Organization(nombre=org_name))
-            else:
-                print("No se detectaron organizaciones en el acknowledgment.")
-        else:
-            print(f"No se encontró acknowledgment en {os.path.basename(pdf_path)}.")
-
+        acknowledgment = obtener_acknowledgment(pdf_path, fuente, cache, grobid_url)
     except ET.ParseError as e:
         print(f"    Error al analizar XML: {e}")
+        return
 
-# Procesar los archivos PDF
-pdf_files = [f for f in os.listdir(PDF_DIRECTORY) if f.lower().endswith(".pdf")]
-if not pdf_files:
-    print("No hay archivos PDF en la carpeta.")
-    exit(1)
-
-for pdf in pdf_files:
-    print(f"\nProcesando: {pdf}")
-    pdf_path = os.path.join(PDF_DIRECTORY, pdf)
-
-    with open(pdf_path, "rb") as f:
-        response = requests.post(GROBID_URL, files={"input": f}, data={"consolidate": "1"})
-
-    if response.status_code != 200:
-        print(f"    Error {response.status_code} al procesar {pdf}")
-        continue
-
-    try:
-        root = ET.fromstring(response.text)
-        acknowledgment = extract_acknowledgment(root)
+    if acknowledgment is None:
+        return
 
+    if acknowledgment:
+        print(f"Acknowledgment extraído de {nombre}:")
+        print(acknowledgment)
+
+        organizations = extract_organizations_from_acknowledgment(acknowledgment)
+        if organizations:
+            print("Organizaciones detectadas:")
+            # Evitar duplicados
+            existentes = {org.nombre for org in paper.organization}
+            for org_name in organizations:
+                print(f"  - {org_name}")
+                if org_name not in existentes:
+                    existentes.add(org_name)
+                    paper.organization.append(Organization(nombre=org_name))
+        else:
+            print("No se detectaron organizaciones en el acknowledgment.")
+    else:
+        print(f"No se encontró acknowledgment en {nombre}.")
+
+
+def main():
+    """Extrae el acknowledgment de los PDFs de una carpeta y muestra las organizaciones detectadas"""
+    # Configurar salida UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    # Argumentos de entrada
+    parser = argparse.ArgumentParser(description="Extraer el acknowledgment de PDFs usando GROBID.")
+    parser.add_argument("-i", "--input", default="data", help="Carpeta que contiene los archivos PDF.")
+    args = parser.parse_args()
+    pdf_directory = args.input
+
+    if not os.path.exists(pdf_directory):
+        print(f"La carpeta '{pdf_directory}' no existe.")
+        sys.exit(1)
+
+    # Procesar los archivos PDF
+    pdf_files = [f for f in os.listdir(pdf_directory) if f.lower().endswith(".pdf")]
+    if not pdf_files:
+        print("No hay archivos PDF en la carpeta.")
+        sys.exit(1)
+
+    # Reutilizar las respuestas TEI ya guardadas por el extractor
+    cache = CacheTEI(os.path.join(os.path.dirname(os.path.abspath(pdf_directory)), "xml_responses"))
+
+    # Extraer primero todos los acknowledgments para ejecutar el NER por lotes
+    acknowledgments = []
+    for pdf in pdf_files:
+        print(f"\nProcesando: {pdf}")
+        pdf_path = os.path.join(pdf_directory, pdf)
+
+        try:
+            acknowledgment = obtener_acknowledgment(pdf_path, cache=cache)
+        except ET.ParseError as e:
+            print(f"    Error al analizar XML: {e}")
+            continue
+
+        if acknowledgment is not None:
+            acknowledgments.append((pdf, acknowledgment))
+
+    # Detectar organizaciones en todos los acknowledgments usando Hugging Face
+    organizaciones_por_pdf = extraer_organizaciones_en_lote([ack for _, ack in acknowledgments])
+
+    for (pdf, acknowledgment), organizations in zip(acknowledgments, organizaciones_por_pdf):
         if acknowledgment:
-            print(f"Acknowledgment extraído de {pdf}:")
+            print(f"\nAcknowledgment extraído de {pdf}:")
             print(acknowledgment)
 
-            # Detectar organizaciones en el acknowledgment usando Hugging Face
-            organizations = extract_organizations_from_acknowledgment(acknowledgment)
-
             if organizations:
                 print("Organizaciones detectadas:")
                 for org in organizations:
@@ -129,7 +188,9 @@ for pdf in pdf_files:
             else:
                 print("No se detectaron organizaciones en el acknowledgment.")
         else:
-            print(f"No se encontró acknowledgment en {pdf}.")
+            print(f"\nNo se encontró acknowledgment en {pdf}.")
+
+
+if __name__ == "__main__":
+    main()
 
-    except ET.ParseError as e:
-        print(f"    Error al analizar XML: {e}")
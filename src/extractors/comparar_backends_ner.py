@@ -0,0 +1,141 @@
+"""
+Compara los backends NER (precisión frente a latencia) sobre los acknowledgments de
+respuestas TEI ya guardadas.
+
+El backend "transformers" se toma como referencia: para cada backend se mide el
+tiempo de inferencia (sin contar la carga del modelo) y la precisión, cobertura y F1
+de las organizaciones detectadas respecto a la referencia.
+
+Uso (desde src/):
+    python -m extractors.comparar_backends_ner -n 200
+"""
+import os
+import sys
+import time
+import argparse
+import xml.etree.ElementTree as ET
+
+from extractors.tei_cache import CacheTEI
+from extractors.tei_parser import extraer_campos_tei
+from extractors.ner import BACKENDS_NER, obtener_pipeline_ner, extraer_organizaciones_en_lote
+
+# Respuestas TEI guardadas por el extractor, relativas a la raíz del proyecto
+DIRECTORIO_TEI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "xml_responses"
+)
+
+
+def cargar_acknowledgments(directorio_tei, max_documentos=None):
+    """
+    Lee los acknowledgments no vacíos de las respuestas TEI guardadas en una cache.
+
+    Args:
+        directorio_tei (str): Directorio de la cache TEI (ver `CacheTEI`)
+        max_documentos (int, optional): Número máximo de acknowledgments a cargar
+
+    Returns:
+        list: Textos de acknowledgment
+    """
+    cache = CacheTEI(directorio_tei)
+    textos = []
+    for entrada in sorted(cache.entradas(), key=lambda e: e.get("archivo", e["clave"])):
+        tei = cache.obtener(entrada["clave"])
+        if tei is None:
+            continue
+        try:
+            acknowledgment = extraer_campos_tei(tei)["acknowledgment"]
+        except ET.ParseError as e:
+            print(f"Error al analizar {entrada.get('archivo', entrada['clave'])}: {e}")
+            continue
+        if acknowledgment:
+            textos.append(acknowledgment)
+        if max_documentos and len(textos) >= max_documentos:
+            break
+    return textos
+
+
+def comparar_conjuntos(referencia, prediccion):
+    """
+    Calcula precisión, cobertura y F1 agregados (micro) entre dos listas de conjuntos.
+
+    Returns:
+        tuple: (precision, cobertura, f1)
+    """
+    verdaderos = sum(len(r & p) for r, p in zip(referencia, prediccion))
+    predichos = sum(len(p) for p in prediccion)
+    esperados = sum(len(r) for r in referencia)
+    precision = verdaderos / predichos if predichos else 1.0
+    cobertura = verdaderos / esperados if esperados else 1.0
+    f1 = 2 * precision * cobertura / (precision + cobertura) if precision + cobertura else 0.0
+    return precision, cobertura, f1
+
+
+def comparar_backends(textos, backends=BACKENDS_NER, tamano_lote=16):
+    """
+    Ejecuta cada backend sobre los mismos textos y devuelve sus métricas.
+
+    Args:
+        textos (list): Acknowledgments a procesar
+        backends (tuple): Backends a comparar; "transformers" se añade como referencia
+        tamano_lote (int): Tamaño de lote del NER
+
+    Returns:
+        list: Diccionarios con backend, carga_s, inferencia_s, docs_por_s, precision, cobertura y f1
+    """
+    backends = ["transformers"] + [b for b in backends if b != "transformers"]
+    referencia = None
+    resultados = []
+    for backend in backends:
+        inicio = time.perf_counter()
+        try:
+            obtener_pipeline_ner(backend)
+        except ImportError as e:
+            print(f"Se omite el backend '{backend}': {e}")
+            continue
+        carga = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        organizaciones = extraer_organizaciones_en_lote(textos, tamano_lote=tamano_lote, backend=backend)
+        inferencia = time.perf_counter() - inicio
+
+        if referencia is None:
+            referencia = organizaciones
+        precision, cobertura, f1 = comparar_conjuntos(referencia, organizaciones)
+        resultados.append({
+            "backend": backend,
+            "carga_s": carga,
+            "inferencia_s": inferencia,
+            "docs_por_s": len(textos) / inferencia if inferencia else 0.0,
+            "precision": precision,
+            "cobertura": cobertura,
+            "f1": f1,
+        })
+    return resultados
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Comparar precisión y latencia de los backends NER.")
+    parser.add_argument("-i", "--input", default=DIRECTORIO_TEI, help="Carpeta con las respuestas TEI.")
+    parser.add_argument("-n", "--max-documentos", type=int, default=None,
+                        help="Número máximo de acknowledgments a evaluar.")
+    parser.add_argument("-b", "--backends", nargs="+", choices=BACKENDS_NER, default=list(BACKENDS_NER),
+                        help="Backends a comparar.")
+    parser.add_argument("--lote", type=int, default=16, help="Tamaño de lote del NER.")
+    args = parser.parse_args()
+
+    textos = cargar_acknowledgments(args.input, args.max_documentos)
+    if not textos:
+        print(f"No se encontraron acknowledgments en '{args.input}'.")
+        return
+
+    print(f"Evaluando {len(textos)} acknowledgments (referencia: transformers)\n")
+    print(f"{'Backend':<14}{'Carga (s)':>10}{'Inferencia (s)':>16}{'Docs/s':>9}{'Precisión':>11}{'Cobertura':>11}{'F1':>7}")
+    for r in comparar_backends(textos, args.backends, args.lote):
+        print(f"{r['backend']:<14}{r['carga_s']:>10.1f}{r['inferencia_s']:>16.2f}{r['docs_por_s']:>9.1f}"
+              f"{r['precision']:>11.3f}{r['cobertura']:>11.3f}{r['f1']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
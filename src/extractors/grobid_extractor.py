@@ -1,208 +1,834 @@
 import os
 import sys
+import time
+import random
 import argparse
 import requests
+from collections import deque
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import xml.etree.ElementTree as ET
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from transformers import pipeline
-import numpy as np
+from extractors.tei_cache import CacheTEI, calcular_hash_pdf, leer_ubicacion
+from extractors.tei_parser import extraer_campos_tei
+from extractors.ner import (
+    extraer_organizaciones_en_lote,
+    BACKENDS_NER,
+    PoolNER,
+)
+from extractors.ner_cache import CacheNER
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-ner_pipeline = pipeline(
-    "ner",
-    model="Jean-Baptiste/roberta-large-ner-english",
-    aggregation_strategy="simple"
-)
 
+def completar_organizaciones(registros, tamano_lote_ner=16, cache_ner=None, backend_ner=None, pool_ner=None):
+    """
+    Añade a cada registro las organizaciones detectadas en su acknowledgment.
 
-# Namespaces TEI
-namespaces = {"tei": "http://www.tei-c.org/ns/1.0"}
-
-# Funciones para extraer datos desde XML GROBID
-def Grobid_extract_title(root):
-    el = root.find(".//tei:titleStmt/tei:title", namespaces)
-    return el.text.strip() if el is not None and el.text else "Desconocido"
-
-
-def Grobid_extract_authors(root):
-    authors = []
-    for author in root.findall(".//tei:author", namespaces):
-        name_el = author.find(".//tei:persName", namespaces)
-        if name_el is not None:
-            full = " ".join(filter(None, [
-                name_el.findtext("tei:forename", default="", namespaces=namespaces),
-                name_el.findtext("tei:surname", default="", namespaces=namespaces)
-            ])).strip()
-            if full:
-                authors.append(full)
-    return authors
-
-def Grobid_extract_organizations(root):
-    orgs = set()
-    for aff in root.findall(".//tei:affiliation", namespaces):
-        org_el = aff.find(".//tei:orgName", namespaces)
-        if org_el is not None and org_el.text:
-            orgs.add(org_el.text.strip())
-
-    # Extraer organizaciones del acknowledgment
-    orgs.update(extract_organizations_from_acknowledgment(Grobid_extract_acknowledgment(root)))
-    return list(orgs)
-
-def Grobid_extract_acknowledgment(root):
-    ack_texts = []
-    for div in root.findall(".//tei:div[@type='acknowledgement']", namespaces):
-        text = " ".join(p.strip() for p in div.itertext())
-        if text:
-            ack_texts.append(text.strip())
-    return " ".join(ack_texts).strip()
-
-def extract_organizations_from_acknowledgment(acknowledgment_text):
-    # Usar el modelo NER de Hugging Face para detectar las organizaciones
-    entities = ner_pipeline(acknowledgment_text)
-    
-    organizations = {ent["word"]                    
-                     for ent in entities
-                     if ent["entity_group"] == "ORG"   # sólo entidades de tipo ORG
-       and ent["score"] >= 0.85       # umbral de confianza
-    }
+    El NER se ejecuta una sola vez para todo el grupo de registros, por lotes.
+
+    Args:
+        registros (list): Registros cuyo campo `organizations` contiene las afiliaciones
+        tamano_lote_ner (int): Número de textos por llamada al modelo NER
+        cache_ner (CacheNER, optional): Cache persistente de resultados del NER
+        backend_ner (str, optional): Backend del modelo NER (ver BACKENDS_NER)
+        pool_ner (PoolNER, optional): Pool de procesos donde ejecutar el NER
+
+    Returns:
+        list: Los mismos registros, con las organizaciones completadas
+    """
+    detectadas = extraer_organizaciones_en_lote(
+        [registro["acknowledgment"] for registro in registros], tamano_lote=tamano_lote_ner,
+        cache=cache_ner, backend=backend_ner, pool=pool_ner
+    )
+    for registro, organizaciones in zip(registros, detectadas):
+        registro["organizations"] = list(dict.fromkeys([*registro["organizations"], *organizaciones]))
+    return registros
+
+
+# Servidor y endpoints de GROBID
+GROBID_SERVIDOR = "http://localhost:8070"
+ENDPOINT_CABECERA = "/api/processHeaderDocument"
+ENDPOINT_TEXTO_COMPLETO = "/api/processFulltextDocument"
+
+# Modos de extracción:
+#   cabecera:   solo processHeaderDocument (título, autores, afiliaciones y resumen)
+#   escalonado: cabecera (consolidada) para todos los PDFs y texto completo, para el
+#               NER del acknowledgment, de los que indique el criterio elegido
+#               (ver CRITERIOS_TEXTO_COMPLETO). Con el criterio "todos" se hace una
+#               sola llamada de texto completo por PDF (ver `modo_efectivo`)
+#   completo:   processFulltextDocument para todos los PDFs
+MODOS_EXTRACCION = ("cabecera", "escalonado", "completo")
+
+
+def opciones_grobid(consolidar="0"):
+    """Parámetros de formulario enviados a GROBID (forman parte de la clave de la cache TEI)."""
+    return {"consolidateHeader": str(consolidar)}
 
 
-    return organizations
+# Opciones por defecto de la llamada de texto completo
+OPCIONES_GROBID = opciones_grobid("0")
 
-def Grobid_extract_abstract(root):
-    abstract_el = root.find(".//tei:abstract", namespaces)
-    if abstract_el is not None:
-        return " ".join(abstract_el.itertext()).strip()
-    return ""
 
-# Lista para almacenar los datos de todos los PDFs
-all_pdf_data = []
+def servidor_grobid(grobid_url):
+    """Devuelve la URL base del servidor aunque se indique la de un endpoint concreto."""
+    return grobid_url.split("/api/")[0].rstrip("/")
 
-def process_pdfs(pdf_directory="data/raw", grobid_url="http://localhost:8070/api/processFulltextDocument"):
+
+# Versión de la extracción; incrementarla cuando cambie el contenido de los registros
+VERSION_EXTRACCION = 1
+
+
+def todos(registro):
+    """Criterio del modo escalonado: se extrae el acknowledgment de todos los PDFs."""
+    return True
+
+
+def sin_organizaciones(registro):
+    """Criterio del modo escalonado: solo los PDFs cuya cabecera no trae ninguna afiliación."""
+    return not registro["organizations"]
+
+
+# Criterios del modo escalonado para pedir el texto completo de un PDF.
+#   todos:            conserva las organizaciones financiadoras del acknowledgment de
+#                     todos los papers; equivale al modo "completo" con la cabecera
+#                     consolidada (una sola llamada a GROBID por PDF)
+#   sin-afiliaciones: ahorra la llamada de texto completo de los PDFs con afiliaciones
+#                     en la cabecera, a cambio de perder las organizaciones que solo
+#                     aparecen en su acknowledgment (financiadores, proyectos...)
+CRITERIOS_TEXTO_COMPLETO = {
+    "todos": todos,
+    "sin-afiliaciones": sin_organizaciones,
+}
+
+
+def criterio_texto_completo(criterio):
+    """Devuelve la función de un criterio del modo escalonado (nombre o callable)."""
+    if callable(criterio):
+        return criterio
+    if criterio not in CRITERIOS_TEXTO_COMPLETO:
+        raise ValueError(f"Criterio de texto completo desconocido: '{criterio}'. "
+                         f"Opciones: {', '.join(CRITERIOS_TEXTO_COMPLETO)}")
+    return CRITERIOS_TEXTO_COMPLETO[criterio]
+
+
+def modo_efectivo(modo, necesita_texto_completo):
     """
-    Procesa los archivos PDF en el directorio especificado utilizando GROBID.
-    
+    Devuelve el modo con el que se procesa realmente cada PDF.
+
+    Si en modo escalonado todos los PDFs necesitan el texto completo, pedir además la
+    cabecera duplicaría las llamadas a GROBID: el TEI de texto completo ya incluye la
+    cabecera, así que se usa el modo "completo", con la consolidación de la cabecera.
+    """
+    if modo == "escalonado" and criterio_texto_completo(necesita_texto_completo) is todos:
+        return "completo"
+    return modo
+
+
+def enviar_pdf_a_grobid(pdf_path, grobid_url, opciones=None, max_reintentos=5, espera_inicial=1.0):
+    """
+    Envía un PDF a GROBID reintentando mientras el servidor responda 503 (ocupado).
+
+    GROBID devuelve 503 cuando su pool interno está lleno; en ese caso se espera con
+    backoff exponencial (con algo de aleatoriedad) antes de volver a enviar.
+
     Args:
-        pdf_directory (str): Directorio que contiene los archivos PDF
+        pdf_path (str): Ruta al archivo PDF
         grobid_url (str): URL del endpoint de GROBID
-        
+        opciones (dict, optional): Parámetros del formulario. Defaults to OPCIONES_GROBID.
+        max_reintentos (int): Número máximo de reintentos ante un 503
+        espera_inicial (float): Segundos de espera antes del primer reintento
+
     Returns:
-        list: Lista de diccionarios con los datos extraídos de cada PDF
+        requests.Response: Última respuesta recibida de GROBID
     """
-    global all_pdf_data
-    all_pdf_data = []
+    opciones = OPCIONES_GROBID if opciones is None else opciones
+    espera = espera_inicial
+    for intento in range(max_reintentos + 1):
+        with open(pdf_path, "rb") as f:
+            response = requests.post(grobid_url, files={"input": f}, data=opciones)
+
+        if response.status_code != 503 or intento == max_reintentos:
+            return response
+
+        print(f"     GROBID ocupado (503) con {os.path.basename(pdf_path)}, reintento en {espera:.1f}s")
+        time.sleep(espera + random.uniform(0, espera / 2))
+        espera *= 2
+    return response
+
+
+def enviar_pdfs_en_orden(pdf_paths, grobid_url, opciones=None, concurrencia=1, max_reintentos=5):
+    """
+    Envía los PDFs a GROBID con un número acotado de documentos en vuelo.
+
+    Las respuestas se devuelven en el mismo orden que `pdf_paths`, independientemente
+    del orden en que termine GROBID. Como mucho hay `concurrencia` peticiones activas y
+    otras tantas respuestas esperando a ser consumidas.
+
+    Args:
+        pdf_paths (list): Rutas de los PDFs a procesar
+        grobid_url (str): URL del endpoint de GROBID
+        opciones (dict, optional): Parámetros del formulario. Defaults to OPCIONES_GROBID.
+        concurrencia (int): Número máximo de documentos en vuelo
+        max_reintentos (int): Reintentos ante respuestas 503
+
+    Yields:
+        tuple: (pdf_path, requests.Response o Exception)
+    """
+    concurrencia = max(1, concurrencia)
+
+    def enviar(pdf_path):
+        try:
+            return enviar_pdf_a_grobid(pdf_path, grobid_url, opciones, max_reintentos=max_reintentos)
+        except requests.RequestException as e:
+            return e
+
+    pendientes = iter(pdf_paths)
+    en_vuelo = deque()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        for pdf_path in pendientes:
+            en_vuelo.append((pdf_path, executor.submit(enviar, pdf_path)))
+            if len(en_vuelo) >= 2 * concurrencia:
+                break
+
+        while en_vuelo:
+            pdf_path, futuro = en_vuelo.popleft()
+            resultado = futuro.result()
+            siguiente = next(pendientes, None)
+            if siguiente is not None:
+                en_vuelo.append((siguiente, executor.submit(enviar, siguiente)))
+            yield pdf_path, resultado
+
+
+def resolver_directorio_pdfs(pdf_directory):
+    """Convierte una ruta relativa en absoluta respecto a la raíz del proyecto."""
+    if os.path.isabs(pdf_directory):
+        return pdf_directory
+    # Encontrar la raíz del proyecto (2 niveles hacia arriba desde este script)
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, pdf_directory)
+
+
+def version_extraccion(modo="escalonado", consolidar_cabecera="1", consolidar_texto_completo="0",
+                       necesita_texto_completo="todos", **_):
+    """
+    Identifica la configuración con la que se extrae un registro. Si cambia, los PDFs
+    registrados en el manifiesto se vuelven a procesar.
+    """
+    modo = modo_efectivo(modo, necesita_texto_completo)
+    version = f"{VERSION_EXTRACCION}:{modo}:{consolidar_cabecera}:{consolidar_texto_completo}"
+    if modo == "escalonado" and isinstance(necesita_texto_completo, str):
+        version += f":{necesita_texto_completo}"
+    return version
+
+
+def _etapas(grobid_url, modo, consolidar_cabecera, consolidar_texto_completo):
+    """
+    Devuelve el endpoint y las opciones de la primera etapa (cabecera o texto completo
+    según el modo) y de la etapa de texto completo del modo escalonado.
+    """
+    servidor = servidor_grobid(grobid_url)
+    url_texto_completo = servidor + ENDPOINT_TEXTO_COMPLETO
+    url_primera_etapa = url_texto_completo if modo == "completo" else servidor + ENDPOINT_CABECERA
+    return (url_primera_etapa, opciones_grobid(consolidar_cabecera),
+            url_texto_completo, opciones_grobid(consolidar_texto_completo))
+
+
+def registro_desde_campos(filename, campos):
+    """Construye el registro de un PDF a partir de los campos extraídos de su TEI."""
+    return {
+        "filename": filename,
+        "title": campos["title"],
+        "authors": campos["authors"],
+        "organizations": campos["affiliations"],
+        "acknowledgment": campos["acknowledgment"],
+        "abstract": campos["abstract"]
+    }
+
+
+def _obtener_tei_en_orden(documentos, cache, grobid_url, opciones, concurrencia, max_reintentos):
+    """
+    Devuelve el TEI de cada documento, en orden, enviando a GROBID solo los que no
+    están en la cache.
+
+    Args:
+        documentos (list): Tuplas (pdf_path, sha256_pdf)
+        cache (CacheTEI): Cache de respuestas TEI
+        grobid_url (str): URL del endpoint de GROBID
+        opciones (dict): Parámetros del formulario
+        concurrencia (int): Número máximo de PDFs enviados a GROBID a la vez
+        max_reintentos (int): Reintentos ante respuestas 503
+
+    Yields:
+        tuple: (documento, contenido TEI o None si GROBID falló)
+    """
+    claves = [CacheTEI.clave(sha256_pdf, grobid_url, opciones) for _, sha256_pdf in documentos]
+    pendientes = [pdf_path for (pdf_path, _), clave in zip(documentos, claves) if not cache.contiene(clave)]
+    respuestas = enviar_pdfs_en_orden(pendientes, grobid_url, opciones, concurrencia, max_reintentos)
+    print(f" {grobid_url}: {len(documentos) - len(pendientes)} PDFs en cache, {len(pendientes)} por enviar a GROBID")
+
+    for documento, clave in zip(documentos, claves):
+        pdf_path, sha256_pdf = documento
+        pdf = os.path.basename(pdf_path)
+
+        tei = cache.obtener(clave)
+        if tei is None:
+            _, response = next(respuestas)
+
+            if isinstance(response, Exception):
+                print(f" Error de conexión al procesar {pdf}: {response}")
+                yield documento, None
+                continue
+
+            if response.status_code != 200:
+                print(f" Error {response.status_code} al procesar {pdf}")
+                yield documento, None
+                continue
+
+            # Guardar la respuesta XML en la cache
+            tei = response.content
+            cache.guardar(clave, tei, {
+                "archivo": pdf,
+                "sha256": sha256_pdf,
+                "url": grobid_url,
+                "opciones": opciones,
+            })
+            print(f"     Respuesta XML de {pdf} guardada en: {cache.ruta_paquete}")
+
+        yield documento, tei
+
+
+def iterar_pdfs(pdf_directory="data/raw", grobid_url=GROBID_SERVIDOR,
+                concurrencia=1, max_reintentos=5, tamano_lote_ner=16, backend_ner=None, procesos_ner=1,
+                modo="escalonado", consolidar_cabecera="1", consolidar_texto_completo="0",
+                necesita_texto_completo="todos", solo_archivos=None):
+    """
+    Procesa los archivos PDF en el directorio especificado utilizando GROBID y
+    devuelve los datos extraídos de uno en uno.
+
+    No se guarda ningún estado a nivel de módulo: cada registro se entrega en cuanto
+    está listo, de modo que el consumo de memoria no crece con el tamaño del corpus.
+    La detección de organizaciones en los acknowledgments se hace por grupos de
+    `tamano_lote_ner` documentos para aprovechar el procesamiento por lotes del NER.
+    Con `procesos_ner > 1` el NER se reparte entre varios procesos; conviene entonces
+    usar un `tamano_lote_ner` de varias veces el número de procesos.
+
+    En modo "escalonado" se pide a GROBID la cabecera, con consolidación, para el
+    título, los autores, las afiliaciones y el resumen, y el texto completo sin
+    consolidar, para el NER del acknowledgment, de los documentos para los que
+    `necesita_texto_completo(registro)` es cierto. Con el criterio por defecto ("todos")
+    se hace en su lugar una sola llamada de texto completo con la cabecera consolidada
+    (ver `modo_efectivo`). En modo "cabecera" solo se pide la cabecera, varias veces más
+    rápida, y el acknowledgment queda vacío; en modo "completo" todos los documentos se
+    procesan solo con el texto completo. Los registros tienen siempre los mismos campos.
+
+    Las respuestas TEI se guardan en una cache direccionada por el hash del PDF, el
+    endpoint y las opciones de GROBID, de modo que un PDF sin cambios no se vuelve a
+    enviar al servidor. Los PDFs con contenido idéntico se procesan una sola vez.
+    Las respuestas se guardan comprimidas en un único paquete (ver `CacheTEI`).
     
+    Args:
+        pdf_directory (str): Directorio que contiene los archivos PDF
+        grobid_url (str): URL del servidor GROBID (se admite también la de un endpoint)
+        concurrencia (int): Número máximo de PDFs enviados a GROBID a la vez
+        max_reintentos (int): Reintentos por PDF cuando GROBID responde 503 (ocupado)
+        tamano_lote_ner (int): Documentos agrupados en cada ejecución por lotes del NER
+        backend_ner (str, optional): Backend del modelo NER (ver BACKENDS_NER)
+        procesos_ner (int): Procesos dedicados al NER (1 = en este proceso)
+        modo (str): Uno de MODOS_EXTRACCION
+        consolidar_cabecera (str): Nivel de consolidación de la llamada de cabecera
+            (y de la de texto completo en modo "completo")
+        consolidar_texto_completo (str): Nivel de consolidación de la llamada de texto
+            completo en modo "escalonado"
+        necesita_texto_completo (str | callable): Criterio del modo escalonado: uno de
+            CRITERIOS_TEXTO_COMPLETO o una función que recibe el registro de la cabecera
+        solo_archivos (iterable, optional): Nombres de los PDFs a procesar (p. ej. los
+            pendientes según el manifiesto). Por defecto, todos los del directorio.
+        
+    Yields:
+        dict: Datos extraídos de cada PDF, en el orden de los archivos
+    """
+    if modo not in MODOS_EXTRACCION:
+        raise ValueError(f"Modo de extracción desconocido: '{modo}'. Opciones: {', '.join(MODOS_EXTRACCION)}")
+
     # Verificar si la ruta es relativa y convertirla a ruta absoluta basada en la raíz del proyecto
-    if not os.path.isabs(pdf_directory):
-        # Encontrar la raíz del proyecto (2 niveles hacia arriba desde este script)
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        pdf_directory = os.path.join(project_root, pdf_directory)
+    pdf_directory = resolver_directorio_pdfs(pdf_directory)
 
     if not os.path.exists(pdf_directory):
         print(f"La carpeta '{pdf_directory}' no existe.")
-        return []
+        return
 
-    # Crear directorio para guardar las respuestas XML si no existe
-    output_dir = os.path.join(os.path.dirname(pdf_directory), "xml_responses")
-    os.makedirs(output_dir, exist_ok=True)
-    
     # Procesar los archivos PDF
-    pdf_files = [f for f in os.listdir(pdf_directory) if f.lower().endswith(".pdf")]
+    pdf_files = sorted(f for f in os.listdir(pdf_directory) if f.lower().endswith(".pdf"))
+    if solo_archivos is not None:
+        solo_archivos = set(solo_archivos)
+        pdf_files = [f for f in pdf_files if f in solo_archivos]
     if not pdf_files:
         print("No hay archivos PDF en la carpeta.")
-        return []
+        return
 
-    for pdf in pdf_files:
-        print(f"\n Procesando: {pdf}")
-        pdf_path = os.path.join(pdf_directory, pdf)
+    # Cache de respuestas TEI (se crea el directorio si no existe)
+    output_dir = os.path.join(os.path.dirname(pdf_directory), "xml_responses")
+    cache = CacheTEI(output_dir)
+
+    # Endpoint y opciones de cada etapa
+    modo = modo_efectivo(modo, necesita_texto_completo)
+    url_primera_etapa, opciones_primera_etapa, url_texto_completo, opciones_texto_completo = _etapas(
+        grobid_url, modo, consolidar_cabecera, consolidar_texto_completo)
+    necesita_texto_completo = criterio_texto_completo(necesita_texto_completo)
+
+    # El NER solo hace falta si algún documento se procesa con el texto completo
+    cache_ner = None
+    pool_ner = None
+    if modo != "cabecera":
+        # Cache de organizaciones detectadas por el NER, junto a las respuestas TEI
+        cache_ner = CacheNER(os.path.join(os.path.dirname(pdf_directory), "ner_cache.sqlite"))
+        pool_ner = PoolNER(procesos_ner, backend_ner) if procesos_ner > 1 else None
+
+    def completar_lote(lote):
+        """Añade el acknowledgment (en modo escalonado) y sus organizaciones a un lote de registros."""
+        if modo == "escalonado":
+            seleccion = [(documento, registro) for documento, registro in lote if necesita_texto_completo(registro)]
+            teis = _obtener_tei_en_orden([documento for documento, _ in seleccion], cache, url_texto_completo,
+                                         opciones_texto_completo, concurrencia, max_reintentos)
+            for (_, tei), (_, registro) in zip(teis, seleccion):
+                if tei is None:
+                    continue
+                try:
+                    registro["acknowledgment"] = extraer_campos_tei(tei)["acknowledgment"]
+                except ET.ParseError as e:
+                    print(f"     Error al analizar XML de {registro['filename']}: {e}")
+
+        registros = [registro for _, registro in lote]
+        if modo == "cabecera":
+            return registros
+        return completar_organizaciones(registros, tamano_lote_ner, cache_ner, backend_ner, pool_ner)
+
+    # El pool y la cache del NER se cierran también si el consumidor abandona el
+    # generador o se produce un error
+    try:
+        # Calcular el hash de cada PDF y descartar los duplicados por contenido
+        documentos = []
+        vistos = {}
+        for pdf in pdf_files:
+            pdf_path = os.path.join(pdf_directory, pdf)
+            sha256_pdf = calcular_hash_pdf(pdf_path)
+            if sha256_pdf in vistos:
+                print(f" {pdf} es idéntico a {vistos[sha256_pdf]}, se omite")
+                continue
+            vistos[sha256_pdf] = pdf
+            documentos.append((pdf_path, sha256_pdf))
+
+        # Registros a la espera de completar el lote: (documento, registro)
+        lote = []
+
+        for documento, tei in _obtener_tei_en_orden(documentos, cache, url_primera_etapa, opciones_primera_etapa,
+                                                     concurrencia, max_reintentos):
+            pdf = os.path.basename(documento[0])
+            print(f"\n Procesando: {pdf}")
+            if tei is None:
+                continue
+
+            try:
+                # Extraer todos los campos en una sola pasada sobre el TEI
+                campos = extraer_campos_tei(tei)
+
+                # Almacenar los datos en un diccionario; las organizaciones del
+                # acknowledgment se añaden al completar el lote
+                pdf_data = registro_desde_campos(pdf, campos)
+                lote.append((documento, pdf_data))
+            
+                # Opcional: Mostrar un resumen de los datos extraídos
+                # print(f"     Título: {pdf_data['title']}")
+                # print(f"     # Autores: {len(pdf_data['authors'])}")
+                # print(f"     Organizaciones: {', '.join(pdf_data['organizations'])}")
+                # print(f"     Agradecimientos: {pdf_data['acknowledgment']}")
+                # print(f"     Resumen: {pdf_data['abstract']}")
+
+            except ET.ParseError as e:
+                print(f"     Error al analizar XML: {e}")
+
+            if len(lote) >= tamano_lote_ner:
+                yield from completar_lote(lote)
+                lote = []
+
+        if lote:
+            yield from completar_lote(lote)
+    finally:
+        if pool_ner is not None:
+            pool_ner.cerrar()
+        if cache_ner is not None:
+            cache_ner.mostrar_estadisticas()
+            cache_ner.cerrar()
+
+
+def _extraer_tei_guardado(tarea):
+    """Analiza un TEI guardado en un proceso del pool. Devuelve (filename, campos o mensaje de error)."""
+    filename, ubicacion = tarea
+    try:
+        return filename, extraer_campos_tei(leer_ubicacion(ubicacion))
+    except (ET.ParseError, OSError) as e:
+        return filename, str(e)
+
+
+def _seleccionar_tei_guardados(cache, grobid_url, opciones):
+    """
+    Devuelve, por nombre de PDF, la última entrada de la cache obtenida con el endpoint
+    y las opciones indicados.
+    """
+    seleccion = {}
+    for entrada in cache.entradas():
+        sha256_pdf = entrada.get("sha256")
+        if not sha256_pdf or "archivo" not in entrada:
+            continue
+        if CacheTEI.clave(sha256_pdf, grobid_url, opciones) == entrada["clave"] and cache.contiene(entrada["clave"]):
+            seleccion[entrada["archivo"]] = entrada
+    return seleccion
 
-        with open(pdf_path, "rb") as f:
-            response = requests.post(grobid_url, files={"input": f}, data={"consolidate": "1"})
 
-        if response.status_code != 200:
-            print(f" Error {response.status_code} al procesar {pdf}")
-            continue
+def iterar_tei_guardados(pdf_directory="data/raw", grobid_url=GROBID_SERVIDOR, procesos=None,
+                         tamano_lote_ner=16, backend_ner=None, procesos_ner=1,
+                         modo="escalonado", consolidar_cabecera="1", consolidar_texto_completo="0",
+                         necesita_texto_completo="todos", solo_archivos=None, tamano_bloque=64):
+    """
+    Modo sin conexión: vuelve a generar los registros a partir de las respuestas TEI
+    guardadas en la cache, sin necesitar un servidor GROBID.
 
-        try:
-            # Guardar la respuesta XML en un archivo
-            xml_filename = os.path.splitext(pdf)[0] + ".xml"
-            xml_path = os.path.join(output_dir, xml_filename)
-            with open(xml_path, "w", encoding="utf-8") as xml_file:
-                xml_file.write(response.text)
-            print(f"     Respuesta XML guardada en: {xml_path}")
-            
-            root = ET.fromstring(response.text)
-            
-            # Almacenar los datos en un diccionario
-            pdf_data = {
-                "filename": pdf,
-                "title": Grobid_extract_title(root),
-                "authors": Grobid_extract_authors(root),
-                "organizations": Grobid_extract_organizations(root),
-                "acknowledgment": Grobid_extract_acknowledgment(root),
-                "abstract": Grobid_extract_abstract(root)
-            }
-            
-            # Agregar el diccionario a la lista
-            all_pdf_data.append(pdf_data)
-            
-            # Opcional: Mostrar un resumen de los datos extraídos
-            # print(f"     Título: {pdf_data['title']}")
-            # print(f"     # Autores: {len(pdf_data['authors'])}")
-            # print(f"     Organizaciones: {', '.join(pdf_data['organizations'])}")
-            # print(f"     Agradecimientos: {pdf_data['acknowledgment']}")
-            # print(f"     Resumen: {pdf_data['abstract']}")
-
-        except ET.ParseError as e:
-            print(f"     Error al analizar XML: {e}")
-            
-    return all_pdf_data
+    Sirve para aplicar cambios en la extracción (un campo nuevo del TEI, el umbral o
+    el backend del NER...) sin repetir las llamadas a GROBID. El análisis de los TEI
+    se reparte entre `procesos` procesos y el NER se ejecuta por lotes como en
+    `iterar_pdfs`, de modo que el tiempo lo marca la CPU y no la red.
+
+    Se usan las respuestas guardadas con el endpoint y las opciones que corresponden
+    a `modo` y a los niveles de consolidación; los PDFs sin respuesta guardada se
+    omiten. En modo escalonado, el acknowledgment se toma del TEI de texto completo
+    si está en la cache.
+
+    Args:
+        pdf_directory (str): Directorio de los PDFs; la cache está en `xml_responses` a su lado
+        grobid_url (str): URL del servidor GROBID con la que se guardaron las respuestas
+        procesos (int, optional): Procesos que analizan los TEI. Por defecto, uno por CPU.
+        tamano_lote_ner, backend_ner, procesos_ner, modo, consolidar_cabecera,
+        consolidar_texto_completo, necesita_texto_completo, solo_archivos: Como en `iterar_pdfs`
+        tamano_bloque (int): TEI enviados a cada proceso por tarea
+
+    Yields:
+        dict: Datos extraídos de cada PDF, ordenados por nombre de archivo
+    """
+    if modo not in MODOS_EXTRACCION:
+        raise ValueError(f"Modo de extracción desconocido: '{modo}'. Opciones: {', '.join(MODOS_EXTRACCION)}")
+
+    pdf_directory = resolver_directorio_pdfs(pdf_directory)
+    directorio_datos = os.path.dirname(pdf_directory)
+    cache = CacheTEI(os.path.join(directorio_datos, "xml_responses"))
+
+    modo = modo_efectivo(modo, necesita_texto_completo)
+    url_primera_etapa, opciones_primera_etapa, url_texto_completo, opciones_texto_completo = _etapas(
+        grobid_url, modo, consolidar_cabecera, consolidar_texto_completo)
+    necesita_texto_completo = criterio_texto_completo(necesita_texto_completo)
+
+    seleccion = _seleccionar_tei_guardados(cache, url_primera_etapa, opciones_primera_etapa)
+    if solo_archivos is not None:
+        solo_archivos = set(solo_archivos)
+        seleccion = {archivo: entrada for archivo, entrada in seleccion.items() if archivo in solo_archivos}
+    if not seleccion:
+        print(f"No hay respuestas TEI guardadas de {url_primera_etapa} con las opciones {opciones_primera_etapa}.")
+        return
+    archivos = sorted(seleccion)
+    print(f" Reextrayendo {len(archivos)} PDFs desde {cache.directorio}")
+
+    cache_ner = None
+    pool_ner = None
+    if modo != "cabecera":
+        cache_ner = CacheNER(os.path.join(directorio_datos, "ner_cache.sqlite"))
+        pool_ner = PoolNER(procesos_ner, backend_ner) if procesos_ner > 1 else None
+
+    # Los procesos de análisis y el NER se cierran también si el consumidor abandona el
+    # generador o se produce un error; las tareas del pool que no han empezado se cancelan
+    pool = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        def completar_lote(registros):
+            if modo == "escalonado":
+                tareas = []
+                for registro in registros:
+                    if not necesita_texto_completo(registro):
+                        continue
+                    entrada = seleccion[registro["filename"]]
+                    clave = CacheTEI.clave(entrada["sha256"], url_texto_completo, opciones_texto_completo)
+                    ubicacion = cache.ubicacion(clave)
+                    if ubicacion is None:
+                        print(f"     {registro['filename']}: no hay texto completo guardado, se omite el acknowledgment")
+                        continue
+                    tareas.append((registro, ubicacion))
+                resultados = pool.map(_extraer_tei_guardado, [(r["filename"], ruta) for r, ruta in tareas])
+                for (registro, _), (_, campos) in zip(tareas, resultados):
+                    if isinstance(campos, dict):
+                        registro["acknowledgment"] = campos["acknowledgment"]
+
+            if modo == "cabecera":
+                return registros
+            return completar_organizaciones(registros, tamano_lote_ner, cache_ner, backend_ner, pool_ner)
+
+        tareas = [(archivo, cache.ubicacion(seleccion[archivo]["clave"])) for archivo in archivos]
+        lote = []
+        for filename, campos in pool.map(_extraer_tei_guardado, tareas, chunksize=tamano_bloque):
+            if not isinstance(campos, dict):
+                print(f"     Error al analizar XML de {filename}: {campos}")
+                continue
+            lote.append(registro_desde_campos(filename, campos))
+            if len(lote) >= tamano_lote_ner:
+                yield from completar_lote(lote)
+                lote = []
+        if lote:
+            yield from completar_lote(lote)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if pool_ner is not None:
+            pool_ner.cerrar()
+        if cache_ner is not None:
+            cache_ner.mostrar_estadisticas()
+            cache_ner.cerrar()
+
+
+def process_pdfs(pdf_directory="data/raw", grobid_url=GROBID_SERVIDOR, **opciones):
+    """
+    Procesa los archivos PDF del directorio y devuelve todos los datos extraídos.
+
+    Envoltorio de `iterar_pdfs` que acumula los registros en una lista.
 
-# Funciones normalizadas que devuelven los datos de todos los PDFs
-def Grobid_extract_title_Normalizado():
-    return [pdf_data["title"] for pdf_data in all_pdf_data]
+    Args:
+        pdf_directory (str): Directorio que contiene los archivos PDF
+        grobid_url (str): URL del servidor GROBID
+        **opciones: Resto de argumentos de `iterar_pdfs` (concurrencia, modo, NER...)
 
-def Grobid_extract_authors_Normalizado():
-    return [pdf_data["authors"] for pdf_data in all_pdf_data]
+    Returns:
+        list: Lista de diccionarios con los datos extraídos de cada PDF, en el orden de los archivos
+    """
+    return list(iterar_pdfs(pdf_directory, grobid_url, **opciones))
 
-def Grobid_extract_organizations_Normalizado():
-    return [pdf_data["organizations"] for pdf_data in all_pdf_data]
+# Funciones normalizadas que devuelven un campo de todos los PDFs extraídos
+def Grobid_extract_title_Normalizado(pdfs_extraidos):
+    return [pdf_data["title"] for pdf_data in pdfs_extraidos]
 
+def Grobid_extract_authors_Normalizado(pdfs_extraidos):
+    return [pdf_data["authors"] for pdf_data in pdfs_extraidos]
 
-def get_all_pdf_data():
-    return all_pdf_data
+def Grobid_extract_organizations_Normalizado(pdfs_extraidos):
+    return [pdf_data["organizations"] for pdf_data in pdfs_extraidos]
+
+
+def generar_embeddings_y_similitud(pdfs_extraidos, papers_objetos=None, umbral=0.30, nuevos=None, almacen=None,
+                                   tamano_bloque=1024, k=None, mutuos=True, indice="exacto", pesos=True,
+                                   tamano_lote_embeddings=64, procesos_embeddings=1, precision="float32"):
+    """
+    Calcula la similitud entre los resúmenes y enlaza los papers parecidos.
 
+    Args:
+        pdfs_extraidos (list): Registros con `filename` y `abstract`
+        papers_objetos (list, optional): Papers en el mismo orden que `pdfs_extraidos`
+        umbral (float): Similitud mínima para enlazar dos papers
+        nuevos (iterable, optional): Nombres de archivo de los papers añadidos en esta
+            ejecución. Si se indica, solo se consultan esos papers contra el corpus
+            almacenado y se añaden sus enlaces; los enlaces entre papers anteriores ya
+            existen, y los de papers retirados se eliminan con `EstadoPipeline.eliminar`.
+            El coste es proporcional al número de papers nuevos. Con `k`, se recalculan
+            también los enlaces de los papers anteriores vecinos de los nuevos (ver
+            `enlaces_top_k_incrementales`), de modo que ninguno pasa de k.
+        almacen (AlmacenEmbeddings, optional): Almacén persistente de embeddings. Por
+            defecto, el del modelo MODELO_EMBEDDINGS en DIRECTORIO_EMBEDDINGS; solo se codifican
+            los resúmenes que no estén en él.
+        tamano_bloque (int): Filas por bloque en el cálculo de similitud; acota la
+            memoria usada (tamano_bloque² similitudes a la vez)
+        k (int, optional): Si se indica, cada paper se enlaza como mucho con sus k
+            vecinos más similares que superen el umbral, en lugar de con todos los que
+            lo superan. Evita subgrafos casi completos en grupos temáticos densos. Los
+            papers con el resumen idéntico se enlazan siempre entre sí.
+        mutuos (bool): Con `k`, enlazar solo los pares que están cada uno entre los k
+            vecinos del otro (en ambos sentidos); si es False, cada paper se enlaza en
+            un solo sentido con sus k vecinos
+        indice (str): Con `k`, tipo de índice de vecinos ("exacto", "sklearn" o "ivf").
+            El índice se guarda junto al almacén, en un directorio propio de su modelo y
+            precisión, y en cada llamada solo se le añaden los resúmenes nuevos y se le
+            retiran los que ya no están.
+        pesos (bool): Guardar la similitud de cada enlace (ver `Paper.similitudes`), que
+            el grafo y el RDF exportan como peso de `similar_to`
+        tamano_lote_embeddings (int): Resúmenes por lote del modelo de embeddings
+        procesos_embeddings (int): Procesos de codificación para corpus grandes (ver
+            `codificar_textos`); el modelo se carga una sola vez por proceso
+        precision (str): Precisión del almacén y del índice de vecinos ("float32",
+            "float16" o "int8"); la similitud se calcula directamente sobre los vectores
+            reducidos. Solo se usa si no se pasa `almacen`.
+    """
+    # Dependencias pesadas: se importan solo cuando se calcula la similitud
+    from similitud.almacen_embeddings import AlmacenEmbeddings, DIRECTORIO_EMBEDDINGS
+    import numpy as np
+    from similitud.bloques import pares_similares
+    from similitud.indices import sincronizar_indice, enlaces_top_k, enlaces_top_k_incrementales
+    from similitud.modelo_embeddings import codificar_textos, MODELO_EMBEDDINGS
 
-def generar_embeddings_y_similitud(pdfs_extraidos, papers_objetos=None, umbral=0.30):
     abstracts = [pdf["abstract"] for pdf in pdfs_extraidos]
     nombres_pdf = [pdf["filename"] for pdf in pdfs_extraidos]
 
-    modelo = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = modelo.encode(abstracts)
-    matriz_similitud = cosine_similarity(embeddings)
+    def codificar(textos):
+        # El modelo solo se carga si hay resúmenes sin embedding almacenado
+        return codificar_textos(textos, MODELO_EMBEDDINGS, tamano_lote_embeddings, procesos_embeddings)
+
+    almacen = almacen or AlmacenEmbeddings(DIRECTORIO_EMBEDDINGS, MODELO_EMBEDDINGS, precision)
+    filas_almacen = almacen.filas_de(abstracts, codificar)
+
+    # Los pares se calculan por bloques y se consumen a medida que se generan
+    filas_consulta = None
+    if nuevos is not None:
+        nuevos = set(nuevos)
+        filas_consulta = [i for i, nombre in enumerate(nombres_pdf) if nombre in nuevos]
+        if not filas_consulta:
+            return
+    bidireccional = True
+    if k is None:
+        # Cada bloque se lee de la matriz mapeada del almacén por sus filas, sin copiarla
+        pares = pares_similares(almacen.matriz(), umbral, tamano_bloque, filas_consulta, filas=filas_almacen)
+    else:
+        # El índice se guarda con las filas del almacén como identificadores y solo se
+        # le añaden los resúmenes nuevos y se le retiran los que ya no están. Cada almacén
+        # (modelo y precisión) tiene sus propios índices
+        directorio_indice = os.path.join(os.path.dirname(almacen.ruta_matriz), "indices", almacen.nombre, indice)
+        matriz = almacen.matriz()
+        indice_vecinos = sincronizar_indice(indice, directorio_indice, matriz, filas_almacen,
+                                            precision=almacen.precision)
+        posiciones = {}
+        for posicion, fila in enumerate(filas_almacen.tolist()):
+            posiciones.setdefault(fila, []).append(posicion)
+        nuevas = None if filas_consulta is None else set(filas_consulta)
+        if nuevas is None:
+            enlaces = enlaces_top_k(indice_vecinos, matriz, k, umbral, mutuos, None, tamano_bloque)
+            recalculadas = set()
+        else:
+            enlaces, filas_recalculadas = enlaces_top_k_incrementales(
+                indice_vecinos, matriz, k, umbral, np.unique(filas_almacen[filas_consulta]), mutuos, tamano_bloque)
+            recalculadas = {p for fila in filas_recalculadas for p in posiciones[fila]} - nuevas
+            # Los enlaces recalculados sustituyen a los anteriores (salvo los de los
+            # papers con el mismo resumen, que no dependen de los vecinos)
+            if papers_objetos:
+                posicion_de = {id(paper): posicion for posicion, paper in enumerate(papers_objetos)}
+                for posicion in recalculadas:
+                    paper = papers_objetos[posicion]
+                    for similar in list(paper.papersSimilares):
+                        otra = posicion_de.get(id(similar))
+                        if otra is not None and filas_almacen[otra] == filas_almacen[posicion]:
+                            continue
+                        paper.quitar_similar(similar)
+                        if mutuos:
+                            similar.quitar_similar(paper)
+
+        def pares_top_k():
+            # Los papers con el mismo resumen comparten fila, así que el índice no los
+            # encuentra entre sí: se enlazan directamente, además de con sus k vecinos
+            for grupo in posiciones.values():
+                for x, i in enumerate(grupo):
+                    for j in grupo[x + 1:]:
+                        if nuevas is None or i in nuevas or j in nuevas:
+                            yield i, j, 1.0
+                            if not mutuos:
+                                yield j, i, 1.0
+            # Una fila consultada también es la de los papers anteriores con el mismo
+            # resumen, cuyos enlaces ya existen: solo se emiten los de papers nuevos o
+            # recalculados
+            for a, b, similitud in enlaces:
+                for i in posiciones[a]:
+                    for j in posiciones[b]:
+                        if (nuevas is None or i in nuevas or i in recalculadas
+                                or (mutuos and (j in nuevas or j in recalculadas))):
+                            yield i, j, similitud
+
+        pares = pares_top_k()
+        bidireccional = mutuos
+
+    for i, j, similitud in pares:
+        # Agregar el paper similar a la lista papersSimilares (de ambos papers si la relación es simétrica)
+        if papers_objetos:
+            peso = similitud if pesos else None
+            print(f"Agregando paper similar {papers_objetos[j].title} a {papers_objetos[i].title} con similitud {similitud}")
+            papers_objetos[i].agregar_similar(papers_objetos[j], peso)
+            if bidireccional:
+                papers_objetos[j].agregar_similar(papers_objetos[i], peso)
+
+
+def parsear_argumentos():
+    """Lee los argumentos de línea de comandos del extractor."""
+    parser = argparse.ArgumentParser(description="Extraer metadatos desde PDFs usando GROBID.")
+    parser.add_argument("-i", "--input", default="data/raw", help="Carpeta que contiene los archivos PDF.")
+    parser.add_argument("-c", "--concurrencia", type=int, default=1,
+                        help="Número máximo de PDFs enviados a GROBID a la vez.")
+    parser.add_argument("--lote-ner", type=int, default=16,
+                        help="Número de acknowledgments procesados en cada lote del modelo NER.")
+    parser.add_argument("--backend-ner", choices=BACKENDS_NER, default=None,
+                        help="Backend del modelo NER (por defecto la variable NER_BACKEND o 'transformers').")
+    parser.add_argument("--procesos-ner", type=int, default=1,
+                        help="Procesos dedicados al NER (cada uno carga su propia copia del modelo).")
+    parser.add_argument("-m", "--modo", choices=MODOS_EXTRACCION, default="escalonado",
+                        help="cabecera: solo metadatos, sin acknowledgment; escalonado: cabecera consolidada "
+                             "y texto completo según --texto-completo (con 'todos', una sola llamada de texto "
+                             "completo con la cabecera consolidada); completo: solo texto completo.")
+    parser.add_argument("--texto-completo", choices=CRITERIOS_TEXTO_COMPLETO, default="todos",
+                        help="PDFs de los que se pide el texto completo en modo escalonado: todos, o solo "
+                             "los que no traen afiliaciones en la cabecera (más rápido, pero se pierden "
+                             "las organizaciones financiadoras de los demás).")
+    parser.add_argument("--consolidar-cabecera", default="1",
+                        help="Nivel de consolidación de GROBID para la cabecera (0, 1 o 2).")
+    parser.add_argument("--consolidar-texto-completo", default="0",
+                        help="Nivel de consolidación de GROBID para el texto completo en modo escalonado.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Regenerar los registros desde las respuestas TEI guardadas, sin llamar a GROBID.")
+    parser.add_argument("--procesos-tei", type=int, default=None,
+                        help="Procesos que analizan los TEI en modo --offline (por defecto, uno por CPU).")
+    parser.add_argument("--lote-embeddings", type=int, default=64,
+                        help="Número de resúmenes procesados en cada lote del modelo de embeddings.")
+    parser.add_argument("--procesos-embeddings", type=int, default=1,
+                        help="Procesos que codifican los resúmenes (solo para corpus grandes).")
+    parser.add_argument("--precision-embeddings", choices=("float32", "float16", "int8"), default="float32",
+                        help="Precisión con la que se guardan y comparan los embeddings.")
+    parser.add_argument("--k", type=int, default=None,
+                        help="Enlazar cada paper como mucho con sus k papers más similares (por defecto, "
+                             "con todos los que superan el umbral).")
+    parser.add_argument("--mutuos", action=argparse.BooleanOptionalAction, default=True,
+                        help="Con --k, enlazar solo los pares que están cada uno entre los k vecinos del otro "
+                             "(--no-mutuos: cada paper con sus k vecinos, en un solo sentido).")
+    parser.add_argument("--indice", choices=("exacto", "sklearn", "ivf"), default="exacto",
+                        help="Índice de vecinos usado para buscar los papers similares en el modo top-k.")
+    return parser.parse_args()
+
+
+def opciones_desde_argumentos(args):
+    """Traduce los argumentos de línea de comandos a argumentos de `iterar_pdfs`."""
+    return {
+        "pdf_directory": args.input,
+        "concurrencia": args.concurrencia,
+        "tamano_lote_ner": args.lote_ner,
+        "backend_ner": args.backend_ner,
+        "procesos_ner": args.procesos_ner,
+        "modo": args.modo,
+        "consolidar_cabecera": args.consolidar_cabecera,
+        "consolidar_texto_completo": args.consolidar_texto_completo,
+        "necesita_texto_completo": args.texto_completo,
+    }
+
 
-    # ... (puedes dejar el print de la matriz si lo deseas)
+def main_streaming(args=None, **opciones):
+    """
+    Ejecuta la extracción con los argumentos de línea de comandos y devuelve un generador de registros
 
-    for i in range(len(matriz_similitud)):
-        for j in range(i + 1, len(matriz_similitud)):
-            if matriz_similitud[i][j] > umbral:
-                # Agregar el paper similar a la lista papersSimilares de ambos papers
-                if papers_objetos:
-                    print(f"Agregando paper similar {papers_objetos[j].title} a {papers_objetos[i].title} con similitud {matriz_similitud[i][j]}")
-                    papers_objetos[i].papersSimilares.append(papers_objetos[j])
-                    papers_objetos[j].papersSimilares.append(papers_objetos[i])
+    Args:
+        args (argparse.Namespace, optional): Argumentos ya leídos. Por defecto se leen de la línea de comandos.
+        **opciones: Argumentos adicionales de `iterar_pdfs` (p. ej. `solo_archivos`)
+    """
+    args = args or parsear_argumentos()
+    opciones = dict(opciones_desde_argumentos(args), **opciones)
+    if args.offline:
+        opciones.pop("concurrencia")
+        return iterar_tei_guardados(procesos=args.procesos_tei, **opciones)
+    return iterar_pdfs(**opciones)
 
 
 def main():
     """Función principal que ejecuta la extracción de datos de PDFs"""
-    parser = argparse.ArgumentParser(description="Extraer metadatos desde PDFs usando GROBID.")
-    parser.add_argument("-i", "--input", default="data/raw", help="Carpeta que contiene los archivos PDF.")
-    args = parser.parse_args()
-    
-    process_pdfs(pdf_directory=args.input)
-    
     # Aquí podrías agregar más código para procesar o guardar los datos extraídos
-    
-    return all_pdf_data
+    return list(main_streaming())
@@ -0,0 +1,133 @@
+import os
+import json
+
+from extractors.tei_cache import calcular_hash_pdf
+
+
+class ManifiestoPDF:
+    """
+    Registro persistente de los PDFs ya procesados (tamaño, fecha de modificación,
+    hash del contenido y versión de la extracción), indexado por nombre de archivo.
+
+    Permite que una ejecución procese solo los PDFs nuevos o modificados y sepa qué
+    PDFs han desaparecido desde la anterior.
+    """
+
+    def __init__(self, ruta):
+        """
+        Abre el manifiesto de la ruta indicada (o uno vacío si todavía no existe).
+
+        Args:
+            ruta (str): Ruta del archivo JSON del manifiesto
+        """
+        self.ruta = ruta
+        self._entradas = {}
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                self._entradas = json.load(f)
+
+    @staticmethod
+    def estado_archivo(pdf_path):
+        """Devuelve el tamaño y la fecha de modificación de un PDF."""
+        stat = os.stat(pdf_path)
+        return {"tamano": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def entradas(self):
+        """Devuelve una copia de las entradas del manifiesto."""
+        return dict(self._entradas)
+
+    def comparar(self, pdf_directory, version):
+        """
+        Compara el contenido actual del directorio con el manifiesto.
+
+        Un PDF cuyo tamaño y fecha de modificación coinciden con los registrados se da
+        por sin cambios sin leerlo. Si alguno difiere se recalcula el hash, de modo que
+        un PDF copiado o tocado pero con el mismo contenido tampoco se reprocesa. Un
+        cambio de `version` obliga a reprocesar todos los PDFs.
+
+        Args:
+            pdf_directory (str): Directorio con los PDFs
+            version (str): Versión de la extracción (ver `version_extraccion`)
+
+        Returns:
+            dict: `pendientes` (nombre -> entrada nueva, PDFs nuevos o modificados),
+                `modificados` (nombres ya registrados cuyo contenido ha cambiado, también
+                si ahora es idéntico a otro PDF y está en `duplicados`),
+                `eliminados` (nombres registrados que ya no existen),
+                `duplicados` (nombre -> entrada de PDFs idénticos a otro ya registrado o
+                pendiente) y `sin_cambios` (nombres). Un duplicado cuyo original se ha
+                eliminado o modificado vuelve a `pendientes`.
+        """
+        nombres = sorted(f for f in os.listdir(pdf_directory) if f.lower().endswith(".pdf"))
+        pendientes = {}
+        duplicados = {}
+        sin_cambios = []
+
+        for nombre in nombres:
+            pdf_path = os.path.join(pdf_directory, nombre)
+            estado = self.estado_archivo(pdf_path)
+            anterior = self._entradas.get(nombre)
+            if (anterior and anterior["version"] == version
+                    and anterior["tamano"] == estado["tamano"] and anterior["mtime"] == estado["mtime"]):
+                sin_cambios.append(nombre)
+                continue
+
+            entrada = dict(estado, ruta=pdf_path, sha256=calcular_hash_pdf(pdf_path), version=version)
+            if anterior and anterior["version"] == version and anterior["sha256"] == entrada["sha256"]:
+                # Mismo contenido con otra fecha: solo se actualiza la entrada
+                self._entradas[nombre] = dict(anterior, **entrada)
+                sin_cambios.append(nombre)
+                continue
+            pendientes[nombre] = entrada
+
+        eliminados = [nombre for nombre in self._entradas if nombre not in set(nombres)]
+        # Antes de apartar los duplicados: un PDF ya procesado que pasa a ser idéntico a
+        # otro también ha cambiado, y su resultado anterior debe retirarse
+        modificados = [nombre for nombre in pendientes if nombre in self._entradas]
+
+        # Un duplicado cuyo original ha desaparecido o ha cambiado deja de serlo: vuelve
+        # a procesarse (o pasa a ser duplicado de otro PDF con su mismo contenido)
+        for nombre in list(sin_cambios):
+            original = self._entradas[nombre].get("duplicado_de")
+            if original is None:
+                continue
+            if original in pendientes or original in eliminados or original not in self._entradas:
+                sin_cambios.remove(nombre)
+                pendientes[nombre] = {clave: valor for clave, valor in self._entradas[nombre].items()
+                                      if clave != "duplicado_de"}
+
+        # PDFs pendientes con el mismo contenido que otro que se conserva o que otro
+        # pendiente anterior (en orden de nombre)
+        conservados = {self._entradas[nombre]["sha256"]: nombre for nombre in sin_cambios
+                       if "duplicado_de" not in self._entradas[nombre]}
+        for nombre in sorted(pendientes):
+            sha256 = pendientes[nombre]["sha256"]
+            original = conservados.get(sha256)
+            if original is not None:
+                duplicados[nombre] = dict(pendientes.pop(nombre), duplicado_de=original)
+            else:
+                conservados[sha256] = nombre
+
+        return {
+            "pendientes": pendientes,
+            "modificados": modificados,
+            "eliminados": eliminados,
+            "duplicados": duplicados,
+            "sin_cambios": sin_cambios,
+        }
+
+    def registrar(self, nombre, entrada):
+        """Marca un PDF como procesado con la entrada devuelta por `comparar`."""
+        self._entradas[nombre] = entrada
+
+    def eliminar(self, nombre):
+        """Quita un PDF del manifiesto."""
+        self._entradas.pop(nombre, None)
+
+    def guardar(self):
+        """Escribe el manifiesto en disco de forma atómica."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self._entradas, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temporal, self.ruta)
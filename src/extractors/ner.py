@@ -0,0 +1,434 @@
+import os
+import re
+import multiprocessing
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from extractors.ner_cache import CacheNER
+
+# Modelo NER de Hugging Face usado para detectar organizaciones en los acknowledgments
+MODELO_NER = "Jean-Baptiste/roberta-large-ner-english"
+
+# Umbral de confianza mínimo para aceptar una entidad ORG
+UMBRAL_ORG = 0.85
+
+# Presupuesto de tokens por ventana y solapamiento entre ventanas (RoBERTa admite 512)
+MAX_TOKENS_VENTANA = 256
+SOLAPAMIENTO_VENTANA = 32
+
+# Versión de la fusión de entidades entre ventanas; forma parte de la clave de la cache NER
+VERSION_FUSION = 2
+
+# Fin de frase: signo de puntuación seguido de espacio
+_FIN_DE_FRASE = re.compile(r"(?<=[.!?;])\s+")
+
+# Backends disponibles para ejecutar el modelo NER en CPU:
+#   transformers: pipeline de Hugging Face en precisión completa
+#   cuantizado:   modelo torch con las capas lineales cuantizadas dinámicamente a int8
+#   onnx:         modelo exportado a ONNX y ejecutado con ONNX Runtime (requiere optimum[onnxruntime], ver requirements-onnx.txt)
+BACKENDS_NER = ("transformers", "cuantizado", "onnx")
+BACKEND_NER_POR_DEFECTO = os.environ.get("NER_BACKEND", "transformers")
+
+# Directorio donde se guarda el modelo exportado a ONNX para no repetir la exportación
+DIRECTORIO_ONNX = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "modelos", "roberta-large-ner-english-onnx"
+)
+
+_ner_pipelines = {}
+
+
+def _crear_pipeline_ner(backend):
+    # transformers (y torch) se importan aquí para no pagar su carga al importar el módulo
+    from transformers import pipeline, AutoModelForTokenClassification, AutoTokenizer
+
+    if backend == "transformers":
+        return pipeline(
+            "ner",
+            model=MODELO_NER,
+            aggregation_strategy="simple"
+        )
+
+    tokenizer = AutoTokenizer.from_pretrained(MODELO_NER)
+
+    if backend == "cuantizado":
+        import torch
+        modelo = AutoModelForTokenClassification.from_pretrained(MODELO_NER)
+        modelo = torch.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("ner", model=modelo, tokenizer=tokenizer, aggregation_strategy="simple")
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForTokenClassification
+        except ImportError as e:
+            raise ImportError(
+                "El backend NER 'onnx' necesita optimum con ONNX Runtime: pip install -r requirements-onnx.txt"
+            ) from e
+        if os.path.isdir(DIRECTORIO_ONNX):
+            modelo = ORTModelForTokenClassification.from_pretrained(DIRECTORIO_ONNX)
+        else:
+            modelo = ORTModelForTokenClassification.from_pretrained(MODELO_NER, export=True)
+            modelo.save_pretrained(DIRECTORIO_ONNX)
+        return pipeline("ner", model=modelo, tokenizer=tokenizer, aggregation_strategy="simple")
+
+    raise ValueError(f"Backend NER desconocido: '{backend}'. Opciones: {', '.join(BACKENDS_NER)}")
+
+
+def obtener_pipeline_ner(backend=None):
+    """
+    Devuelve el pipeline NER compartido del backend indicado, creándolo la primera vez que se usa.
+
+    Todos los backends devuelven entidades con la misma forma (`word`, `entity_group`, `score`).
+
+    Args:
+        backend (str, optional): Uno de BACKENDS_NER. Defaults to BACKEND_NER_POR_DEFECTO
+            (variable de entorno NER_BACKEND o "transformers").
+
+    Returns:
+        Pipeline: Pipeline de clasificación de tokens con agregación simple
+    """
+    backend = backend or BACKEND_NER_POR_DEFECTO
+    if backend not in _ner_pipelines:
+        _ner_pipelines[backend] = _crear_pipeline_ner(backend)
+    return _ner_pipelines[backend]
+
+
+def filtrar_organizaciones(entidades, umbral=UMBRAL_ORG):
+    """
+    Filtra las entidades devueltas por el pipeline y se queda con las organizaciones.
+
+    Args:
+        entidades (list): Entidades con las claves `word`, `entity_group` y `score`
+        umbral (float): Confianza mínima para aceptar una entidad
+
+    Returns:
+        set: Nombres de las organizaciones detectadas
+    """
+    return {ent["word"]
+            for ent in entidades
+            if ent["entity_group"] == "ORG"   # sólo entidades de tipo ORG
+            and ent["score"] >= umbral        # umbral de confianza
+            }
+
+
+def _agrupar_en_ventanas(piezas, max_tokens, solapamiento):
+    """
+    Agrupa piezas consecutivas `(texto, n_tokens, inicio)` en ventanas de como mucho `max_tokens`.
+
+    Cada ventana nueva empieza repitiendo las últimas piezas de la anterior que quepan
+    en `solapamiento` tokens.
+    """
+    ventanas = []
+    actual = []
+    total = 0
+    for pieza in piezas:
+        if actual and total + pieza[1] > max_tokens:
+            ventanas.append(actual)
+            arrastre = []
+            total = 0
+            for anterior in reversed(actual):
+                if total + anterior[1] > solapamiento:
+                    break
+                arrastre.insert(0, anterior)
+                total += anterior[1]
+            # El solapamiento nunca debe impedir que la pieza nueva quepa
+            while arrastre and total + pieza[1] > max_tokens:
+                total -= arrastre.pop(0)[1]
+            actual = arrastre
+        actual.append(pieza)
+        total += pieza[1]
+    if actual:
+        ventanas.append(actual)
+    return ventanas
+
+
+def dividir_en_ventanas(texto, tokenizer, max_tokens=MAX_TOKENS_VENTANA, solapamiento=SOLAPAMIENTO_VENTANA):
+    """
+    Divide un texto en ventanas solapadas que caben en un presupuesto de tokens.
+
+    El texto se corta por frases; las frases que por sí solas superan el presupuesto
+    se cortan por palabras. Así el coste del NER crece de forma lineal con la
+    longitud del texto y nada se trunca en silencio al límite de 512 tokens del modelo.
+
+    Los espacios del texto se normalizan a uno solo, de modo que cada ventana es un
+    fragmento literal del texto normalizado y las posiciones de las entidades de
+    ventanas distintas se pueden comparar (ver `fusionar_entidades_de_ventanas`).
+
+    Args:
+        texto (str): Texto a dividir
+        tokenizer: Tokenizador del modelo NER
+        max_tokens (int): Tokens máximos por ventana (sin contar los especiales)
+        solapamiento (int): Tokens máximos repetidos entre ventanas consecutivas
+
+    Returns:
+        list: Tuplas `(texto_ventana, n_tokens, inicio)`, con `inicio` la posición de la
+            ventana en el texto normalizado
+    """
+    texto = " ".join(texto.split())
+    if not texto:
+        return []
+    # Tras normalizar, cada separador de frases es un único espacio
+    frases = []
+    inicio = 0
+    for frase in _FIN_DE_FRASE.split(texto):
+        frases.append((frase, inicio))
+        inicio += len(frase) + 1
+    longitudes = [len(ids) for ids in tokenizer([f for f, _ in frases], add_special_tokens=False)["input_ids"]]
+
+    piezas = []
+    for (frase, inicio_frase), n_tokens in zip(frases, longitudes):
+        if n_tokens <= max_tokens:
+            piezas.append((frase, n_tokens, inicio_frase))
+            continue
+        palabras = frase.split(" ")
+        tokens_palabras = [len(ids) for ids in tokenizer(palabras, add_special_tokens=False)["input_ids"]]
+        inicios_palabras = []
+        for palabra in palabras:
+            inicios_palabras.append(inicio_frase)
+            inicio_frase += len(palabra) + 1
+        for grupo in _agrupar_en_ventanas(list(zip(palabras, tokens_palabras, inicios_palabras)),
+                                          max_tokens, solapamiento):
+            piezas.append((" ".join(p[0] for p in grupo), sum(p[1] for p in grupo), grupo[0][2]))
+
+    return [
+        (" ".join(p[0] for p in grupo), sum(p[1] for p in grupo), grupo[0][2])
+        for grupo in _agrupar_en_ventanas(piezas, max_tokens, solapamiento)
+    ]
+
+
+def fusionar_entidades_de_ventanas(entidades_por_ventana, umbral=UMBRAL_ORG, inicios=None):
+    """
+    Une las organizaciones detectadas en las ventanas de un mismo documento.
+
+    Con `inicios`, cada entidad se sitúa en el texto por su posición (`start`, `end`
+    dentro de su ventana más el inicio de la ventana). Las entidades de ventanas
+    distintas que ocupan posiciones solapadas, lo que solo ocurre en el solapamiento
+    entre ventanas, son la misma mención: se cuenta una vez, con la entidad más larga
+    (la más corta es un fragmento cortado por el borde de una ventana) y su mejor
+    puntuación. Las demás se conservan aunque una esté contenida en el nombre de otra
+    ("NIH" y "NIHR"). Sin posiciones, las entidades se unen solo por nombre.
+
+    Args:
+        entidades_por_ventana (list): Lista de entidades del pipeline por cada ventana
+        umbral (float): Confianza mínima para aceptar una entidad ORG
+        inicios (list, optional): Posición de cada ventana en el texto (ver `dividir_en_ventanas`)
+
+    Returns:
+        set: Nombres de las organizaciones detectadas
+    """
+    mejor = {}
+    # Menciones situadas en el texto: (inicio, fin, nombre, score)
+    menciones = []
+    for n_ventana, entidades in enumerate(entidades_por_ventana):
+        desplazamiento = inicios[n_ventana] if inicios is not None else None
+        for ent in entidades:
+            if ent["entity_group"] != "ORG":
+                continue
+            if desplazamiento is None or ent.get("start") is None:
+                mejor[ent["word"]] = max(ent["score"], mejor.get(ent["word"], 0.0))
+                continue
+            menciones.append((desplazamiento + ent["start"], desplazamiento + ent["end"], ent["word"], ent["score"]))
+
+    def cerrar(grupo):
+        principal = max(grupo, key=lambda m: m[1] - m[0])[2]
+        score = max(m[3] for m in grupo if m[2] == principal)
+        mejor[principal] = max(score, mejor.get(principal, 0.0))
+
+    # Agrupar las menciones que se solapan en el texto
+    grupo = []
+    fin_grupo = 0
+    for mencion in sorted(menciones):
+        if grupo and mencion[0] >= fin_grupo:
+            cerrar(grupo)
+            grupo = []
+        if not grupo:
+            fin_grupo = mencion[1]
+        grupo.append(mencion)
+        fin_grupo = max(fin_grupo, mencion[1])
+    if grupo:
+        cerrar(grupo)
+
+    return {palabra for palabra, score in mejor.items() if score >= umbral}
+
+
+def _detectar_organizaciones(textos, tamano_lote, umbral, max_tokens, solapamiento, backend):
+    """Ejecuta el NER sobre textos no vacíos y devuelve un conjunto de organizaciones por texto."""
+    ner = obtener_pipeline_ner(backend)
+
+    # Ventanas de todos los textos: (índice del texto, texto de la ventana, n_tokens, inicio)
+    ventanas = []
+    for t, texto in enumerate(textos):
+        for texto_ventana, n_tokens, inicio in dividir_en_ventanas(texto, ner.tokenizer, max_tokens, solapamiento):
+            ventanas.append((t, texto_ventana, n_tokens, inicio))
+
+    # Agrupar por longitud en tokens
+    orden = sorted(range(len(ventanas)), key=lambda v: ventanas[v][2])
+    entidades = [None] * len(ventanas)
+    tamano_lote = max(1, tamano_lote)
+    for inicio in range(0, len(orden), tamano_lote):
+        lote = orden[inicio:inicio + tamano_lote]
+        salidas = ner([ventanas[v][1] for v in lote], batch_size=len(lote))
+        for v, entidades_ventana in zip(lote, salidas):
+            entidades[v] = entidades_ventana
+
+    # Reunir las ventanas de cada texto, en su orden original
+    por_texto = [[] for _ in textos]
+    inicios = [[] for _ in textos]
+    for (t, _, _, inicio), entidades_ventana in zip(ventanas, entidades):
+        por_texto[t].append(entidades_ventana)
+        inicios[t].append(inicio)
+    return [fusionar_entidades_de_ventanas(entidades_texto, umbral, inicios_texto)
+            for entidades_texto, inicios_texto in zip(por_texto, inicios)]
+
+
+def _inicializar_trabajador(backend, hilos):
+    """Configura los hilos de cálculo del proceso y carga el modelo una sola vez."""
+    os.environ["OMP_NUM_THREADS"] = str(hilos)
+    os.environ["MKL_NUM_THREADS"] = str(hilos)
+    import torch
+    torch.set_num_threads(hilos)
+    torch.set_num_interop_threads(1)
+    obtener_pipeline_ner(backend)
+
+
+def _detectar_bloque(textos, parametros):
+    return _detectar_organizaciones(textos, **parametros)
+
+
+class PoolNER:
+    """Pool de procesos que ejecutan el modelo NER en paralelo, cada uno con su propia copia."""
+
+    def __init__(self, procesos=None, backend=None, tamano_bloque=32):
+        """
+        Arranca los procesos trabajadores.
+
+        Cada proceso carga el modelo al arrancar y usa `núcleos // procesos` hilos de
+        cálculo, para que entre todos no se repartan más hilos que núcleos tiene la máquina.
+
+        Args:
+            procesos (int, optional): Número de procesos. Defaults to el número de núcleos.
+            backend (str, optional): Backend del modelo NER (ver BACKENDS_NER)
+            tamano_bloque (int): Textos enviados a un trabajador en cada tarea
+        """
+        nucleos = os.cpu_count() or 1
+        self.procesos = max(1, procesos or nucleos)
+        self.backend = backend or BACKEND_NER_POR_DEFECTO
+        self.tamano_bloque = max(1, tamano_bloque)
+        hilos = max(1, nucleos // self.procesos)
+        # "spawn" evita heredar el estado de los hilos de torch del proceso padre
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_trabajador,
+            initargs=(self.backend, hilos),
+        )
+
+    def detectar(self, textos, tamano_lote=16, umbral=UMBRAL_ORG,
+                 max_tokens=MAX_TOKENS_VENTANA, solapamiento=SOLAPAMIENTO_VENTANA):
+        """
+        Reparte los textos en bloques entre los trabajadores y devuelve sus organizaciones en orden.
+
+        Returns:
+            list: Un conjunto de organizaciones por cada texto
+        """
+        parametros = {
+            "tamano_lote": tamano_lote,
+            "umbral": umbral,
+            "max_tokens": max_tokens,
+            "solapamiento": solapamiento,
+            "backend": self.backend,
+        }
+        bloques = [textos[i:i + self.tamano_bloque] for i in range(0, len(textos), self.tamano_bloque)]
+        resultados = []
+        for organizaciones in self._executor.map(_detectar_bloque, bloques, repeat(parametros)):
+            resultados.extend(organizaciones)
+        return resultados
+
+    def cerrar(self):
+        """Detiene los procesos trabajadores."""
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def extraer_organizaciones_en_lote(textos, tamano_lote=16, umbral=UMBRAL_ORG,
+                                   max_tokens=MAX_TOKENS_VENTANA, solapamiento=SOLAPAMIENTO_VENTANA,
+                                   cache=None, backend=None, pool=None):
+    """
+    Detecta las organizaciones de varios acknowledgments ejecutando el modelo por lotes.
+
+    Cada texto se divide en ventanas solapadas de como mucho `max_tokens` tokens
+    (ver `dividir_en_ventanas`). Las ventanas de todos los textos se ordenan por
+    número de tokens antes de agruparlas, de modo que cada lote contiene ventanas de
+    longitud parecida y apenas se desperdicia cómputo en padding. Los textos vacíos
+    no se envían al modelo y los textos repetidos (tras normalizar espacios) se
+    procesan una sola vez. Si se indica una cache, solo se ejecuta el modelo para los
+    textos que no estén en ella.
+
+    Args:
+        textos (list): Textos de acknowledgment, uno por documento
+        tamano_lote (int): Número de ventanas por llamada al modelo
+        umbral (float): Confianza mínima para aceptar una entidad ORG
+        max_tokens (int): Tokens máximos por ventana
+        solapamiento (int): Tokens repetidos entre ventanas consecutivas
+        cache (CacheNER, optional): Cache persistente de resultados. Defaults to None.
+        backend (str, optional): Backend del modelo NER (ver BACKENDS_NER)
+        pool (PoolNER, optional): Pool de procesos donde ejecutar el modelo. Si se
+            indica, se usa su backend. Defaults to None (en este proceso).
+
+    Returns:
+        list: Un conjunto de organizaciones por cada texto, en el mismo orden
+    """
+    resultados = [set() for _ in textos]
+    backend = pool.backend if pool is not None else (backend or BACKEND_NER_POR_DEFECTO)
+
+    # Agrupar los documentos por texto normalizado
+    pendientes = {}
+    for i, texto in enumerate(textos):
+        if texto and texto.strip():
+            clave = CacheNER.clave(texto, f"{MODELO_NER}:{backend}", umbral, max_tokens, solapamiento,
+                                  VERSION_FUSION)
+            pendientes.setdefault(clave, []).append(i)
+
+    if cache is not None and pendientes:
+        for clave, organizaciones in cache.obtener_varios(list(pendientes)).items():
+            for i in pendientes.pop(clave):
+                resultados[i] = set(organizaciones)
+
+    if not pendientes:
+        return resultados
+
+    claves = list(pendientes)
+    textos_unicos = [textos[pendientes[clave][0]] for clave in claves]
+    if pool is not None:
+        detectadas = pool.detectar(textos_unicos, tamano_lote, umbral, max_tokens, solapamiento)
+    else:
+        detectadas = _detectar_organizaciones(textos_unicos, tamano_lote, umbral, max_tokens, solapamiento, backend)
+
+    nuevos = dict(zip(claves, detectadas))
+    for clave, organizaciones in nuevos.items():
+        for i in pendientes[clave]:
+            resultados[i] = set(organizaciones)
+
+    if cache is not None:
+        cache.guardar_varios(nuevos)
+
+    return resultados
+
+
+def extract_organizations_from_acknowledgment(acknowledgment_text, umbral=UMBRAL_ORG, backend=None):
+    """
+    Detecta las organizaciones de un único acknowledgment.
+
+    Args:
+        acknowledgment_text (str): Texto del acknowledgment
+        umbral (float): Confianza mínima para aceptar una entidad ORG
+        backend (str, optional): Backend del modelo NER (ver BACKENDS_NER)
+
+    Returns:
+        set: Nombres de las organizaciones detectadas
+    """
+    return extraer_organizaciones_en_lote([acknowledgment_text], umbral=umbral, backend=backend)[0]
@@ -0,0 +1,141 @@
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+def normalizar_texto(texto):
+    """Normaliza los espacios de un texto para que variaciones de formato compartan entrada."""
+    return re.sub(r"\s+", " ", texto or "").strip()
+
+
+class CacheNER:
+    """Cache persistente en SQLite de las organizaciones detectadas por el NER."""
+
+    def __init__(self, ruta, max_entradas=100_000):
+        """
+        Abre (o crea) la cache en la ruta indicada.
+
+        Args:
+            ruta (str): Ruta del archivo SQLite
+            max_entradas (int): Número máximo de entradas; al superarlo se eliminan
+                las usadas hace más tiempo
+        """
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS ner ("
+            " clave TEXT PRIMARY KEY,"
+            " organizaciones TEXT NOT NULL,"
+            " ultimo_acceso REAL NOT NULL)"
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS ner_acceso ON ner (ultimo_acceso)")
+        self._conexion.commit()
+
+    @staticmethod
+    def clave(texto, modelo, umbral, *configuracion):
+        """
+        Construye la clave de un texto a partir de su versión normalizada, el modelo,
+        el umbral y cualquier otro parámetro que afecte al resultado.
+
+        Args:
+            texto (str): Texto del acknowledgment
+            modelo (str): Nombre del modelo (y backend) NER
+            umbral (float): Confianza mínima usada para aceptar entidades
+            *configuracion: Otros parámetros (p. ej. tamaño de ventana)
+
+        Returns:
+            str: Clave hexadecimal
+        """
+        material = json.dumps([normalizar_texto(texto), modelo, umbral, list(configuracion)], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def obtener_varios(self, claves):
+        """
+        Busca varias claves a la vez y actualiza sus contadores de uso.
+
+        Args:
+            claves (list): Claves a consultar
+
+        Returns:
+            dict: Clave -> conjunto de organizaciones, solo para las claves encontradas
+        """
+        claves = list(dict.fromkeys(claves))
+        encontradas = {}
+        with self._lock:
+            for inicio in range(0, len(claves), 500):
+                grupo = claves[inicio:inicio + 500]
+                marcadores = ",".join("?" * len(grupo))
+                filas = self._conexion.execute(
+                    f"SELECT clave, organizaciones FROM ner WHERE clave IN ({marcadores})", grupo
+                ).fetchall()
+                encontradas.update({clave: set(json.loads(orgs)) for clave, orgs in filas})
+
+            ahora = time.time()
+            self._conexion.executemany(
+                "UPDATE ner SET ultimo_acceso = ? WHERE clave = ?",
+                [(ahora, clave) for clave in encontradas]
+            )
+            self._conexion.commit()
+            self.aciertos += len(encontradas)
+            self.fallos += len(claves) - len(encontradas)
+        return encontradas
+
+    def obtener(self, clave):
+        """Devuelve el conjunto de organizaciones de una clave, o None si no está en cache."""
+        return self.obtener_varios([clave]).get(clave)
+
+    def guardar_varios(self, resultados):
+        """
+        Guarda varios resultados y aplica la política de expulsión.
+
+        Args:
+            resultados (dict): Clave -> conjunto de organizaciones
+        """
+        if not resultados:
+            return
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO ner (clave, organizaciones, ultimo_acceso) VALUES (?, ?, ?)",
+                [(clave, json.dumps(sorted(orgs), ensure_ascii=False), ahora) for clave, orgs in resultados.items()]
+            )
+            self._expulsar()
+            self._conexion.commit()
+
+    def guardar(self, clave, organizaciones):
+        """Guarda el conjunto de organizaciones de una clave."""
+        self.guardar_varios({clave: organizaciones})
+
+    def _expulsar(self):
+        total = self._conexion.execute("SELECT COUNT(*) FROM ner").fetchone()[0]
+        sobrantes = total - self.max_entradas
+        if sobrantes > 0:
+            self._conexion.execute(
+                "DELETE FROM ner WHERE clave IN (SELECT clave FROM ner ORDER BY ultimo_acceso LIMIT ?)",
+                (sobrantes,)
+            )
+
+    def estadisticas(self):
+        """Devuelve los aciertos, fallos y entradas actuales de la cache."""
+        with self._lock:
+            entradas = self._conexion.execute("SELECT COUNT(*) FROM ner").fetchone()[0]
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": entradas}
+
+    def mostrar_estadisticas(self):
+        """Muestra los contadores de uso de la cache."""
+        stats = self.estadisticas()
+        consultas = stats["aciertos"] + stats["fallos"]
+        tasa = 100 * stats["aciertos"] / consultas if consultas else 0.0
+        print(f" Cache NER: {stats['aciertos']} aciertos, {stats['fallos']} fallos "
+              f"({tasa:.1f}% de aciertos), {stats['entradas']} entradas")
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self._conexion.close()
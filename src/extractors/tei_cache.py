@@ -0,0 +1,322 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compresión de los miembros nuevos del paquete: zstd si está disponible, si no gzip
+COMPRESION_POR_DEFECTO = "zstd" if zstandard is not None else "gzip"
+NIVEL_ZSTD = 10
+NIVEL_GZIP = 6
+
+# Endpoint y opciones efectivas con las que se obtuvieron los `<nombre del PDF>.xml` de
+# la versión original del extractor (texto completo; su parámetro "consolidate" no
+# existe en GROBID, que aplicaba su consolidación de cabecera por defecto)
+URL_XML_ANTIGUOS = "http://localhost:8070/api/processFulltextDocument"
+OPCIONES_XML_ANTIGUOS = {"consolidateHeader": "1"}
+
+
+def calcular_hash_pdf(pdf_path, tamano_bloque=1 << 20):
+    """
+    Calcula el hash SHA-256 del contenido de un PDF leyéndolo por bloques.
+
+    Args:
+        pdf_path (str): Ruta al archivo PDF
+        tamano_bloque (int): Bytes leídos en cada iteración
+
+    Returns:
+        str: Hash hexadecimal del contenido
+    """
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def comprimir(datos, compresion=COMPRESION_POR_DEFECTO):
+    """Comprime un miembro del paquete con el algoritmo indicado ("zstd" o "gzip")."""
+    if compresion == "zstd":
+        return zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(datos)
+    return gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+def descomprimir(datos, compresion):
+    """Descomprime un miembro del paquete."""
+    if compresion == "zstd":
+        if zstandard is None:
+            raise ImportError("El paquete TEI contiene miembros zstd: instala 'zstandard' para leerlos.")
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return gzip.decompress(datos)
+
+
+def leer_ubicacion(ubicacion):
+    """
+    Lee un TEI a partir de su ubicación (ver `CacheTEI.ubicacion`). Al no depender de la
+    cache abierta, sirve para leer desde otros procesos.
+
+    Args:
+        ubicacion (tuple): (ruta, desplazamiento, longitud, compresion); para los archivos
+            sueltos anteriores al paquete, desplazamiento y compresion son None
+
+    Returns:
+        bytes: Contenido TEI
+    """
+    ruta, desplazamiento, longitud, compresion = ubicacion
+    with open(ruta, "rb") as f:
+        if desplazamiento is None:
+            return f.read()
+        f.seek(desplazamiento)
+        datos = f.read(longitud)
+    if len(datos) != longitud:
+        raise OSError(f"Miembro truncado en {ruta} (desplazamiento {desplazamiento})")
+    return descomprimir(datos, compresion)
+
+
+class CacheTEI:
+    """Cache en disco de respuestas TEI de GROBID direccionada por el contenido del PDF."""
+
+    def __init__(self, directorio, compresion=COMPRESION_POR_DEFECTO):
+        """
+        Inicializa la cache en el directorio indicado.
+
+        Las respuestas se añaden comprimidas, una tras otra, a un único archivo de solo
+        anexado (`tei.pack`), y cada una se registra en `indice.jsonl` con su
+        desplazamiento y longitud en el paquete, el nombre del PDF, su hash y las
+        opciones de GROBID. Así un corpus grande ocupa dos archivos en lugar de uno por
+        PDF, y cualquier respuesta se lee con un único acceso.
+
+        Los archivos `<clave>.xml` sueltos de versiones anteriores se siguen leyendo;
+        `migrar` los traslada al paquete.
+
+        Args:
+            directorio (str): Directorio donde se guardan las respuestas TEI
+            compresion (str): Compresión de los miembros nuevos ("zstd" o "gzip")
+        """
+        if compresion == "zstd" and zstandard is None:
+            raise ImportError("La compresión zstd necesita el paquete 'zstandard'.")
+        self.directorio = directorio
+        self.compresion = compresion
+        self.ruta_indice = os.path.join(directorio, "indice.jsonl")
+        self.ruta_paquete = os.path.join(directorio, "tei.pack")
+        self.indice = {}
+        self._por_pdf = {}
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar_indice()
+
+    @staticmethod
+    def clave(sha256_pdf, grobid_url, opciones=None):
+        """
+        Construye la clave de cache a partir del hash del PDF, el endpoint y las opciones.
+
+        Args:
+            sha256_pdf (str): Hash del contenido del PDF
+            grobid_url (str): URL del endpoint de GROBID
+            opciones (dict, optional): Parámetros enviados a GROBID. Defaults to None.
+
+        Returns:
+            str: Clave hexadecimal de la entrada
+        """
+        opciones_ordenadas = sorted((str(k), str(v)) for k, v in (opciones or {}).items())
+        material = json.dumps([sha256_pdf, grobid_url.rstrip("/"), opciones_ordenadas])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _cargar_indice(self):
+        if not os.path.exists(self.ruta_indice):
+            return
+        with open(self.ruta_indice, "r", encoding="utf-8") as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Una línea truncada por una ejecución interrumpida no invalida el resto
+                    continue
+                self._registrar(entrada)
+
+    def _registrar(self, entrada):
+        self.indice[entrada["clave"]] = entrada
+        if entrada.get("sha256") and entrada.get("url"):
+            self._por_pdf[(entrada["sha256"], entrada["url"].rstrip("/"))] = entrada["clave"]
+
+    def _ruta_suelta(self, clave):
+        """Ruta del archivo TEI suelto (formato anterior al paquete) de una clave."""
+        return os.path.join(self.directorio, f"{clave}.xml")
+
+    def ubicacion(self, clave):
+        """
+        Devuelve dónde está guardado el TEI de una clave, o None si no está en cache.
+
+        Returns:
+            tuple: (ruta, desplazamiento, longitud, compresion), para `leer_ubicacion`
+        """
+        entrada = self.indice.get(clave)
+        if entrada is None:
+            return None
+        if "desplazamiento" in entrada:
+            return self.ruta_paquete, entrada["desplazamiento"], entrada["longitud"], entrada["compresion"]
+        ruta = self._ruta_suelta(clave)
+        return (ruta, None, None, None) if os.path.exists(ruta) else None
+
+    def buscar(self, sha256_pdf, grobid_url):
+        """
+        Devuelve la clave de la última respuesta guardada de un PDF en un endpoint, con
+        cualquier conjunto de opciones, o None si no hay ninguna.
+
+        Args:
+            sha256_pdf (str): Hash del contenido del PDF
+            grobid_url (str): URL del endpoint de GROBID
+
+        Returns:
+            str: Clave de la entrada, o None
+        """
+        clave = self._por_pdf.get((sha256_pdf, grobid_url.rstrip("/")))
+        return clave if clave is not None and self.contiene(clave) else None
+
+    def contiene(self, clave):
+        """Indica si la clave tiene una respuesta TEI almacenada."""
+        return self.ubicacion(clave) is not None
+
+    def obtener(self, clave):
+        """
+        Devuelve el TEI almacenado para la clave, o None si no está en cache.
+
+        Args:
+            clave (str): Clave de la entrada
+
+        Returns:
+            bytes: Contenido TEI, o None si no existe
+        """
+        ubicacion = self.ubicacion(clave)
+        return leer_ubicacion(ubicacion) if ubicacion is not None else None
+
+    def guardar(self, clave, tei, metadatos=None):
+        """
+        Añade una respuesta TEI al paquete y la registra en el índice.
+
+        El miembro se escribe antes que su línea del índice: si la ejecución se
+        interrumpe entre ambos, el paquete solo contiene bytes sin referenciar.
+        Solo debe haber un proceso escribiendo en la cache a la vez.
+
+        Args:
+            clave (str): Clave de la entrada
+            tei (bytes | str): Contenido TEI devuelto por GROBID
+            metadatos (dict, optional): Datos adicionales (archivo, sha256, url, opciones)
+
+        Returns:
+            dict: Entrada registrada en el índice
+        """
+        if isinstance(tei, str):
+            tei = tei.encode("utf-8")
+
+        datos = comprimir(tei, self.compresion)
+        with open(self.ruta_paquete, "ab") as f:
+            desplazamiento = f.seek(0, os.SEEK_END)
+            f.write(datos)
+
+        entrada = dict(metadatos or {})
+        entrada.update({
+            "clave": clave,
+            "desplazamiento": desplazamiento,
+            "longitud": len(datos),
+            "compresion": self.compresion,
+        })
+        with open(self.ruta_indice, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._registrar(entrada)
+        return entrada
+
+    def migrar(self, borrar=True, directorio_pdfs=None, grobid_url=URL_XML_ANTIGUOS,
+               opciones=OPCIONES_XML_ANTIGUOS):
+        """
+        Traslada al paquete los archivos `<clave>.xml` sueltos registrados en el índice.
+
+        Con `directorio_pdfs`, migra también los `<nombre del PDF>.xml` que guardaba la
+        versión original del extractor, que no tienen entrada en el índice: cada uno se
+        registra con el hash del PDF del mismo nombre en `directorio_pdfs` (se supone que
+        el PDF no ha cambiado desde entonces), `grobid_url` y `opciones`. Los que no
+        tienen PDF se dejan donde están. Sin `directorio_pdfs`, esos archivos se ignoran.
+
+        Args:
+            borrar (bool): Borrar cada archivo suelto una vez copiado al paquete
+            directorio_pdfs (str, optional): Carpeta de los PDFs de los XML antiguos
+            grobid_url (str): Endpoint con el que se registran los XML antiguos
+            opciones (dict): Opciones de GROBID con las que se registran los XML antiguos
+
+        Returns:
+            int: Número de respuestas migradas
+        """
+        migradas = 0
+        for clave, entrada in list(self.indice.items()):
+            if "desplazamiento" in entrada:
+                continue
+            ruta = self._ruta_suelta(clave)
+            if not os.path.exists(ruta):
+                continue
+            with open(ruta, "rb") as f:
+                tei = f.read()
+            metadatos = {k: v for k, v in entrada.items() if k != "clave"}
+            self.guardar(clave, tei, metadatos)
+            if borrar:
+                os.remove(ruta)
+            migradas += 1
+
+        if directorio_pdfs is None:
+            return migradas
+        pdfs = {os.path.splitext(f)[0]: f for f in os.listdir(directorio_pdfs) if f.lower().endswith(".pdf")}
+        for nombre in sorted(os.listdir(self.directorio)):
+            base, extension = os.path.splitext(nombre)
+            if extension != ".xml" or base in self.indice:
+                continue
+            if base not in pdfs:
+                print(f" {nombre}: no hay ningún PDF '{base}' en {directorio_pdfs}, no se migra")
+                continue
+            sha256_pdf = calcular_hash_pdf(os.path.join(directorio_pdfs, pdfs[base]))
+            clave = self.clave(sha256_pdf, grobid_url, opciones)
+            ruta = os.path.join(self.directorio, nombre)
+            if not self.contiene(clave):
+                with open(ruta, "rb") as f:
+                    tei = f.read()
+                self.guardar(clave, tei, {
+                    "archivo": pdfs[base],
+                    "sha256": sha256_pdf,
+                    "url": grobid_url,
+                    "opciones": opciones,
+                })
+            if borrar:
+                os.remove(ruta)
+            migradas += 1
+        return migradas
+
+    def entradas(self):
+        """Devuelve las entradas del índice (una por clave)."""
+        return list(self.indice.values())
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Migrar las respuestas TEI sueltas al paquete comprimido.")
+    parser.add_argument("directorio", help="Carpeta de la cache TEI (p. ej. data/xml_responses).")
+    parser.add_argument("--compresion", choices=("zstd", "gzip"), default=COMPRESION_POR_DEFECTO,
+                        help="Compresión de los miembros migrados.")
+    parser.add_argument("--conservar", action="store_true", help="No borrar los archivos sueltos migrados.")
+    parser.add_argument("--pdfs", default=None,
+                        help="Carpeta de los PDFs, para migrar también los '<nombre del PDF>.xml' de la "
+                             "versión original del extractor.")
+    args = parser.parse_args()
+
+    cache = CacheTEI(args.directorio, args.compresion)
+    migradas = cache.migrar(borrar=not args.conservar, directorio_pdfs=args.pdfs)
+    print(f"{migradas} respuestas TEI migradas a {cache.ruta_paquete}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import io
+import xml.etree.ElementTree as ET
+
+# Prefijo del namespace TEI tal y como aparece en las etiquetas de ElementTree
+TEI = "{http://www.tei-c.org/ns/1.0}"
+
+
+def _abrir_fuente(fuente):
+    if isinstance(fuente, bytes):
+        return io.BytesIO(fuente)
+    return fuente
+
+
+def _es_raiz_de_captura(elem, padre, estado):
+    """Decide, al abrir un elemento, si su contenido debe conservarse hasta cerrarlo."""
+    tag = elem.tag
+    if tag == f"{TEI}author" or tag == f"{TEI}affiliation":
+        return True
+    if tag == f"{TEI}div" and elem.get("type") == "acknowledgement":
+        return True
+    if tag == f"{TEI}abstract":
+        return estado["abstract"] is None
+    if tag == f"{TEI}title" and padre is not None and padre.tag == f"{TEI}titleStmt":
+        return estado["title"] is None
+    return False
+
+
+def _procesar_captura(elem, estado):
+    """Extrae los datos de un elemento capturado una vez que está completo."""
+    tag = elem.tag
+    if tag == f"{TEI}title":
+        estado["title"] = elem.text.strip() if elem.text else "Desconocido"
+
+    elif tag == f"{TEI}author":
+        name_el = elem.find(f".//{TEI}persName")
+        if name_el is not None:
+            full = " ".join(filter(None, [
+                name_el.findtext(f"{TEI}forename", default=""),
+                name_el.findtext(f"{TEI}surname", default="")
+            ])).strip()
+            if full:
+                estado["authors"].append(full)
+
+    elif tag == f"{TEI}affiliation":
+        org_el = elem.find(f".//{TEI}orgName")
+        if org_el is not None and org_el.text:
+            estado["affiliations"][org_el.text.strip()] = None
+
+    elif tag == f"{TEI}div":
+        text = " ".join(p.strip() for p in elem.itertext())
+        if text:
+            estado["acknowledgment"].append(text.strip())
+
+    elif tag == f"{TEI}abstract":
+        estado["abstract"] = " ".join(elem.itertext()).strip()
+
+
+def extraer_campos_tei(fuente):
+    """
+    Extrae título, autores, afiliaciones, acknowledgment y resumen de un TEI de GROBID
+    en una única pasada con `iterparse`.
+
+    Solo se conservan en memoria los elementos que se están capturando (autores,
+    afiliaciones, resumen, acknowledgment y título); el resto se libera en cuanto se
+    cierra, por lo que el consumo de memoria no depende del tamaño del texto completo.
+
+    Args:
+        fuente (str | bytes | file): Ruta al archivo TEI, contenido en bytes u objeto tipo archivo
+
+    Returns:
+        dict: Campos `title`, `authors`, `affiliations`, `acknowledgment` y `abstract`
+
+    Raises:
+        ET.ParseError: Si el XML no es válido
+    """
+    estado = {
+        "title": None,
+        "authors": [],
+        "affiliations": {},
+        "acknowledgment": [],
+        "abstract": None,
+    }
+    pila = []
+    capturando = 0
+
+    for evento, elem in ET.iterparse(_abrir_fuente(fuente), events=("start", "end")):
+        if evento == "start":
+            padre = pila[-1][0] if pila else None
+            es_raiz = _es_raiz_de_captura(elem, padre, estado)
+            if es_raiz:
+                capturando += 1
+            pila.append((elem, es_raiz))
+            continue
+
+        elem, es_raiz = pila.pop()
+        if es_raiz:
+            _procesar_captura(elem, estado)
+            capturando -= 1
+
+        if capturando == 0:
+            # Ningún ancestro necesita este subárbol: liberarlo junto a los hermanos ya cerrados
+            elem.clear()
+            if pila:
+                del pila[-1][0][:]
+
+    return {
+        "title": estado["title"] if estado["title"] is not None else "Desconocido",
+        "authors": estado["authors"],
+        "affiliations": list(estado["affiliations"]),
+        "acknowledgment": " ".join(estado["acknowledgment"]).strip(),
+        "abstract": estado["abstract"] or "",
+    }
@@ -3,11 +3,7 @@ from models.paper import Paper
 from models.author import Author
 from models.organization import Organization
 from models.project import Project
-import matplotlib.pyplot as plt
 from typing import List, Dict, Any, Optional
-import matplotlib.patches as mpatches
-from rdflib import Graph, Literal, URIRef, Namespace
-from rdflib.namespace import RDF, RDFS, XSD, FOAF, DC
 
 class KnowledgeGraph:
     def __init__(self):
@@ -45,10 +41,16 @@ class KnowledgeGraph:
             
             # Also check the papersSimilares attribute that exists in the model
             if hasattr(paper, 'papersSimilares') and paper.papersSimilares:
+                similarities = getattr(paper, 'similitudes', {})
                 for similar_paper in paper.papersSimilares:
                     if isinstance(similar_paper, Paper) and similar_paper.title:
                         self.graph.add_node(similar_paper.title, type="paper", data=similar_paper)
-                        self.graph.add_edge(paper.title, similar_paper.title, relationship="similar_to")
+                        # The similarity score, when it was computed, is kept as the edge weight
+                        weight = similarities.get(similar_paper.clave)
+                        if weight is not None:
+                            self.graph.add_edge(paper.title, similar_paper.title, relationship="similar_to", weight=weight)
+                        else:
+                            self.graph.add_edge(paper.title, similar_paper.title, relationship="similar_to")
     
     def add_projects(self, projects: List[Project], papers: List[Paper]):
         """
@@ -91,6 +93,10 @@ class KnowledgeGraph:
             font_size: Size of labels font
             save_path: Path where to save the visualization image
         """
+        # matplotlib is only needed for drawing, so it is imported on first use
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as mpatches
+
         plt.figure(figsize=figsize)
         
         # Create node colors based on type
@@ -246,6 +252,10 @@ class KnowledgeGraph:
         Args:
             output_file: Path to the output RDF file
         """
+        # rdflib is only needed for the export, so it is imported on first use
+        from rdflib import Graph, Literal, URIRef, Namespace
+        from rdflib.namespace import RDF, XSD, FOAF, DC
+
         # Create an RDF graph
         rdf_graph = Graph()
         
@@ -393,6 +403,13 @@ class KnowledgeGraph:
                     rdf_graph.add((source_uri, KG.hasOrganization, target_uri))
                 elif relationship == 'similar_to':
                     rdf_graph.add((source_uri, KG.similarTo, target_uri))
+                    # Qualified relation carrying the similarity score
+                    if edge_data.get('weight') is not None:
+                        similarity_uri = KG[f"similarity/{uri_safe(source)}__{uri_safe(target)}"]
+                        rdf_graph.add((similarity_uri, RDF.type, KG.Similarity))
+                        rdf_graph.add((similarity_uri, KG.source, source_uri))
+                        rdf_graph.add((similarity_uri, KG.target, target_uri))
+                        rdf_graph.add((similarity_uri, KG.score, Literal(float(edge_data['weight']), datatype=XSD.double)))
                 elif relationship == 'funded':
                     rdf_graph.add((source_uri, KG.funded, target_uri))
                 elif relationship == 'related_to':
@@ -1,38 +1,65 @@
+import os
 from api.openaire_api import buscar_por_titulo as buscar_openaire
-from api.openaire_api import buscar_organizacion, completar_paper_con_openaire, buscar_proyectos_asociados_paper
-from api.openalex_api import buscar_por_titulo_openalex
+from api.openaire_api import buscar_organizacion, completar_paper_con_openaire
+from api.cliente_http import ClienteHTTP, configurar_cliente, obtener_cliente
+from api.cache_http import CacheHTTP
+from api.enriquecimiento_async import enriquecer_papers
 from extractors.grobid_extractor import (
-    main as grobid_extractor_main,
+    main_streaming as grobid_extractor_streaming,
     generar_embeddings_y_similitud,
-    get_all_pdf_data
-    
+    parsear_argumentos,
+    opciones_desde_argumentos,
+    resolver_directorio_pdfs,
+    version_extraccion,
 )
+from extractors.manifiesto import ManifiestoPDF
+from estado_pipeline import EstadoPipeline
 from models.paper import Paper
 from models.author import Author
 from models.organization import Organization
 from graph.graph_creator import create_knowledge_graph    
 
 # Creacion de objetos
-def crear_papers_inicial(all_pdf_data):
+def crear_papers_inicial(all_pdf_data, resumenes=None, completar=True):
+    """
+    Crea los objetos Paper a partir de los datos extraídos de los PDFs.
+
+    Args:
+        all_pdf_data (iterable): Registros extraídos (lista o generador de `iterar_pdfs`)
+        resumenes (list, optional): Si se indica, se le añade `filename` y `abstract` de
+            cada registro, lo único que necesita después el cálculo de similitud.
+        completar (bool): Completar cada paper con OpenAIRE al crearlo. Con False se
+            crean sin consultar ninguna API (ver `enriquecer_papers`).
+
+    Returns:
+        list: Lista de objetos Paper
+    """
     papers = []
     for pdf_data in all_pdf_data:
-        paper = crear_paper(pdf_data['title'], pdf_data['authors'], pdf_data['organizations'])
+        paper = crear_paper(pdf_data['title'], pdf_data['authors'], pdf_data['organizations'], completar,
+                            archivo=pdf_data['filename'])
         papers.append(paper)
+        if resumenes is not None:
+            resumenes.append({"filename": pdf_data["filename"], "abstract": pdf_data["abstract"]})
     return papers
 
-def crear_paper(pdf_data_title,pdf_data_authors,pdf_data_organizations):
+def crear_paper(pdf_data_title,pdf_data_authors,pdf_data_organizations,completar=True,archivo=None):
     """
     Crea un objeto Paper a partir de los datos de un PDF.
     
     Args:
         pdf_data (dict): Datos del PDF
+        completar (bool): Completar el paper con OpenAIRE
+        archivo (str, optional): Nombre del PDF, que identifica al paper en sus similitudes
     """
     paper = Paper(
         title=pdf_data_title,
         autores=crear_autores(pdf_data_authors),
         organization=crear_organizaciones(pdf_data_organizations),
+        archivo=archivo,
     )
-    paper = completar_paper_con_openaire(paper)
+    if completar:
+        paper = completar_paper_con_openaire(paper)
     #print(f"Paper creado y enriquecido con openaire: {paper.title}")
     #paper.mostrar_info()
     return paper
@@ -56,52 +83,74 @@ def crear_organizaciones(pdf_data_organizations):
     return organizaciones
 
 
-# Enriquecimiento de papers
-def enriquecer_papers_openalex(papers):
-    for paper in papers:
-        buscar_por_titulo_openalex(paper)
-        #print(f"Paper enriquecido con openalex: {paper.title}")
-        #paper.mostrar_info()
+if __name__ == "__main__":
 
-def obtener_proyectos_asociados(papers):
-    """
-    Busca todos los proyectos asociados a una lista de papers.
-    
-    Args:
-        papers (list): Lista de objetos Paper
-        
-    Returns:
-        list: Lista de objetos Project asociados a los papers
-    """
-    todos_proyectos = []
-    
-    print("\n=== Buscando proyectos asociados a los papers ===")
-    for i, paper in enumerate(papers, 1):
-        print(f"\nProcesando paper {i}/{len(papers)}: {paper.title}")
-        
-        # Buscar proyectos asociados a este paper
-        proyectos = buscar_proyectos_asociados_paper(paper)
-        # Añadir los proyectos encontrados a la lista general
-        todos_proyectos.extend(proyectos)
-    
-    # Mostrar resumen final
-    print(f"\n=== Resumen de proyectos encontrados ===")
-    print(f"Total de papers procesados: {len(papers)}")
-    print(f"Total de proyectos encontrados: {len(todos_proyectos)}")
-    
-    return todos_proyectos
+    args = parsear_argumentos()
+    pdf_directory = resolver_directorio_pdfs(args.input)
+    directorio_datos = os.path.dirname(pdf_directory)
+    # Las respuestas de OpenAIRE y OpenAlex se guardan entre ejecuciones
+    configurar_cliente(ClienteHTTP(cache=CacheHTTP(os.path.join(directorio_datos, "cache_http.sqlite"))))
 
+    # Manifiesto de PDFs procesados y resultado de las ejecuciones anteriores
+    manifiesto = ManifiestoPDF(os.path.join(directorio_datos, "manifiesto.json"))
+    estado = EstadoPipeline(os.path.join(directorio_datos, "estado_pipeline.pkl"))
+    cambios = manifiesto.comparar(pdf_directory, version_extraccion(**opciones_desde_argumentos(args)))
+    print(f"\n=== PDFs: {len(cambios['pendientes'])} nuevos o modificados, {len(cambios['eliminados'])} eliminados, "
+          f"{len(cambios['sin_cambios'])} sin cambios ===")
 
-if __name__ == "__main__":
+    # Retirar los papers de PDFs eliminados o modificados (los modificados se vuelven a añadir)
+    estado.eliminar(cambios["eliminados"] + cambios["modificados"])
+    for nombre in cambios["eliminados"]:
+        manifiesto.eliminar(nombre)
+    for nombre, entrada in cambios["duplicados"].items():
+        print(f" {nombre} es idéntico a {entrada['duplicado_de']}, se omite")
+        manifiesto.registrar(nombre, entrada)
 
-    all_pdf_data = grobid_extractor_main()
-    papers = crear_papers_inicial(all_pdf_data) # contiene papers (enriquecidos con openaire) con autores (enriquecidos con openaire) y organizaciones
-    enriquecer_papers_openalex(papers) # enriquecimiento de papers con openalex
-    # Obtener proyectos asociados a los papers
-    proyectos = obtener_proyectos_asociados(papers)
+    # Los registros se consumen a medida que se extraen; solo se conservan los resúmenes
+    resumenes = []
+    registros = grobid_extractor_streaming(args, solo_archivos=cambios["pendientes"])
+    papers = crear_papers_inicial(registros, resumenes, completar=False)
+    # Enriquecimiento con openaire y openalex y proyectos asociados, con las consultas de todos los papers en paralelo
+    proyectos_por_paper = enriquecer_papers(papers)
+    for paper, resumen, proyectos in zip(papers, resumenes, proyectos_por_paper):
+        estado.agregar(resumen["filename"], paper, resumen["abstract"], proyectos)
+    cliente_http = obtener_cliente()
+    print(f"Peticiones HTTP: {cliente_http.peticiones} ({cliente_http.reintentos} reintentos), conexiones abiertas por host: {cliente_http.conexiones_abiertas()}")
+    estadisticas = cliente_http.cache.estadisticas()
+    print(f"Cache HTTP: {estadisticas['aciertos']} aciertos ({estadisticas['aciertos_negativos']} negativos), "
+          f"{estadisticas['fallos']} fallos, {estadisticas['bytes_ahorrados'] / 2**20:.1f} MB ahorrados")
     
-    # Generar embeddings y similitud entre papers
-    generar_embeddings_y_similitud(get_all_pdf_data(), papers_objetos=papers)
+    # Generar embeddings y similitud entre papers (solo los pares con algún paper nuevo).
+    # Si cambian las opciones de similitud, los enlaces anteriores no son comparables con
+    # los nuevos y se recalculan todos
+    similitud = {"k": args.k, "mutuos": args.mutuos if args.k else None, "indice": args.indice if args.k else None,
+                 "precision": args.precision_embeddings}
+    nuevos = [resumen["filename"] for resumen in resumenes]
+    if estado.similitud != similitud:
+        if estado.similitud is not None:
+            print("Las opciones de similitud han cambiado: se recalculan todos los enlaces")
+        estado.quitar_similares()
+        nuevos = None
+    generar_embeddings_y_similitud(estado.lista_resumenes(), papers_objetos=estado.lista_papers(),
+                                   nuevos=nuevos,
+                                   k=args.k,
+                                   mutuos=args.mutuos,
+                                   indice=args.indice,
+                                   tamano_lote_embeddings=args.lote_embeddings,
+                                   procesos_embeddings=args.procesos_embeddings,
+                                   precision=args.precision_embeddings)
+    estado.similitud = similitud
+
+    # El manifiesto se guarda después del estado: si la ejecución se interrumpe antes,
+    # los PDFs pendientes se vuelven a procesar en la siguiente
+    estado.guardar()
+    for resumen in resumenes:
+        manifiesto.registrar(resumen["filename"], cambios["pendientes"][resumen["filename"]])
+    manifiesto.guardar()
+
+    papers = estado.lista_papers()
+    proyectos = estado.lista_proyectos()
+    print(f"Total de papers: {len(papers)}, proyectos: {len(proyectos)}")
     
     # Crear el grafo de conocimiento
     kg = create_knowledge_graph(papers, proyectos)
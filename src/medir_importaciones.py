@@ -0,0 +1,95 @@
+"""
+Mide el tiempo de importación de los módulos principales y lo compara con su presupuesto.
+
+Cada módulo se importa en un intérprete nuevo (sin caché de módulos) y se comprueba
+también que no arrastre dependencias pesadas, que deben cargarse solo al usarse.
+Termina con código 1 si algún módulo supera su presupuesto o carga una dependencia
+pesada.
+
+Uso (desde src/):
+    python medir_importaciones.py
+"""
+import os
+import sys
+import json
+import subprocess
+
+# Presupuesto de importación en segundos por módulo
+PRESUPUESTOS = {
+    "main": 1.5,
+    "graph.graph_creator": 1.0,
+    "api.openaire_api": 0.5,
+    "api.openalex_api": 0.5,
+}
+
+# Dependencias que no deben cargarse al importar los módulos anteriores
+DEPENDENCIAS_PESADAS = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "sklearn",
+    "matplotlib",
+    "rdflib",
+)
+
+_SONDA = """
+import sys, time, json
+inicio = time.perf_counter()
+import {modulo}
+duracion = time.perf_counter() - inicio
+pesadas = [m for m in {pesadas!r} if m in sys.modules]
+print(json.dumps({{"duracion": duracion, "pesadas": pesadas}}))
+"""
+
+
+def medir_importacion(modulo, repeticiones=3):
+    """
+    Importa un módulo en un intérprete nuevo y mide cuánto tarda.
+
+    Args:
+        modulo (str): Nombre del módulo a importar
+        repeticiones (int): Número de mediciones; se devuelve la menor
+
+    Returns:
+        dict: `duracion` (segundos) y `pesadas` (dependencias pesadas cargadas)
+    """
+    directorio_src = os.path.dirname(os.path.abspath(__file__))
+    mejor = None
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", _SONDA.format(modulo=modulo, pesadas=DEPENDENCIAS_PESADAS)],
+            cwd=directorio_src, capture_output=True, text=True
+        )
+        if salida.returncode != 0:
+            raise RuntimeError(f"No se pudo importar '{modulo}':\n{salida.stderr}")
+        medida = json.loads(salida.stdout.strip().splitlines()[-1])
+        if mejor is None or medida["duracion"] < mejor["duracion"]:
+            mejor = medida
+    return mejor
+
+
+def main():
+    correcto = True
+    print(f"{'Módulo':<24}{'Tiempo (s)':>12}{'Presupuesto (s)':>17}  Estado")
+    for modulo, presupuesto in PRESUPUESTOS.items():
+        try:
+            medida = medir_importacion(modulo)
+        except RuntimeError as e:
+            print(f"{modulo:<24}{'-':>12}{presupuesto:>17.2f}  ERROR")
+            print(e)
+            correcto = False
+            continue
+
+        estado = "OK"
+        if medida["duracion"] > presupuesto:
+            estado = "EXCEDIDO"
+        if medida["pesadas"]:
+            estado = f"CARGA {', '.join(medida['pesadas'])}"
+        correcto = correcto and estado == "OK"
+        print(f"{modulo:<24}{medida['duracion']:>12.3f}{presupuesto:>17.2f}  {estado}")
+
+    sys.exit(0 if correcto else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 from .author import Author
 from .organization import Organization
 
@@ -10,7 +10,7 @@ class Paper:
                  idioma: Optional[str] = None, veces_citado: Optional[int] = None,
                  paginas: Optional[int] = None, rdf_type: Optional[str] = None,
                  autores: Optional[List[Author]] = None, organization: Optional[List[Organization]] = None,
-                 papersSimilares: Optional[List["Paper"]] = None) -> None:
+                 papersSimilares: Optional[List["Paper"]] = None, archivo: Optional[str] = None) -> None:
         """
         Inicializa un paper con sus atributos.
         
@@ -24,6 +24,7 @@ class Paper:
             rdf_type (Optional[str], optional): Tipo RDF del paper. Defaults to None.
             autores (Optional[List[Author]], optional): Lista de autores. Defaults to None.
             organization (Optional[List[Organization]], optional): Lista de organizaciones. Defaults to None.
+            archivo (Optional[str], optional): Nombre del PDF del que se extrajo. Defaults to None.
         """
         self.title = title
         self.doi = doi
@@ -34,9 +35,12 @@ class Paper:
         self.rdf_type = rdf_type
         self.autores = autores if autores is not None else []
         self.organization = organization if organization is not None else []
+        self.archivo = archivo
         self.flags = {}
         #self.parecido: List["Paper"] = []  # <-- Nuevo atributo para papers parecidos
         self.papersSimilares: List["Paper"] = papersSimilares if papersSimilares is not None else []
+        # Similitud con cada paper similar, por su `clave` (solo si se calculó con pesos)
+        self.similitudes: Dict[str, float] = {}
 
         self.set_flag('Title', title is not None)
         self.set_flag('Doi', doi is not None)
@@ -46,6 +50,11 @@ class Paper:
         self.set_flag('Paginas', paginas is not None)
         self.set_flag('RdfType', rdf_type is not None)
 
+    @property
+    def clave(self) -> str:
+        """Identificador estable del paper: el nombre de su PDF o, si no se conoce, el título."""
+        return getattr(self, "archivo", None) or self.title
+
     def set_flag(self, nombre: str, valor: bool) -> None:
         """
         Establece un flag para un campo específico.
@@ -77,6 +86,26 @@ class Paper:
             org.mostrar_info()
             print("\n")
 
+    def agregar_similar(self, paper: "Paper", similitud: Optional[float] = None) -> None:
+        """
+        Agrega un paper a la lista de papers similares. Si ya estaba, solo se actualiza
+        su similitud.
+
+        Args:
+            paper (Paper): Paper similar
+            similitud (Optional[float], optional): Similitud entre ambos, que se exporta
+                como peso de la relación. Defaults to None.
+        """
+        if not any(similar is paper for similar in self.papersSimilares):
+            self.papersSimilares.append(paper)
+        if similitud is not None:
+            self.similitudes[paper.clave] = similitud
+
+    def quitar_similar(self, paper: "Paper") -> None:
+        """Retira un paper de la lista de papers similares, junto con su similitud."""
+        self.papersSimilares = [similar for similar in self.papersSimilares if similar is not paper]
+        self.similitudes.pop(paper.clave, None)
+
     def agregar_parecido(self, paper: "Paper") -> None:
         """Agrega un paper a la lista de parecidos."""
         self.parecido.append(paper)
\ No newline at end of file
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import hashlib
+
+import numpy as np
+
+from extractors.ner_cache import normalizar_texto
+from similitud.cuantizacion import PRECISIONES, TIPOS_PRECISION, cuantizar, decuantizar
+
+# Almacén por defecto, relativo a la raíz del proyecto
+DIRECTORIO_EMBEDDINGS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data", "embeddings"
+)
+
+
+class AlmacenEmbeddings:
+    """
+    Almacén persistente de embeddings de resúmenes, direccionado por el hash del texto.
+
+    Hay un almacén por modelo. Los vectores se guardan como filas de una matriz float32
+    en un archivo binario de solo anexado que se lee con `np.memmap`, y un índice
+    `.indice.jsonl` relaciona el hash de cada texto con su fila. Cargar los embeddings
+    de todo el corpus es por tanto un mapeo del archivo, y solo se codifican los
+    resúmenes nuevos o modificados.
+
+    Con `precision` "float16" o "int8" la matriz ocupa la mitad o la cuarta parte. En
+    int8 cada fila lleva además una escala float32 (archivo `.escalas.f32`); como la
+    similitud coseno no depende de la escala de cada vector, `matriz()` devuelve
+    directamente los códigos y la similitud se calcula sobre ellos.
+    """
+
+    def __init__(self, directorio, modelo, precision="float32"):
+        """
+        Abre (o crea) el almacén de un modelo.
+
+        Args:
+            directorio (str): Directorio donde se guardan los almacenes
+            modelo (str): Nombre del modelo de embeddings
+            precision (str): Precisión de los vectores (ver PRECISIONES). Cada precisión
+                es un almacén distinto; `importar` convierte uno existente.
+        """
+        if precision not in PRECISIONES:
+            raise ValueError(f"Precisión desconocida: '{precision}'. Opciones: {', '.join(PRECISIONES)}")
+        nombre = re.sub(r"[^A-Za-z0-9_.-]+", "_", modelo)
+        if precision != "float32":
+            nombre = f"{nombre}.{precision}"
+        extension = {"float32": "f32", "float16": "f16", "int8": "i8"}[precision]
+        self.modelo = modelo
+        self.precision = precision
+        # Nombre de los archivos del almacén (modelo y precisión)
+        self.nombre = nombre
+        self.tipo = np.dtype(TIPOS_PRECISION[precision])
+        self.ruta_matriz = os.path.join(directorio, f"{nombre}.{extension}")
+        self.ruta_escalas = os.path.join(directorio, f"{nombre}.escalas.f32") if precision == "int8" else None
+        self.ruta_indice = os.path.join(directorio, f"{nombre}.indice.jsonl")
+        self.ruta_metadatos = os.path.join(directorio, f"{nombre}.json")
+        self.dimension = None
+        self.filas = {}
+        self._matriz = None
+        self._escalas = None
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar()
+
+    def _cargar(self):
+        if os.path.exists(self.ruta_metadatos):
+            with open(self.ruta_metadatos, encoding="utf-8") as f:
+                self.dimension = json.load(f)["dimension"]
+        if self.dimension is None or not os.path.exists(self.ruta_indice):
+            return
+
+        # Filas completas en la matriz: una fila sin línea en el índice (o al revés) es
+        # el resto de una ejecución interrumpida y se ignora
+        def filas_completas(ruta, bytes_fila):
+            return os.path.getsize(ruta) // bytes_fila if os.path.exists(ruta) else 0
+
+        filas_en_matriz = filas_completas(self.ruta_matriz, self.tipo.itemsize * self.dimension)
+        if self.ruta_escalas is not None:
+            filas_en_matriz = min(filas_en_matriz, filas_completas(self.ruta_escalas, 4))
+        with open(self.ruta_indice, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                if entrada["fila"] == len(self.filas) and entrada["fila"] < filas_en_matriz:
+                    self.filas[entrada["clave"]] = entrada["fila"]
+
+    @staticmethod
+    def clave(texto):
+        """Hash del texto normalizado que identifica su embedding."""
+        return hashlib.sha256(normalizar_texto(texto).encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self.filas)
+
+    def contiene(self, clave):
+        """Indica si la clave tiene un embedding almacenado."""
+        return clave in self.filas
+
+    def matriz(self):
+        """
+        Devuelve todos los embeddings almacenados como una matriz mapeada en memoria
+        (solo lectura), con una fila por entrada del índice.
+
+        Returns:
+            np.ndarray: Matriz (n, dimension) en la precisión del almacén (en int8, los
+                códigos sin escalar)
+        """
+        if not self.filas:
+            return np.zeros((0, self.dimension or 0), dtype=self.tipo)
+        if self._matriz is None or len(self._matriz) != len(self.filas):
+            self._matriz = np.memmap(self.ruta_matriz, dtype=self.tipo, mode="r",
+                                     shape=(len(self.filas), self.dimension))
+        return self._matriz
+
+    def escalas(self):
+        """Devuelve la escala de cada fila (solo en int8; en otro caso None)."""
+        if self.ruta_escalas is None:
+            return None
+        if not self.filas:
+            return np.zeros(0, dtype=np.float32)
+        if self._escalas is None or len(self._escalas) != len(self.filas):
+            self._escalas = np.memmap(self.ruta_escalas, dtype=np.float32, mode="r", shape=(len(self.filas),))
+        return self._escalas
+
+    def vectores_float32(self, filas):
+        """Reconstruye en float32 los embeddings de las filas indicadas."""
+        escalas = self.escalas()
+        return decuantizar(self.matriz()[filas], None if escalas is None else escalas[filas])
+
+    def agregar(self, claves, vectores):
+        """
+        Añade embeddings al final de la matriz y los registra en el índice.
+
+        Args:
+            claves (list): Claves de los textos (ver `clave`)
+            vectores (array-like): Matriz (len(claves), dimension)
+        """
+        vectores = np.ascontiguousarray(vectores, dtype=np.float32)
+        if not len(claves):
+            return
+        if self.dimension is None:
+            self.dimension = int(vectores.shape[1])
+            with open(self.ruta_metadatos, "w", encoding="utf-8") as f:
+                json.dump({"modelo": self.modelo, "dimension": self.dimension, "dtype": self.precision}, f)
+        elif vectores.shape[1] != self.dimension:
+            raise ValueError(f"Dimensión {vectores.shape[1]} distinta de la del almacén ({self.dimension})")
+
+        # Se escribe a partir de la última fila registrada, descartando restos sin índice
+        inicio = len(self.filas)
+        codigos, escalas = cuantizar(vectores, self.precision)
+        for ruta, datos, bytes_fila in ((self.ruta_matriz, codigos, self.tipo.itemsize * self.dimension),
+                                        (self.ruta_escalas, escalas, 4)):
+            if ruta is None:
+                continue
+            modo = "r+b" if os.path.exists(ruta) else "wb"
+            with open(ruta, modo) as f:
+                f.seek(inicio * bytes_fila)
+                f.write(np.ascontiguousarray(datos).tobytes())
+                f.truncate()
+
+        with open(self.ruta_indice, "a", encoding="utf-8") as f:
+            for fila, clave in enumerate(claves, start=inicio):
+                f.write(json.dumps({"clave": clave, "fila": fila}) + "\n")
+                self.filas[clave] = fila
+        self._matriz = None
+        self._escalas = None
+
+    def importar(self, otro, tamano_bloque=8192):
+        """
+        Copia al almacén, convertidos a su precisión, los embeddings de otro almacén
+        que todavía no tiene (p. ej. para pasar un almacén float32 existente a int8 sin
+        volver a codificar los resúmenes).
+
+        Args:
+            otro (AlmacenEmbeddings): Almacén de origen
+            tamano_bloque (int): Filas copiadas a la vez
+
+        Returns:
+            int: Número de embeddings importados
+        """
+        pendientes = sorted((fila, clave) for clave, fila in otro.filas.items() if clave not in self.filas)
+        for inicio in range(0, len(pendientes), tamano_bloque):
+            bloque = pendientes[inicio:inicio + tamano_bloque]
+            filas = np.array([fila for fila, _ in bloque], dtype=np.int64)
+            self.agregar([clave for _, clave in bloque], otro.vectores_float32(filas))
+        return len(pendientes)
+
+    def filas_de(self, textos, codificar=None):
+        """
+        Devuelve la fila de cada texto, codificando antes los que no están almacenados.
+
+        Args:
+            textos (list): Textos (resúmenes)
+            codificar (callable, optional): Función lista de textos -> matriz de
+                embeddings. Sin ella, los textos ausentes provocan un KeyError.
+
+        Returns:
+            np.ndarray: Índices de fila (int64) en `matriz()`
+        """
+        claves = [self.clave(texto) for texto in textos]
+        nuevos = {}
+        for clave, texto in zip(claves, textos):
+            if clave not in self.filas and clave not in nuevos:
+                nuevos[clave] = texto
+
+        print(f" Embeddings ({self.modelo}): {len(set(claves)) - len(nuevos)} almacenados, {len(nuevos)} por codificar")
+        if nuevos:
+            if codificar is None:
+                raise KeyError(f"{len(nuevos)} textos sin embedding almacenado")
+            self.agregar(list(nuevos), codificar(list(nuevos.values())))
+        return np.fromiter((self.filas[clave] for clave in claves), dtype=np.int64, count=len(claves))
+
+    def vectores(self, textos, codificar=None):
+        """
+        Devuelve los embeddings de los textos, en orden. Si los textos son exactamente
+        los del almacén en su orden, se devuelve la matriz mapeada sin copiarla.
+
+        Returns:
+            np.ndarray: Matriz (len(textos), dimension)
+        """
+        return self.vectores_de_filas(self.filas_de(textos, codificar))
+
+    def vectores_de_filas(self, filas):
+        """Devuelve las filas indicadas de la matriz (sin copiarla si son todas y en orden)."""
+        matriz = self.matriz()
+        if len(filas) == len(matriz) and np.array_equal(filas, np.arange(len(matriz))):
+            return matriz
+        return matriz[filas]
@@ -0,0 +1,96 @@
+import numpy as np
+
+
+def _leer(embeddings, posiciones, filas=None):
+    """Lee en float32 las posiciones indicadas (a través de `filas`, si se da) sin copiar el resto de la matriz."""
+    return np.asarray(embeddings[posiciones] if filas is None else embeddings[filas[posiciones]], dtype=np.float32)
+
+
+def normas(embeddings, tamano_bloque=8192, filas=None):
+    """
+    Calcula la norma de cada fila (o de cada posición de `filas`) recorriendo la matriz
+    por bloques (sirve para matrices mapeadas).
+    """
+    n = len(embeddings) if filas is None else len(filas)
+    resultado = np.empty(n, dtype=np.float32)
+    for inicio in range(0, n, tamano_bloque):
+        bloque = _leer(embeddings, slice(inicio, inicio + tamano_bloque), filas)
+        resultado[inicio:inicio + len(bloque)] = np.linalg.norm(bloque, axis=1)
+    return resultado
+
+
+def _bloque_normalizado(embeddings, normas_filas, inicio, fin, filas=None):
+    bloque = _leer(embeddings, slice(inicio, fin), filas)
+    divisor = normas_filas[inicio:fin, None]
+    return np.divide(bloque, divisor, out=np.zeros_like(bloque), where=divisor > 0)
+
+
+def pares_similares(embeddings, umbral, tamano_bloque=1024, filas_consulta=None, filas=None):
+    """
+    Devuelve, como un flujo, los pares de filas cuya similitud coseno supera el umbral.
+
+    La matriz se recorre en bloques de `tamano_bloque` filas: cada bloque se normaliza y
+    se multiplica por los bloques de columnas, y los pares que superan el umbral se
+    localizan con NumPy. Nunca se construye la matriz n×n completa, de modo que la
+    memoria máxima depende del tamaño de bloque (tamano_bloque² similitudes) y no del
+    número de papers. Admite matrices mapeadas en memoria.
+
+    Con `filas`, los pares se calculan entre posiciones: la posición p es la fila
+    `filas[p]` de `embeddings`. Cada bloque lee solo sus filas, de modo que una matriz
+    mapeada (p. ej. la del almacén de embeddings) no se copia entera a memoria aunque
+    las posiciones no sigan su orden.
+
+    Args:
+        embeddings (array-like): Matriz (n, dimension), no necesariamente normalizada
+        umbral (float): Similitud mínima (estricta) para emitir un par
+        tamano_bloque (int): Filas por bloque
+        filas_consulta (iterable, optional): Si se indica, solo se emiten los pares en
+            los que interviene alguna de estas filas o posiciones (p. ej. los papers nuevos)
+        filas (array-like, optional): Fila de `embeddings` de cada posición
+
+    Yields:
+        tuple: (i, j, similitud) con i < j, cada par una sola vez
+    """
+    if filas is not None:
+        filas = np.asarray(filas, dtype=np.int64)
+    n = len(embeddings) if filas is None else len(filas)
+    if n == 0:
+        return
+    normas_filas = normas(embeddings, filas=filas)
+
+    if filas_consulta is None:
+        # Triángulo superior: bloques de columnas desde el bloque diagonal en adelante
+        for inicio_i in range(0, n, tamano_bloque):
+            fin_i = min(inicio_i + tamano_bloque, n)
+            bloque_i = _bloque_normalizado(embeddings, normas_filas, inicio_i, fin_i, filas)
+            for inicio_j in range(inicio_i, n, tamano_bloque):
+                fin_j = min(inicio_j + tamano_bloque, n)
+                bloque_j = (bloque_i if inicio_j == inicio_i
+                            else _bloque_normalizado(embeddings, normas_filas, inicio_j, fin_j, filas))
+                similitudes = bloque_i @ bloque_j.T
+                if inicio_j == inicio_i:
+                    # En el bloque diagonal solo cuenta lo que queda por encima de la diagonal
+                    similitudes = np.triu(similitudes, k=1)
+                filas_par, columnas_par = np.nonzero(similitudes > umbral)
+                for f, c in zip(filas_par.tolist(), columnas_par.tolist()):
+                    yield inicio_i + f, inicio_j + c, float(similitudes[f, c])
+        return
+
+    consulta = np.unique(np.fromiter(filas_consulta, dtype=np.int64))
+    en_consulta = np.zeros(n, dtype=bool)
+    en_consulta[consulta] = True
+    for inicio in range(0, len(consulta), tamano_bloque):
+        filas_bloque = consulta[inicio:inicio + tamano_bloque]
+        bloque_i = _leer(embeddings, filas_bloque, filas)
+        divisor = normas_filas[filas_bloque, None]
+        bloque_i = np.divide(bloque_i, divisor, out=np.zeros_like(bloque_i), where=divisor > 0)
+        for inicio_j in range(0, n, tamano_bloque):
+            fin_j = min(inicio_j + tamano_bloque, n)
+            similitudes = bloque_i @ _bloque_normalizado(embeddings, normas_filas, inicio_j, fin_j, filas).T
+            filas_par, columnas_par = np.nonzero(similitudes > umbral)
+            for f, c in zip(filas_par.tolist(), columnas_par.tolist()):
+                i, j = int(filas_bloque[f]), inicio_j + c
+                # Un par entre dos filas de consulta se emite solo desde la menor
+                if i == j or (en_consulta[j] and j < i):
+                    continue
+                yield min(i, j), max(i, j), float(similitudes[f, c])
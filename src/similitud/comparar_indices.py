@@ -0,0 +1,119 @@
+"""
+Compara los índices de vecinos (cobertura frente a tiempo) sobre los embeddings del
+almacén o sobre vectores aleatorios.
+
+El índice "exacto" se toma como referencia: para cada índice se mide el tiempo de
+construcción, el de búsqueda de los k vecinos de un conjunto de consultas y la
+cobertura (recall@k) respecto a la búsqueda exacta.
+
+Uso (desde src/):
+    python -m similitud.comparar_indices -k 10 --consultas 1000
+    python -m similitud.comparar_indices --aleatorios 100000
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from similitud.almacen_embeddings import AlmacenEmbeddings, DIRECTORIO_EMBEDDINGS
+from similitud.indices import INDICES, crear_indice
+from similitud.modelo_embeddings import MODELO_EMBEDDINGS
+
+
+def cobertura(referencia, prediccion):
+    """
+    Fracción de los vecinos de referencia que aparecen en la predicción (recall@k medio).
+
+    Args:
+        referencia (np.ndarray): Índices (m, k) de la búsqueda exacta
+        prediccion (np.ndarray): Índices (m, k) del índice evaluado
+
+    Returns:
+        float: Cobertura entre 0 y 1
+    """
+    aciertos = 0
+    total = 0
+    for r, p in zip(referencia, prediccion):
+        esperados = set(r[r >= 0].tolist())
+        aciertos += len(esperados & set(p.tolist()))
+        total += len(esperados)
+    return aciertos / total if total else 1.0
+
+
+def comparar_indices(embeddings, tipos=tuple(INDICES), k=10, consultas=1000, semilla=0):
+    """
+    Construye cada índice sobre los mismos embeddings y mide su coste y su cobertura.
+
+    Args:
+        embeddings (array-like): Matriz (n, dimension)
+        tipos (tuple): Índices a comparar; "exacto" se añade como referencia
+        k (int): Vecinos por consulta
+        consultas (int): Número de filas usadas como consulta
+        semilla (int): Semilla de la selección de consultas
+
+    Returns:
+        list: Diccionarios con tipo, construccion_s, busqueda_s, consultas_por_s y cobertura
+    """
+    rng = np.random.default_rng(semilla)
+    filas = rng.choice(len(embeddings), min(consultas, len(embeddings)), replace=False)
+    vectores_consulta = np.asarray(embeddings[np.sort(filas)])
+
+    tipos = ["exacto"] + [t for t in tipos if t != "exacto"]
+    referencia = None
+    resultados = []
+    for tipo in tipos:
+        inicio = time.perf_counter()
+        try:
+            indice = crear_indice(tipo).construir(embeddings)
+        except ImportError as e:
+            print(f"Se omite el índice '{tipo}': {e}")
+            continue
+        construccion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        _, vecinos = indice.buscar(vectores_consulta, k)
+        busqueda = time.perf_counter() - inicio
+
+        if referencia is None:
+            referencia = vecinos
+        resultados.append({
+            "tipo": tipo,
+            "construccion_s": construccion,
+            "busqueda_s": busqueda,
+            "consultas_por_s": len(vectores_consulta) / busqueda if busqueda else 0.0,
+            "cobertura": cobertura(referencia, vecinos),
+        })
+    return resultados
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Comparar cobertura y coste de los índices de vecinos.")
+    parser.add_argument("-i", "--input", default=DIRECTORIO_EMBEDDINGS, help="Carpeta del almacén de embeddings.")
+    parser.add_argument("-m", "--modelo", default=MODELO_EMBEDDINGS, help="Modelo del almacén.")
+    parser.add_argument("--aleatorios", type=int, default=None,
+                        help="Usar N vectores aleatorios de dimensión 384 en lugar del almacén.")
+    parser.add_argument("-t", "--tipos", nargs="+", choices=list(INDICES), default=list(INDICES),
+                        help="Índices a comparar.")
+    parser.add_argument("-k", type=int, default=10, help="Vecinos por consulta.")
+    parser.add_argument("--consultas", type=int, default=1000, help="Número de consultas.")
+    args = parser.parse_args()
+
+    if args.aleatorios:
+        embeddings = np.random.default_rng(0).normal(size=(args.aleatorios, 384)).astype(np.float32)
+    else:
+        embeddings = AlmacenEmbeddings(args.input, args.modelo).matriz()
+    if not len(embeddings):
+        print(f"No hay embeddings en '{args.input}'.")
+        return
+
+    print(f"Evaluando {len(embeddings)} embeddings, k={args.k} (referencia: exacto)\n")
+    print(f"{'Índice':<10}{'Construcción (s)':>18}{'Búsqueda (s)':>14}{'Consultas/s':>13}{'Recall@k':>10}")
+    for r in comparar_indices(embeddings, args.tipos, args.k, args.consultas):
+        print(f"{r['tipo']:<10}{r['construccion_s']:>18.2f}{r['busqueda_s']:>14.3f}"
+              f"{r['consultas_por_s']:>13.1f}{r['cobertura']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compara la memoria y la calidad de los vecinos de los embeddings guardados en float32,
+float16 e int8 (con escala por vector).
+
+Para cada precisión se mide la memoria de la matriz, el tiempo de búsqueda exacta de
+los k vecinos de un conjunto de consultas sobre los vectores reducidos y el solapamiento
+de esos k vecinos con los obtenidos en float32.
+
+Uso (desde src/):
+    python -m similitud.comparar_precisiones -k 10 --consultas 1000
+    python -m similitud.comparar_precisiones --aleatorios 100000
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from similitud.almacen_embeddings import AlmacenEmbeddings, DIRECTORIO_EMBEDDINGS
+from similitud.comparar_indices import cobertura
+from similitud.cuantizacion import PRECISIONES
+from similitud.indices import IndiceExacto
+from similitud.modelo_embeddings import MODELO_EMBEDDINGS
+
+
+def comparar_precisiones(embeddings, precisiones=PRECISIONES, k=10, consultas=1000, semilla=0):
+    """
+    Indexa los mismos embeddings en cada precisión y compara memoria, tiempo y vecinos.
+
+    Args:
+        embeddings (array-like): Matriz (n, dimension)
+        precisiones (tuple): Precisiones a comparar; "float32" se añade como referencia
+        k (int): Vecinos por consulta
+        consultas (int): Número de filas usadas como consulta
+        semilla (int): Semilla de la selección de consultas
+
+    Returns:
+        list: Diccionarios con precision, bytes, ahorro, busqueda_s y solapamiento
+    """
+    rng = np.random.default_rng(semilla)
+    filas = rng.choice(len(embeddings), min(consultas, len(embeddings)), replace=False)
+    vectores_consulta = np.asarray(embeddings[np.sort(filas)], dtype=np.float32)
+
+    precisiones = ["float32"] + [p for p in precisiones if p != "float32"]
+    referencia = None
+    bytes_referencia = None
+    resultados = []
+    for precision in precisiones:
+        indice = IndiceExacto(precision=precision).construir(embeddings)
+        inicio = time.perf_counter()
+        _, vecinos = indice.buscar(vectores_consulta, k)
+        busqueda = time.perf_counter() - inicio
+
+        if referencia is None:
+            referencia = vecinos
+            bytes_referencia = indice.vectores.nbytes
+        resultados.append({
+            "precision": precision,
+            "bytes": indice.vectores.nbytes,
+            "ahorro": 1.0 - indice.vectores.nbytes / bytes_referencia,
+            "busqueda_s": busqueda,
+            "solapamiento": cobertura(referencia, vecinos),
+        })
+    return resultados
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Comparar memoria y vecinos de los embeddings en float32, float16 e int8.")
+    parser.add_argument("-i", "--input", default=DIRECTORIO_EMBEDDINGS, help="Carpeta del almacén de embeddings.")
+    parser.add_argument("-m", "--modelo", default=MODELO_EMBEDDINGS, help="Modelo del almacén.")
+    parser.add_argument("--aleatorios", type=int, default=None,
+                        help="Usar N vectores aleatorios de dimensión 384 en lugar del almacén.")
+    parser.add_argument("-p", "--precisiones", nargs="+", choices=PRECISIONES, default=list(PRECISIONES),
+                        help="Precisiones a comparar.")
+    parser.add_argument("-k", type=int, default=10, help="Vecinos por consulta.")
+    parser.add_argument("--consultas", type=int, default=1000, help="Número de consultas.")
+    args = parser.parse_args()
+
+    if args.aleatorios:
+        embeddings = np.random.default_rng(0).normal(size=(args.aleatorios, 384)).astype(np.float32)
+    else:
+        embeddings = AlmacenEmbeddings(args.input, args.modelo).matriz()
+    if not len(embeddings):
+        print(f"No hay embeddings en '{args.input}'.")
+        return
+
+    print(f"Evaluando {len(embeddings)} embeddings, k={args.k} (referencia: float32)\n")
+    print(f"{'Precisión':<10}{'Memoria (MB)':>14}{'Ahorro':>9}{'Búsqueda (s)':>14}{'Solapamiento@k':>16}")
+    for r in comparar_precisiones(embeddings, args.precisiones, args.k, args.consultas):
+        print(f"{r['precision']:<10}{r['bytes'] / 2**20:>14.1f}{r['ahorro']:>9.0%}"
+              f"{r['busqueda_s']:>14.3f}{r['solapamiento']:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import numpy as np
+
+from similitud.bloques import normas
+
+# Precisiones de almacenamiento de los embeddings
+#   float32: sin pérdida (4 bytes por componente)
+#   float16: media precisión (2 bytes por componente)
+#   int8:    cuantización escalar simétrica con una escala float32 por vector (1 byte por componente)
+PRECISIONES = ("float32", "float16", "int8")
+TIPOS_PRECISION = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def cuantizar(vectores, precision="float32"):
+    """
+    Convierte vectores a la precisión indicada.
+
+    En int8 cada vector se divide por su escala (máximo valor absoluto / 127) y se
+    redondea, de modo que `codigos * escala` reconstruye el vector. Como la escala es
+    positiva, la similitud coseno entre códigos es la misma que entre los vectores
+    reconstruidos.
+
+    Args:
+        vectores (array-like): Matriz (n, dimension)
+        precision (str): Una de PRECISIONES
+
+    Returns:
+        tuple: (codigos, escalas); escalas es None salvo en int8
+    """
+    if precision not in TIPOS_PRECISION:
+        raise ValueError(f"Precisión desconocida: '{precision}'. Opciones: {', '.join(PRECISIONES)}")
+    vectores = np.asarray(vectores, dtype=np.float32)
+    if precision != "int8":
+        return vectores.astype(TIPOS_PRECISION[precision]), None
+    escalas = (np.abs(vectores).max(axis=1) / 127.0).astype(np.float32)
+    divisor = escalas[:, None]
+    codigos = np.divide(vectores, divisor, out=np.zeros_like(vectores), where=divisor > 0)
+    return np.rint(codigos).astype(np.int8), escalas
+
+
+def decuantizar(codigos, escalas=None):
+    """Reconstruye los vectores float32 a partir de sus códigos (y escalas, en int8)."""
+    vectores = np.asarray(codigos, dtype=np.float32)
+    if escalas is not None:
+        vectores = vectores * np.asarray(escalas, dtype=np.float32)[:, None]
+    return vectores
+
+
+class VectoresCompactos:
+    """
+    Matriz de vectores normalizados guardada en precisión reducida. Las similitudes se
+    calculan sobre los códigos, convirtiendo a float32 solo un bloque de filas cada vez,
+    de modo que nunca se materializa la matriz completa en float32.
+    """
+
+    def __init__(self, codigos, escalas=None):
+        self.codigos = codigos
+        self.escalas = escalas
+
+    @classmethod
+    def desde(cls, embeddings, precision="float32", tamano_bloque=8192):
+        """
+        Normaliza y cuantiza una matriz de embeddings por bloques (admite matrices mapeadas).
+
+        Args:
+            embeddings (array-like): Matriz (n, dimension), no necesariamente normalizada
+            precision (str): Una de PRECISIONES
+            tamano_bloque (int): Filas convertidas a la vez
+
+        Returns:
+            VectoresCompactos: Vectores de norma 1 en la precisión indicada
+        """
+        n, dimension = len(embeddings), embeddings.shape[1]
+        codigos = np.empty((n, dimension), dtype=TIPOS_PRECISION[precision])
+        escalas = np.empty(n, dtype=np.float32) if precision == "int8" else None
+        normas_filas = normas(embeddings, tamano_bloque)
+        for inicio in range(0, n, tamano_bloque):
+            bloque = np.asarray(embeddings[inicio:inicio + tamano_bloque], dtype=np.float32)
+            divisor = normas_filas[inicio:inicio + len(bloque), None]
+            bloque = np.divide(bloque, divisor, out=np.zeros_like(bloque), where=divisor > 0)
+            codigos[inicio:inicio + len(bloque)], escalas_bloque = cuantizar(bloque, precision)
+            if escalas is not None:
+                escalas[inicio:inicio + len(bloque)] = escalas_bloque
+        return cls(codigos, escalas)
+
+    @property
+    def precision(self):
+        return np.dtype(self.codigos.dtype).name
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los códigos y las escalas."""
+        return self.codigos.nbytes + (self.escalas.nbytes if self.escalas is not None else 0)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, filas):
+        return VectoresCompactos(self.codigos[filas], None if self.escalas is None else self.escalas[filas])
+
+    def concatenar(self, otros):
+        """Devuelve estos vectores seguidos de `otros` (de la misma precisión)."""
+        escalas = None if self.escalas is None else np.concatenate([self.escalas, otros.escalas])
+        return VectoresCompactos(np.concatenate([self.codigos, otros.codigos]), escalas)
+
+    def a_float32(self):
+        """Devuelve los vectores reconstruidos en float32."""
+        return decuantizar(self.codigos, self.escalas)
+
+    def productos(self, consultas, tamano_bloque=8192):
+        """
+        Calcula `consultas @ vectores.T` convirtiendo los códigos a float32 por bloques.
+
+        Args:
+            consultas (np.ndarray): Matriz float32 (m, dimension)
+            tamano_bloque (int): Filas de códigos convertidas a la vez
+
+        Returns:
+            np.ndarray: Matriz float32 (m, len(self))
+        """
+        resultado = np.empty((len(consultas), len(self)), dtype=np.float32)
+        for inicio in range(0, len(self), tamano_bloque):
+            bloque = np.asarray(self.codigos[inicio:inicio + tamano_bloque], dtype=np.float32)
+            resultado[:, inicio:inicio + len(bloque)] = consultas @ bloque.T
+        if self.escalas is not None:
+            resultado *= self.escalas[None, :]
+        return resultado
+
+    def guardar(self, datos, nombre):
+        """Añade los códigos (y escalas) a un diccionario de arrays con el prefijo `nombre`."""
+        datos[nombre] = self.codigos
+        if self.escalas is not None:
+            datos[f"{nombre}_escalas"] = self.escalas
+        return datos
+
+    @classmethod
+    def cargar(cls, datos, nombre):
+        """Recupera unos vectores guardados con `guardar` (p. ej. desde un `np.load` de un .npz)."""
+        escalas = datos[f"{nombre}_escalas"] if f"{nombre}_escalas" in datos else None
+        return cls(datos[nombre], escalas)
@@ -0,0 +1,549 @@
+import os
+import json
+import pickle
+
+import numpy as np
+
+from similitud.bloques import normas
+from similitud.cuantizacion import VectoresCompactos
+
+
+def normalizar(embeddings, tamano_bloque=8192):
+    """Devuelve una copia float32 de la matriz con las filas de norma 1 (las filas nulas quedan a cero)."""
+    resultado = np.zeros((len(embeddings), embeddings.shape[1]), dtype=np.float32)
+    normas_filas = normas(embeddings, tamano_bloque)
+    for inicio in range(0, len(embeddings), tamano_bloque):
+        bloque = np.asarray(embeddings[inicio:inicio + tamano_bloque], dtype=np.float32)
+        divisor = normas_filas[inicio:inicio + len(bloque), None]
+        np.divide(bloque, divisor, out=resultado[inicio:inicio + len(bloque)], where=divisor > 0)
+    return resultado
+
+
+def _guardar_vectores(directorio, vectores):
+    """Guarda unos VectoresCompactos como `vectores.npy` (y `escalas.npy` en int8)."""
+    np.save(os.path.join(directorio, "vectores.npy"), vectores.codigos)
+    ruta_escalas = os.path.join(directorio, "escalas.npy")
+    if vectores.escalas is not None:
+        np.save(ruta_escalas, vectores.escalas)
+    elif os.path.exists(ruta_escalas):
+        os.remove(ruta_escalas)
+
+
+def _cargar_vectores(directorio):
+    ruta_escalas = os.path.join(directorio, "escalas.npy")
+    escalas = np.load(ruta_escalas) if os.path.exists(ruta_escalas) else None
+    return VectoresCompactos(np.load(os.path.join(directorio, "vectores.npy")), escalas)
+
+
+def _mejores_k(similitudes, k):
+    """Índices de las k mayores similitudes de cada fila, ordenados de mayor a menor."""
+    k = min(k, similitudes.shape[1])
+    candidatos = np.argpartition(-similitudes, k - 1, axis=1)[:, :k]
+    orden = np.argsort(-np.take_along_axis(similitudes, candidatos, axis=1), axis=1)
+    return np.take_along_axis(candidatos, orden, axis=1)
+
+
+class IndiceVecinos:
+    """
+    Índice de vecinos más próximos por similitud coseno sobre los embeddings de los
+    resúmenes. Cada vector lleva un identificador externo (la fila del almacén de
+    embeddings), de modo que el índice puede crecer y perder vectores sin reconstruirse.
+    Las subclases implementan `_construir`, `_buscar`, `_agregar`, `_conservar` y su
+    persistencia; sus posiciones internas siguen el orden de `ids`.
+
+    Los vectores indexados se guardan normalizados en `precision` (ver
+    `similitud.cuantizacion`): en float16 o int8 la búsqueda se hace directamente sobre
+    los códigos, con la mitad o la cuarta parte de memoria que en float32.
+    """
+
+    tipo = None
+
+    def __init__(self, precision="float32"):
+        self.precision = precision
+        self.n = 0
+        self.n_construccion = 0
+        self.dimension = None
+        self.ids = np.zeros(0, dtype=np.int64)
+
+    def construir(self, embeddings, ids=None):
+        """
+        Construye el índice sobre una matriz de embeddings (no hace falta normalizarla).
+
+        Args:
+            embeddings (array-like): Matriz (n, dimension); admite matrices mapeadas
+            ids (array-like, optional): Identificador de cada fila. Por defecto, su posición.
+        """
+        self.n = len(embeddings)
+        self.n_construccion = self.n
+        self.dimension = int(embeddings.shape[1])
+        self.ids = np.arange(self.n, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        self._construir(VectoresCompactos.desde(embeddings, self.precision))
+        return self
+
+    def agregar(self, embeddings, ids):
+        """Añade vectores al índice con sus identificadores."""
+        if not len(ids):
+            return
+        self._agregar(VectoresCompactos.desde(embeddings, self.precision))
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.n = len(self.ids)
+
+    def eliminar(self, ids):
+        """Retira del índice los vectores con los identificadores indicados."""
+        mascara = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        if mascara.all():
+            return
+        self._conservar(mascara)
+        self.ids = self.ids[mascara]
+        self.n = len(self.ids)
+
+    def buscar(self, consultas, k):
+        """
+        Busca los k vecinos más similares de cada consulta.
+
+        Args:
+            consultas (array-like): Matriz (m, dimension)
+            k (int): Número de vecinos por consulta
+
+        Returns:
+            tuple: (similitudes, ids), ambas (m, k) y ordenadas de mayor a menor
+                similitud; si hay menos de k candidatos, los huecos tienen id -1
+        """
+        consultas = normalizar(np.atleast_2d(consultas))
+        similitudes = np.full((len(consultas), k), -np.inf, dtype=np.float32)
+        posiciones = np.full((len(consultas), k), -1, dtype=np.int64)
+        if self.n and len(consultas):
+            self._buscar(consultas, k, similitudes, posiciones)
+        ids = np.where(posiciones >= 0, self.ids[np.maximum(posiciones, 0)], -1) if self.n else posiciones
+        return similitudes, ids
+
+    def guardar(self, directorio):
+        """
+        Guarda el índice en un directorio (se crea si no existe). Los metadatos se
+        escriben al final, de modo que un guardado interrumpido no deja un índice válido.
+        """
+        os.makedirs(directorio, exist_ok=True)
+        ruta_metadatos = os.path.join(directorio, "indice.json")
+        if os.path.exists(ruta_metadatos):
+            os.remove(ruta_metadatos)
+        np.save(os.path.join(directorio, "ids.npy"), self.ids)
+        self._guardar(directorio)
+        with open(ruta_metadatos, "w", encoding="utf-8") as f:
+            json.dump(dict(self._parametros(), tipo=self.tipo, precision=self.precision, n=self.n,
+                           n_construccion=self.n_construccion, dimension=self.dimension), f)
+
+    def _parametros(self):
+        return {}
+
+    def _construir(self, vectores):
+        raise NotImplementedError
+
+    def _buscar(self, consultas, k, similitudes, posiciones):
+        raise NotImplementedError
+
+    def _agregar(self, vectores):
+        raise NotImplementedError
+
+    def _conservar(self, mascara):
+        raise NotImplementedError
+
+    def _guardar(self, directorio):
+        raise NotImplementedError
+
+    def _cargar(self, directorio):
+        raise NotImplementedError
+
+
+class IndiceExacto(IndiceVecinos):
+    """Búsqueda exhaustiva por bloques de consultas: referencia exacta."""
+
+    tipo = "exacto"
+
+    def __init__(self, tamano_bloque=1024, precision="float32"):
+        super().__init__(precision)
+        self.tamano_bloque = tamano_bloque
+        self.vectores = None
+
+    def _parametros(self):
+        return {"tamano_bloque": self.tamano_bloque}
+
+    def _construir(self, vectores):
+        self.vectores = vectores
+
+    def _buscar(self, consultas, k, similitudes, posiciones):
+        kk = min(k, self.n)
+        for inicio in range(0, len(consultas), self.tamano_bloque):
+            bloque = self.vectores.productos(consultas[inicio:inicio + self.tamano_bloque])
+            mejores = _mejores_k(bloque, kk)
+            posiciones[inicio:inicio + len(bloque), :kk] = mejores
+            similitudes[inicio:inicio + len(bloque), :kk] = np.take_along_axis(bloque, mejores, axis=1)
+
+    def _agregar(self, vectores):
+        self.vectores = self.vectores.concatenar(vectores)
+
+    def _conservar(self, mascara):
+        self.vectores = self.vectores[mascara]
+
+    def _guardar(self, directorio):
+        _guardar_vectores(directorio, self.vectores)
+
+    def _cargar(self, directorio):
+        self.vectores = _cargar_vectores(directorio)
+
+
+class IndiceSklearn(IndiceVecinos):
+    """
+    `NearestNeighbors` de scikit-learn sobre los vectores normalizados. Con norma 1 la
+    distancia euclídea ordena igual que el coseno, lo que permite usar árboles.
+    `NearestNeighbors` no admite inserciones, así que añadir o retirar vectores vuelve
+    a ajustar el modelo. El modelo trabaja siempre en float32: `precision` solo reduce
+    la copia de los vectores que se conserva para reajustarlo.
+    """
+
+    tipo = "sklearn"
+
+    def __init__(self, algoritmo="auto", precision="float32"):
+        super().__init__(precision)
+        self.algoritmo = algoritmo
+        self.vectores = None
+        self.modelo = None
+
+    def _parametros(self):
+        return {"algoritmo": self.algoritmo}
+
+    def _construir(self, vectores):
+        # scikit-learn solo se carga si se usa este índice
+        from sklearn.neighbors import NearestNeighbors
+        self.vectores = vectores
+        self.modelo = NearestNeighbors(algorithm=self.algoritmo).fit(vectores.a_float32())
+
+    def _buscar(self, consultas, k, similitudes, posiciones):
+        kk = min(k, self.n)
+        distancias, vecinos = self.modelo.kneighbors(consultas, n_neighbors=kk)
+        posiciones[:, :kk] = vecinos
+        similitudes[:, :kk] = 1.0 - distancias ** 2 / 2.0
+
+    def _agregar(self, vectores):
+        self._construir(self.vectores.concatenar(vectores))
+
+    def _conservar(self, mascara):
+        self._construir(self.vectores[mascara])
+
+    def _guardar(self, directorio):
+        with open(os.path.join(directorio, "modelo.pkl"), "wb") as f:
+            pickle.dump(self.modelo, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _guardar_vectores(directorio, self.vectores)
+
+    def _cargar(self, directorio):
+        with open(os.path.join(directorio, "modelo.pkl"), "rb") as f:
+            self.modelo = pickle.load(f)
+        self.vectores = _cargar_vectores(directorio)
+
+
+# Sondas por defecto del índice IVF: una de cada SONDAS_POR_LISTA listas, y al menos SONDAS_MINIMAS
+SONDAS_POR_LISTA = 10
+SONDAS_MINIMAS = 8
+
+
+class IndiceIVF(IndiceVecinos):
+    """
+    Índice aproximado de listas invertidas (IVF): los vectores se agrupan con k-means
+    esférico en `listas` centroides y cada consulta solo se compara con los vectores de
+    las `sondas` listas más cercanas. Más sondas, más cobertura y más coste. Los vectores
+    añadidos después se asignan a los centroides existentes.
+
+    Por defecto hay √n listas y se sondea una de cada SONDAS_POR_LISTA (al menos
+    SONDAS_MINIMAS). Con embeddings agrupados por temas, como los de los resúmenes, la
+    cobertura es casi completa y la búsqueda varias veces más rápida que la exacta a
+    partir de unas decenas de miles de vectores; por debajo, o con vectores sin
+    estructura (p. ej. aleatorios), la cobertura cae mucho y conviene el índice exacto.
+    Ver `similitud.comparar_indices`.
+    """
+
+    tipo = "ivf"
+
+    def __init__(self, listas=None, sondas=None, iteraciones=10, muestra_por_lista=256, semilla=0,
+                 precision="float32"):
+        super().__init__(precision)
+        self.listas = listas
+        self.sondas = sondas
+        self.iteraciones = iteraciones
+        self.muestra_por_lista = muestra_por_lista
+        self.semilla = semilla
+        self.centroides = None
+        self.vectores = None
+        self.asignacion = None
+        self.orden = None
+        self.inicios = None
+        self.ordenados = None
+
+    def _parametros(self):
+        return {"listas": self.listas, "sondas": self.sondas, "iteraciones": self.iteraciones,
+                "muestra_por_lista": self.muestra_por_lista, "semilla": self.semilla}
+
+    @staticmethod
+    def _asignar(vectores, centroides, tamano_bloque=8192):
+        asignacion = np.empty(len(vectores), dtype=np.int64)
+        for inicio in range(0, len(vectores), tamano_bloque):
+            asignacion[inicio:inicio + tamano_bloque] = np.argmax(
+                vectores[inicio:inicio + tamano_bloque].productos(centroides), axis=0)
+        return asignacion
+
+    def _indexar_listas(self):
+        # Listas invertidas: vectores ordenados por lista y posición de inicio de cada una
+        self.orden = np.argsort(self.asignacion, kind="stable")
+        self.ordenados = self.vectores[self.orden]
+        self.inicios = np.concatenate([[0], np.cumsum(np.bincount(self.asignacion, minlength=self.listas))])
+
+    def _construir(self, vectores):
+        rng = np.random.default_rng(self.semilla)
+        listas = self.listas or max(1, int(np.sqrt(self.n)))
+        listas = min(listas, self.n)
+        self.listas = listas
+
+        # k-means esférico sobre una muestra
+        tamano_muestra = min(self.n, listas * self.muestra_por_lista)
+        muestra = vectores[rng.choice(self.n, tamano_muestra, replace=False)].a_float32()
+        centroides = muestra[rng.choice(tamano_muestra, listas, replace=False)].copy()
+        for _ in range(self.iteraciones):
+            asignacion = np.argmax(muestra @ centroides.T, axis=1)
+            sumas = np.zeros_like(centroides)
+            np.add.at(sumas, asignacion, muestra)
+            vacias = ~np.bincount(asignacion, minlength=listas).astype(bool)
+            sumas[vacias] = muestra[rng.choice(tamano_muestra, int(vacias.sum()))]
+            centroides = sumas / np.maximum(np.linalg.norm(sumas, axis=1, keepdims=True), 1e-12)
+        self.centroides = centroides.astype(np.float32)
+
+        self.vectores = vectores
+        self.asignacion = self._asignar(vectores, self.centroides)
+        self._indexar_listas()
+
+    def _buscar(self, consultas, k, similitudes, posiciones):
+        sondas = self.sondas or max(SONDAS_MINIMAS, -(-self.listas // SONDAS_POR_LISTA))
+        sondas = min(sondas, self.listas)
+        cercanas = _mejores_k(consultas @ self.centroides.T, sondas)
+        # Se recorren las listas y no las consultas: cada lista se compara de una vez con
+        # todas las consultas que la sondean, y sus candidatos se funden con los k
+        # mejores acumulados de esas consultas
+        pares = np.argsort(cercanas.ravel(), kind="stable")
+        limites = np.concatenate([[0], np.cumsum(np.bincount(cercanas.ravel(), minlength=self.listas))])
+        for lista in range(self.listas):
+            inicio, fin = self.inicios[lista], self.inicios[lista + 1]
+            if inicio == fin or limites[lista] == limites[lista + 1]:
+                continue
+            qs = pares[limites[lista]:limites[lista + 1]] // sondas
+            puntuaciones = self.ordenados[inicio:fin].productos(consultas[qs])
+            candidatas = np.concatenate([similitudes[qs], puntuaciones], axis=1)
+            ids = np.concatenate([posiciones[qs], np.broadcast_to(self.orden[inicio:fin], puntuaciones.shape)], axis=1)
+            mejores = _mejores_k(candidatas, k)
+            similitudes[qs] = np.take_along_axis(candidatas, mejores, axis=1)
+            posiciones[qs] = np.take_along_axis(ids, mejores, axis=1)
+
+    def _agregar(self, vectores):
+        self.vectores = self.vectores.concatenar(vectores)
+        self.asignacion = np.concatenate([self.asignacion, self._asignar(vectores, self.centroides)])
+        self._indexar_listas()
+
+    def _conservar(self, mascara):
+        self.vectores = self.vectores[mascara]
+        self.asignacion = self.asignacion[mascara]
+        self._indexar_listas()
+
+    def _guardar(self, directorio):
+        np.savez(os.path.join(directorio, "ivf.npz"), centroides=self.centroides, asignacion=self.asignacion,
+                 **self.vectores.guardar({}, "vectores"))
+
+    def _cargar(self, directorio):
+        datos = np.load(os.path.join(directorio, "ivf.npz"))
+        self.centroides = datos["centroides"]
+        self.vectores = VectoresCompactos.cargar(datos, "vectores")
+        self.asignacion = datos["asignacion"]
+        self._indexar_listas()
+
+
+# Tipos de índice disponibles
+INDICES = {
+    IndiceExacto.tipo: IndiceExacto,
+    IndiceSklearn.tipo: IndiceSklearn,
+    IndiceIVF.tipo: IndiceIVF,
+}
+
+
+def crear_indice(tipo, **parametros):
+    """Crea un índice vacío del tipo indicado (ver INDICES)."""
+    if tipo not in INDICES:
+        raise ValueError(f"Índice desconocido: '{tipo}'. Opciones: {', '.join(INDICES)}")
+    return INDICES[tipo](**parametros)
+
+
+def cargar_indice(directorio):
+    """Carga un índice guardado con `IndiceVecinos.guardar`."""
+    with open(os.path.join(directorio, "indice.json"), encoding="utf-8") as f:
+        metadatos = json.load(f)
+    tipo = metadatos.pop("tipo")
+    n = metadatos.pop("n")
+    n_construccion = metadatos.pop("n_construccion")
+    dimension = metadatos.pop("dimension")
+    indice = crear_indice(tipo, **metadatos)
+    indice.n = n
+    indice.n_construccion = n_construccion
+    indice.dimension = dimension
+    indice.ids = np.load(os.path.join(directorio, "ids.npy"))
+    indice._cargar(directorio)
+    return indice
+
+
+def sincronizar_indice(tipo, directorio, embeddings, ids, factor_reconstruccion=2.0, **parametros):
+    """
+    Devuelve el índice guardado en `directorio` actualizado para contener exactamente
+    los vectores `ids` de `embeddings`: se retiran los que sobran y se añaden los que
+    faltan, de modo que el coste de una actualización depende del número de cambios y
+    no del tamaño del corpus. El índice se construye desde cero si no existe, si es de
+    otro tipo o si ha crecido más de `factor_reconstruccion` veces desde su construcción
+    (los centroides del IVF dejan de representar bien el corpus). También se reconstruye
+    si se pide otra precisión que la del índice guardado o si los embeddings tienen otra
+    dimensión (p. ej. de otro modelo).
+
+    Args:
+        tipo (str): Tipo de índice (ver INDICES)
+        directorio (str): Directorio del índice persistido
+        embeddings (array-like): Matriz del almacén (p. ej. `AlmacenEmbeddings.matriz()`)
+        ids (array-like): Filas de `embeddings` que debe contener el índice
+        factor_reconstruccion (float): Crecimiento que obliga a reconstruir
+        **parametros: Parámetros del constructor del índice
+
+    Returns:
+        IndiceVecinos: Índice listo para buscar, con las filas de `embeddings` como ids
+    """
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    indice = None
+    if os.path.exists(os.path.join(directorio, "indice.json")):
+        indice = cargar_indice(directorio)
+        if (indice.tipo != tipo or indice.precision != parametros.get("precision", "float32")
+                or indice.dimension != embeddings.shape[1]):
+            indice = None
+
+    if indice is not None:
+        sobrantes = np.setdiff1d(indice.ids, ids)
+        faltan = np.setdiff1d(ids, indice.ids)
+        if indice.n - len(sobrantes) + len(faltan) <= factor_reconstruccion * max(indice.n_construccion, 1):
+            print(f" Índice '{tipo}': {len(faltan)} vectores añadidos, {len(sobrantes)} retirados")
+            if not len(sobrantes) and not len(faltan):
+                return indice
+            indice.eliminar(sobrantes)
+            indice.agregar(np.asarray(embeddings[faltan]), faltan)
+            indice.guardar(directorio)
+            return indice
+
+    print(f" Construyendo índice '{tipo}' sobre {len(ids)} embeddings")
+    indice = crear_indice(tipo, **parametros).construir(np.asarray(embeddings[ids]), ids)
+    indice.guardar(directorio)
+    return indice
+
+
+def vecinos_top_k(indice, embeddings, k, umbral, filas_consulta=None, tamano_bloque=1024):
+    """
+    Obtiene, para cada paper, sus k vecinos más similares por encima del umbral.
+
+    Las filas son los identificadores del índice, es decir, filas de `embeddings`.
+
+    Args:
+        indice (IndiceVecinos): Índice cuyos ids son filas de `embeddings`
+        embeddings (array-like): Matriz (n, dimension) de la que sale cada consulta
+        k (int): Vecinos por paper
+        umbral (float): Similitud mínima (estricta)
+        filas_consulta (iterable, optional): Filas a consultar. Por defecto, todas las del índice.
+        tamano_bloque (int): Consultas por bloque
+
+    Returns:
+        dict: Fila -> lista de (fila vecina, similitud), de mayor a menor similitud
+    """
+    filas = indice.ids if filas_consulta is None else np.fromiter(filas_consulta, dtype=np.int64)
+    vecinos = {}
+    for inicio in range(0, len(filas), tamano_bloque):
+        filas_bloque = filas[inicio:inicio + tamano_bloque]
+        # Se pide un vecino más porque cada paper se encuentra a sí mismo
+        similitudes, indices = indice.buscar(np.asarray(embeddings[filas_bloque]), k + 1)
+        for i, fila_sim, fila_ind in zip(filas_bloque.tolist(), similitudes, indices):
+            lista = []
+            for s, j in zip(fila_sim.tolist(), fila_ind.tolist()):
+                if j < 0 or j == i:
+                    continue
+                if len(lista) == k or s <= umbral:
+                    break
+                lista.append((j, s))
+            vecinos[i] = lista
+    return vecinos
+
+
+def _enlaces_de_vecinos(vecinos, consultadas, indice, embeddings, k, umbral, mutuos, tamano_bloque):
+    """Enlaces de las filas `consultadas` a partir de sus listas de vecinos (ver `enlaces_top_k`)."""
+    if not mutuos:
+        return [(i, j, s) for i in sorted(consultadas) for j, s in vecinos[i]]
+
+    # La reciprocidad necesita también los vecinos de los vecinos encontrados
+    faltan = sorted({j for i in consultadas for j, _ in vecinos[i]} - set(vecinos))
+    if faltan:
+        vecinos.update(vecinos_top_k(indice, embeddings, k, umbral, faltan, tamano_bloque))
+    pares = {}
+    for i in consultadas:
+        for j, s in vecinos[i]:
+            if any(x == i for x, _ in vecinos[j]):
+                pares[(min(i, j), max(i, j))] = s
+    return [(i, j, s) for (i, j), s in sorted(pares.items())]
+
+
+def enlaces_top_k(indice, embeddings, k, umbral, mutuos=True, filas_consulta=None, tamano_bloque=1024):
+    """
+    Calcula los enlaces de similitud limitando a k los vecinos de cada paper.
+
+    Con `mutuos`, dos papers se enlazan solo si cada uno está entre los k vecinos del
+    otro (relación simétrica). Sin `mutuos`, cada paper se enlaza en un solo sentido con
+    sus k vecinos. En ambos casos ningún paper tiene más de k enlaces salientes.
+
+    Args:
+        indice (IndiceVecinos): Índice cuyos ids son filas de `embeddings`
+        embeddings (array-like): Matriz (n, dimension)
+        k (int): Vecinos por paper
+        umbral (float): Similitud mínima (estricta)
+        mutuos (bool): Exigir que la relación sea recíproca
+        filas_consulta (iterable, optional): Filas cuyos enlaces se calculan. Por
+            defecto, todas las del índice. Para añadir filas nuevas a unos enlaces ya
+            calculados, ver `enlaces_top_k_incrementales`.
+        tamano_bloque (int): Consultas por bloque
+
+    Returns:
+        list: (i, j, similitud). Con `mutuos`, i < j y cada par aparece una vez;
+            sin `mutuos`, el enlace va de i a j
+    """
+    vecinos = vecinos_top_k(indice, embeddings, k, umbral, filas_consulta, tamano_bloque)
+    return _enlaces_de_vecinos(vecinos, list(vecinos), indice, embeddings, k, umbral, mutuos, tamano_bloque)
+
+
+def enlaces_top_k_incrementales(indice, embeddings, k, umbral, filas_nuevas, mutuos=True, tamano_bloque=1024):
+    """
+    Calcula los enlaces top-k de las filas nuevas de un índice cuyos enlaces anteriores
+    ya existen, sin que ningún paper pase de k enlaces.
+
+    Además de las listas de las filas nuevas, se recalculan las de las filas anteriores
+    que están entre sus vecinos: son las que pueden recibir un enlace de una fila nueva
+    y, con él, dejar fuera de sus k vecinos a alguno de los que ya tenían. Sus enlaces
+    recalculados sustituyen a los anteriores. El resto de filas conserva sus enlaces;
+    siguen sin pasar de k, aunque alguno pueda diferir del que daría un cálculo
+    completo sobre todo el índice.
+
+    Args:
+        indice, embeddings, k, umbral, mutuos, tamano_bloque: Como en `enlaces_top_k`
+        filas_nuevas (iterable): Filas añadidas al índice desde el último cálculo
+
+    Returns:
+        tuple: (enlaces, recalculadas). `enlaces` como en `enlaces_top_k`, con todos
+            los de las filas nuevas y los de las recalculadas; `recalculadas`, la lista
+            de filas anteriores cuyos enlaces se han vuelto a calcular
+    """
+    vecinos = vecinos_top_k(indice, embeddings, k, umbral, filas_nuevas, tamano_bloque)
+    recalculadas = sorted({j for lista in vecinos.values() for j, _ in lista} - set(vecinos))
+    if recalculadas:
+        vecinos.update(vecinos_top_k(indice, embeddings, k, umbral, recalculadas, tamano_bloque))
+    enlaces = _enlaces_de_vecinos(vecinos, list(vecinos), indice, embeddings, k, umbral, mutuos, tamano_bloque)
+    return enlaces, recalculadas
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+
+# Modelo de SentenceTransformers usado para los embeddings de los resúmenes
+MODELO_EMBEDDINGS = "all-MiniLM-L6-v2"
+
+# Textos por lote del modelo
+TAMANO_LOTE_EMBEDDINGS = 64
+
+# Por debajo de este número de textos no compensa arrancar el pool de procesos
+MINIMO_TEXTOS_MULTIPROCESO = 2000
+
+_modelos_embeddings = {}
+
+
+def obtener_modelo_embeddings(nombre=MODELO_EMBEDDINGS):
+    """
+    Devuelve el modelo de embeddings compartido por todo el proceso, cargándolo la
+    primera vez que se usa.
+
+    Args:
+        nombre (str): Nombre del modelo de SentenceTransformers
+
+    Returns:
+        SentenceTransformer: Modelo cargado
+    """
+    if nombre not in _modelos_embeddings:
+        # sentence_transformers (y torch) se importan aquí para no pagar su carga al importar el módulo
+        from sentence_transformers import SentenceTransformer
+        _modelos_embeddings[nombre] = SentenceTransformer(nombre)
+    return _modelos_embeddings[nombre]
+
+
+def _codificar_multiproceso(modelo, textos, tamano_lote, procesos):
+    """Codifica los textos repartiéndolos entre `procesos` procesos, cada uno con su copia del modelo."""
+    pool = modelo.start_multi_process_pool(target_devices=["cpu"] * procesos)
+    try:
+        return modelo.encode_multi_process(textos, pool, batch_size=tamano_lote)
+    finally:
+        modelo.stop_multi_process_pool(pool)
+
+
+def codificar_textos(textos, nombre=MODELO_EMBEDDINGS, tamano_lote=TAMANO_LOTE_EMBEDDINGS, procesos=1,
+                     minimo_multiproceso=MINIMO_TEXTOS_MULTIPROCESO):
+    """
+    Calcula los embeddings normalizados (norma 1) de los textos, en su orden original.
+
+    Los textos se ordenan por longitud antes de agruparlos en lotes, de modo que cada
+    lote rellena poco hasta su texto más largo. Al terminar se informa del rendimiento
+    en documentos por segundo.
+
+    Args:
+        textos (list): Textos a codificar
+        nombre (str): Nombre del modelo de SentenceTransformers
+        tamano_lote (int): Textos por lote del modelo
+        procesos (int): Procesos de codificación. Con más de uno, y al menos
+            `minimo_multiproceso` textos, se usa el pool de procesos de SentenceTransformers
+        minimo_multiproceso (int): Número mínimo de textos para arrancar el pool
+
+    Returns:
+        np.ndarray: Matriz float32 (len(textos), dimension)
+    """
+    modelo = obtener_modelo_embeddings(nombre)
+    orden = sorted(range(len(textos)), key=lambda i: len(textos[i]))
+    ordenados = [textos[i] for i in orden]
+
+    inicio = time.perf_counter()
+    if procesos and procesos > 1 and len(textos) >= minimo_multiproceso:
+        embeddings = _codificar_multiproceso(modelo, ordenados, tamano_lote, procesos)
+    else:
+        procesos = 1
+        embeddings = modelo.encode(ordenados, batch_size=tamano_lote, convert_to_numpy=True)
+    duracion = time.perf_counter() - inicio
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    normas = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.divide(embeddings, normas, out=embeddings, where=normas > 0)
+
+    resultado = np.empty_like(embeddings)
+    resultado[orden] = embeddings
+    velocidad = len(textos) / duracion if duracion else 0.0
+    print(f" Codificados {len(textos)} textos con {nombre} en {duracion:.1f} s "
+          f"({velocidad:.1f} docs/s, {procesos} proceso(s), lote {tamano_lote})")
+    return resultado
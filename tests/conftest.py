@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del proyecto se importan desde src/ (p. ej. `extractors.grobid_extractor`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,111 @@
+import os
+
+from extractors import grobid_extractor
+from extractors.Acknowledgment import obtener_acknowledgment
+from extractors.tei_cache import CacheTEI
+
+TEI = """<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+  <teiHeader><fileDesc><titleStmt><title level="a" type="main">Un paper</title></titleStmt></fileDesc>
+  <profileDesc><abstract><p>Resumen.</p></abstract></profileDesc></teiHeader>
+  <text><back><div type="acknowledgement"><p>Financiado por la Fundación Ejemplo.</p></div></back></text>
+</TEI>""".encode("utf-8")
+
+
+class RespuestaFalsa:
+    status_code = 200
+    content = TEI
+
+
+def test_acknowledgment_reutiliza_el_tei_de_un_modo_completo(tmp_path, monkeypatch):
+    directorio_pdfs = tmp_path / "raw"
+    directorio_pdfs.mkdir()
+    (directorio_pdfs / "a.pdf").write_bytes(b"%PDF-1.4 contenido")
+
+    llamadas = []
+
+    def post_falso(url, files=None, data=None):
+        llamadas.append((url, data))
+        return RespuestaFalsa()
+
+    monkeypatch.setattr(grobid_extractor.requests, "post", post_falso)
+    # El NER no interviene en la reutilización del TEI
+    monkeypatch.setattr(grobid_extractor, "completar_organizaciones", lambda registros, *args: registros)
+
+    registros = list(grobid_extractor.iterar_pdfs(str(directorio_pdfs), modo="completo"))
+    assert len(registros) == 1
+    assert len(llamadas) == 1
+    llamadas.clear()
+
+    cache = CacheTEI(os.path.join(tmp_path, "xml_responses"))
+    acknowledgment = obtener_acknowledgment(str(directorio_pdfs / "a.pdf"), cache=cache)
+
+    assert "Fundación Ejemplo" in acknowledgment
+    assert llamadas == []
+
+
+def test_modo_por_defecto_extrae_el_acknowledgment(tmp_path, monkeypatch):
+    directorio_pdfs = tmp_path / "raw"
+    directorio_pdfs.mkdir()
+    (directorio_pdfs / "a.pdf").write_bytes(b"%PDF-1.4 contenido")
+
+    llamadas = []
+
+    def post_falso(url, files=None, data=None):
+        llamadas.append((url.rsplit("/", 1)[1], data))
+        return RespuestaFalsa()
+
+    monkeypatch.setattr(grobid_extractor.requests, "post", post_falso)
+    monkeypatch.setattr(grobid_extractor, "completar_organizaciones", lambda registros, *args: registros)
+
+    registros = list(grobid_extractor.iterar_pdfs(str(directorio_pdfs)))
+
+    # Una sola llamada por PDF: el texto completo, con la cabecera consolidada
+    assert llamadas == [("processFulltextDocument", {"consolidateHeader": "1"})]
+    assert "Fundación Ejemplo" in registros[0]["acknowledgment"]
+
+
+def test_escalonado_sin_afiliaciones_pide_cabecera_y_texto_completo(tmp_path, monkeypatch):
+    directorio_pdfs = tmp_path / "raw"
+    directorio_pdfs.mkdir()
+    (directorio_pdfs / "a.pdf").write_bytes(b"%PDF-1.4 contenido")
+
+    urls = []
+
+    def post_falso(url, files=None, data=None):
+        urls.append(url.rsplit("/", 1)[1])
+        return RespuestaFalsa()
+
+    monkeypatch.setattr(grobid_extractor.requests, "post", post_falso)
+    monkeypatch.setattr(grobid_extractor, "completar_organizaciones", lambda registros, *args: registros)
+
+    registros = list(grobid_extractor.iterar_pdfs(str(directorio_pdfs), necesita_texto_completo="sin-afiliaciones"))
+
+    assert urls == ["processHeaderDocument", "processFulltextDocument"]
+    assert "Fundación Ejemplo" in registros[0]["acknowledgment"]
+
+
+def test_acknowledgment_desde_contenido_tei(tmp_path):
+    cache = CacheTEI(str(tmp_path / "xml_responses"))
+    cache.guardar("clave", TEI)
+
+    assert "Fundación Ejemplo" in obtener_acknowledgment(fuente=cache.obtener("clave"))
+    assert "Fundación Ejemplo" in obtener_acknowledgment(fuente=TEI.decode("utf-8"))
+
+
+def test_migrar_xml_antiguos_con_el_nombre_del_pdf(tmp_path):
+    directorio_pdfs = tmp_path / "raw"
+    directorio_pdfs.mkdir()
+    (directorio_pdfs / "a.pdf").write_bytes(b"%PDF-1.4 contenido")
+    directorio_cache = tmp_path / "xml_responses"
+    directorio_cache.mkdir()
+    (directorio_cache / "a.xml").write_bytes(TEI)
+    (directorio_cache / "sin_pdf.xml").write_bytes(TEI)
+
+    cache = CacheTEI(str(directorio_cache))
+    assert cache.migrar(directorio_pdfs=str(directorio_pdfs)) == 1
+    assert not (directorio_cache / "a.xml").exists()
+    assert (directorio_cache / "sin_pdf.xml").exists()
+
+    acknowledgment = obtener_acknowledgment(str(directorio_pdfs / "a.pdf"), cache=CacheTEI(str(directorio_cache)))
+    assert "Fundación Ejemplo" in acknowledgment
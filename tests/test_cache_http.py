@@ -0,0 +1,108 @@
+import requests
+
+from api import cache_http
+from api.cache_http import CacheHTTP, DIA, es_respuesta_negativa
+
+
+def respuesta(contenido, estado=200):
+    r = requests.Response()
+    r.status_code = estado
+    r._content = contenido
+    r.headers["Content-Type"] = "application/json"
+    return r
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def test_busqueda_xml_vacia_es_negativa():
+    vacia = b"<response><header><total>0</total></header><results></results></response>"
+    assert es_respuesta_negativa(200, vacia)
+    assert es_respuesta_negativa(200, b"<response><header></header><results/></response>")
+
+
+def test_busqueda_xml_con_resultados_no_es_negativa():
+    con_resultado = b"<response><header><total>1</total></header><results><result><metadata/></result></results></response>"
+    assert not es_respuesta_negativa(200, con_resultado)
+    assert not es_respuesta_negativa(200, b'<response><results><result id="x"/></results></response>')
+
+
+def test_respuestas_json_y_errores():
+    assert es_respuesta_negativa(200, b'{"results": []}')
+    assert not es_respuesta_negativa(200, b'{"results": [{"id": 1}]}')
+    assert es_respuesta_negativa(404, b"")
+    assert not es_respuesta_negativa(429, b"")
+
+
+def test_las_respuestas_caducan_segun_su_endpoint(tmp_path, monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache_http.time, "time", reloj)
+    cache = CacheHTTP(str(tmp_path / "http.sqlite"))
+    trabajos = "https://api.openalex.org/works"
+    instituciones = "https://API.openalex.org/institutions"
+    cache.guardar(trabajos, {"search": "b", "filter": "a"}, respuesta(b'{"results": [{"id": 1}]}'))
+    cache.guardar(instituciones, {"search": "x"}, respuesta(b'{"results": [{"id": 2}]}'))
+    cache.guardar(trabajos, {"search": "nada"}, respuesta(b'{"results": []}'))
+    assert not cache.guardar(trabajos, {"search": "error"}, respuesta(b"", 503))
+
+    # Los parámetros se normalizan: mismo orden o en la URL, misma entrada
+    assert cache.obtener(trabajos + "?filter=a&search=b").json() == {"results": [{"id": 1}]}
+    assert cache.obtener(trabajos, {"search": "error"}) is None
+
+    reloj.ahora += 4 * DIA
+    assert cache.obtener(trabajos, {"search": "nada"}) is None
+    assert cache.obtener(trabajos, {"search": "b", "filter": "a"}) is not None
+
+    reloj.ahora += 4 * DIA
+    assert cache.obtener(trabajos, {"search": "b", "filter": "a"}) is None
+    assert cache.obtener(instituciones.lower(), {"search": "x"}).status_code == 200
+
+    estadisticas = cache.estadisticas()
+    assert (estadisticas["aciertos"], estadisticas["caducadas"]) == (3, 2)
+    cache.cerrar()
+
+
+def test_al_superar_el_tamano_se_retiran_las_menos_usadas(tmp_path, monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache_http.time, "time", reloj)
+    cache = CacheHTTP(str(tmp_path / "http.sqlite"), tamano_maximo=250)
+    url = "https://api.openalex.org/works"
+    cuerpo = b'{"results": [{"id": "' + b"x" * 80 + b'"}]}'
+
+    for nombre in ("a", "b"):
+        cache.guardar(url, {"search": nombre}, respuesta(cuerpo))
+        reloj.ahora += 1
+    # Consultar "a" la convierte en la usada más recientemente
+    assert cache.obtener(url, {"search": "a"}) is not None
+    reloj.ahora += 1
+    cache.guardar(url, {"search": "c"}, respuesta(cuerpo))
+
+    assert cache.obtener(url, {"search": "b"}) is None
+    assert cache.obtener(url, {"search": "a"}) is not None
+    assert cache.obtener(url, {"search": "c"}) is not None
+    assert cache.estadisticas()["bytes_guardados"] == 2 * len(cuerpo)
+    cache.cerrar()
+
+
+def test_al_liberar_espacio_se_retiran_antes_las_caducadas(tmp_path, monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache_http.time, "time", reloj)
+    cache = CacheHTTP(str(tmp_path / "http.sqlite"), tamano_maximo=250)
+    url = "https://api.openalex.org/works"
+    cuerpo = b'{"results": [{"id": "' + b"x" * 80 + b'"}]}'
+
+    cache.guardar(url + "/W1", None, respuesta(b"x" * 100, 404))
+    cache.guardar(url, {"search": "a"}, respuesta(cuerpo))
+    reloj.ahora += 4 * DIA
+    # La negativa ha caducado y la de "a" no: basta con retirar la negativa, aunque
+    # "a" sea la usada hace más tiempo
+    cache.guardar(url, {"search": "b"}, respuesta(cuerpo))
+
+    assert cache.estadisticas()["entradas"] == 2
+    assert cache.obtener(url, {"search": "a"}) is not None
+    cache.cerrar()
@@ -0,0 +1,65 @@
+import requests
+
+from api import openaire_api
+from api.cliente_http import ClienteHTTP
+from models.author import Author
+
+
+def respuesta(estado, cabeceras=None, contenido=b""):
+    r = requests.Response()
+    r.status_code = estado
+    r.headers.update(cabeceras or {})
+    r._content = contenido
+    return r
+
+
+class SesionFalsa:
+    def __init__(self, respuestas):
+        self.respuestas = list(respuestas)
+        self.llamadas = 0
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.llamadas += 1
+        resultado = self.respuestas.pop(0)
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+
+def cliente_con(respuestas, **opciones):
+    cliente = ClienteHTTP(**opciones)
+    cliente.sesion = SesionFalsa(respuestas)
+    return cliente
+
+
+def test_reintenta_429_y_503_respetando_retry_after(monkeypatch):
+    esperas = []
+    monkeypatch.setattr("api.cliente_http.time.sleep", esperas.append)
+    cliente = cliente_con([respuesta(429, {"Retry-After": "2"}), respuesta(503), respuesta(200)],
+                          espera_inicial=0.5)
+
+    assert cliente.get("https://api.openalex.org/works").status_code == 200
+    assert cliente.peticiones == 3
+    assert cliente.reintentos == 2
+    assert esperas[0] == 2.0
+    assert 1.0 <= esperas[1] <= 1.5
+
+
+def test_devuelve_la_ultima_respuesta_al_agotar_los_reintentos(monkeypatch):
+    monkeypatch.setattr("api.cliente_http.time.sleep", lambda segundos: None)
+    cliente = cliente_con([respuesta(429)] * 3, max_reintentos=2)
+
+    assert cliente.get("https://api.openaire.eu/search/persons").status_code == 429
+    assert cliente.peticiones == 3
+
+
+def test_autor_se_conserva_si_la_busqueda_falla(monkeypatch):
+    monkeypatch.setattr("api.cliente_http.time.sleep", lambda segundos: None)
+    sin_resultados = respuesta(200, contenido=b"<response><results></results></response>")
+    cliente = cliente_con([respuesta(429)] * 5 + [requests.ConnectionError("caída"), sin_resultados])
+    monkeypatch.setattr(openaire_api, "obtener_cliente", lambda: cliente)
+    autor = Author(nombre="Ana Pérez")
+
+    assert openaire_api.combinar_autor_openaire(autor, openaire_api.buscar_autor_en_openaire(autor.nombre))
+    assert openaire_api.combinar_autor_openaire(autor, openaire_api.buscar_autor_en_openaire(autor.nombre))
+    assert not openaire_api.combinar_autor_openaire(autor, openaire_api.buscar_autor_en_openaire(autor.nombre))
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from similitud.cuantizacion import VectoresCompactos, cuantizar, decuantizar
+
+
+def vectores(n=200, dimension=32, semilla=0):
+    return np.random.default_rng(semilla).normal(size=(n, dimension)).astype(np.float32)
+
+
+@pytest.mark.parametrize("precision, tolerancia", [("float32", 1e-6), ("float16", 2e-3), ("int8", 2e-2)])
+def test_productos_sobre_los_vectores_compactos(precision, tolerancia):
+    matriz = vectores()
+    normalizada = matriz / np.linalg.norm(matriz, axis=1, keepdims=True)
+    compactos = VectoresCompactos.desde(matriz, precision, tamano_bloque=64)
+
+    assert compactos.precision == precision
+    assert compactos.codigos.dtype == np.dtype(precision)
+    # La similitud coseno se calcula directamente sobre los códigos, por bloques
+    productos = compactos.productos(normalizada[:10], tamano_bloque=64)
+    assert np.abs(productos - normalizada[:10] @ normalizada.T).max() < tolerancia
+
+
+def test_int8_reconstruye_con_la_escala_de_cada_vector():
+    matriz = vectores()
+    matriz[5] = 0.0
+    codigos, escalas = cuantizar(matriz, "int8")
+
+    assert codigos.dtype == np.int8 and np.abs(codigos).max() == 127
+    assert escalas[5] == 0.0 and not codigos[5].any()
+    assert np.allclose(decuantizar(codigos, escalas), matriz, atol=escalas.max() / 2 + 1e-6)
+    with pytest.raises(ValueError):
+        cuantizar(matriz, "int4")
+
+
+def test_concatenar_seleccionar_y_guardar(tmp_path):
+    a = VectoresCompactos.desde(vectores(semilla=1), "int8")
+    b = VectoresCompactos.desde(vectores(50, semilla=2), "int8")
+    juntos = a.concatenar(b)
+    assert len(juntos) == 250
+    assert np.array_equal(juntos[200:].a_float32(), b.a_float32())
+
+    np.savez(tmp_path / "vectores.npz", **juntos.guardar({}, "vectores"))
+    with np.load(tmp_path / "vectores.npz") as datos:
+        cargados = VectoresCompactos.cargar(datos, "vectores")
+    assert np.array_equal(cargados.codigos, juntos.codigos)
+    assert np.array_equal(cargados.escalas, juntos.escalas)
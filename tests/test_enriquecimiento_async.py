@@ -0,0 +1,63 @@
+import time
+
+from api import enriquecimiento_async
+from api.enriquecimiento_async import enriquecer_papers
+from api.openaire_api import CONSULTA_FALLIDA
+from models.author import Author
+from models.paper import Paper
+
+
+def test_conserva_el_orden_y_los_autores_cuya_consulta_falla(monkeypatch):
+    def buscar_autor(nombre):
+        time.sleep(0.01)
+        if nombre.startswith("fallido"):
+            return CONSULTA_FALLIDA
+        if nombre.startswith("inexistente"):
+            return None
+        return Author(nombre, profesion="Investigador")
+
+    def buscar_proyectos(paper):
+        return [f"{paper.title}-p1", f"{paper.title}-p2"]
+
+    def buscar_proyecto(proyecto_id, paper=None):
+        # Los primeros papers terminan los últimos
+        time.sleep(0.02 if paper.title == "paper 0" else 0.0)
+        return None if proyecto_id.endswith("p2") and paper.title == "paper 1" else proyecto_id
+
+    for nombre, funcion in (("buscar_por_titulo", lambda titulo: None),
+                            ("buscar_autor_en_openaire", buscar_autor),
+                            ("buscar_trabajo_openalex", lambda titulo: None),
+                            ("buscar_proyectos_por_titulo", buscar_proyectos),
+                            ("buscar_proyecto_por_id", buscar_proyecto)):
+        monkeypatch.setattr(enriquecimiento_async, nombre, funcion)
+
+    papers = [Paper(f"paper {i}", autores=[Author(f"valido {i}"), Author(f"fallido {i}"), Author(f"inexistente {i}")])
+              for i in range(3)]
+
+    proyectos = enriquecer_papers(papers, limites_por_host={enriquecimiento_async.HOST_OPENAIRE: 2})
+
+    assert proyectos == [["paper 0-p1", "paper 0-p2"], ["paper 1-p1"], ["paper 2-p1", "paper 2-p2"]]
+    for i, paper in enumerate(papers):
+        # El autor no encontrado se descarta; el de la consulta fallida se conserva sin completar
+        assert [autor.nombre for autor in paper.autores] == [f"valido {i}", f"fallido {i}"]
+        assert [autor.profesion for autor in paper.autores] == ["Investigador", None]
+
+
+def test_respeta_el_limite_por_host(monkeypatch):
+    en_curso = []
+    maximo = []
+
+    def buscar(titulo):
+        en_curso.append(titulo)
+        maximo.append(len(en_curso))
+        time.sleep(0.01)
+        en_curso.remove(titulo)
+        return None
+
+    monkeypatch.setattr(enriquecimiento_async, "buscar_por_titulo", buscar)
+    monkeypatch.setattr(enriquecimiento_async, "buscar_trabajo_openalex", lambda titulo: None)
+
+    enriquecer_papers([Paper(f"paper {i}") for i in range(12)], proyectos=False,
+                      limites_por_host={enriquecimiento_async.HOST_OPENAIRE: 3})
+
+    assert 1 < max(maximo) <= 3
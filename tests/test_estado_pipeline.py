@@ -0,0 +1,36 @@
+from estado_pipeline import EstadoPipeline
+from models.paper import Paper
+
+
+def test_similitudes_de_papers_con_el_mismo_titulo(tmp_path):
+    estado = EstadoPipeline(str(tmp_path / "estado.pkl"))
+    a, b, c = Paper("Un paper"), Paper("Desconocido"), Paper("Desconocido")
+    for filename, paper in (("a.pdf", a), ("b.pdf", b), ("c.pdf", c)):
+        estado.agregar(filename, paper, "resumen")
+    a.agregar_similar(b, 0.5)
+    a.agregar_similar(c, 0.8)
+    assert a.similitudes == {"b.pdf": 0.5, "c.pdf": 0.8}
+
+    estado.eliminar(["b.pdf"])
+    assert a.papersSimilares == [c]
+    assert a.similitudes == {"c.pdf": 0.8}
+
+    estado.guardar()
+    recuperado = EstadoPipeline(str(tmp_path / "estado.pkl"))
+    a = recuperado.papers["a.pdf"]
+    assert [similar.clave for similar in a.papersSimilares] == ["c.pdf"]
+    assert a.similitudes == {"c.pdf": 0.8}
+
+
+def test_estado_antiguo_pasa_las_similitudes_a_la_clave(tmp_path):
+    estado = EstadoPipeline(str(tmp_path / "estado.pkl"))
+    a, b = Paper("Un paper"), Paper("Otro paper")
+    estado.papers = {"a.pdf": a, "b.pdf": b}
+    estado.resumenes = {"a.pdf": "", "b.pdf": ""}
+    a.papersSimilares = [b]
+    a.similitudes = {"Otro paper": 0.6}
+    estado.guardar()
+
+    a = EstadoPipeline(str(tmp_path / "estado.pkl")).papers["a.pdf"]
+
+    assert a.similitudes == {"b.pdf": 0.6}
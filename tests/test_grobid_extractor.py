@@ -0,0 +1,82 @@
+import pytest
+
+from extractors import grobid_extractor
+from test_acknowledgment import RespuestaFalsa
+
+
+class RecursoFalso:
+    """Sustituye a CacheNER y PoolNER y registra si se han cerrado."""
+    creados = []
+
+    def __init__(self, *args, **kwargs):
+        self.cerrado = False
+        RecursoFalso.creados.append(self)
+
+    def mostrar_estadisticas(self):
+        pass
+
+    def cerrar(self):
+        self.cerrado = True
+
+
+@pytest.fixture
+def directorio_pdfs(tmp_path, monkeypatch):
+    directorio = tmp_path / "raw"
+    directorio.mkdir()
+    for nombre in ("a.pdf", "b.pdf", "c.pdf"):
+        (directorio / nombre).write_bytes(f"%PDF-1.4 {nombre}".encode())
+    RecursoFalso.creados = []
+    monkeypatch.setattr(grobid_extractor, "CacheNER", RecursoFalso)
+    monkeypatch.setattr(grobid_extractor, "PoolNER", RecursoFalso)
+    monkeypatch.setattr(grobid_extractor, "completar_organizaciones", lambda registros, *args: registros)
+    monkeypatch.setattr(grobid_extractor.requests, "post", lambda url, files=None, data=None: RespuestaFalsa())
+    return directorio
+
+
+def test_iterar_pdfs_cierra_el_ner_si_se_abandona(directorio_pdfs):
+    registros = grobid_extractor.iterar_pdfs(str(directorio_pdfs), procesos_ner=2, tamano_lote_ner=1)
+    next(registros)
+    registros.close()
+
+    assert len(RecursoFalso.creados) == 2
+    assert all(recurso.cerrado for recurso in RecursoFalso.creados)
+
+
+def test_iterar_pdfs_cierra_el_ner_si_hay_un_error(directorio_pdfs, monkeypatch):
+    def fallar(registros, *args):
+        raise RuntimeError("NER")
+
+    monkeypatch.setattr(grobid_extractor, "completar_organizaciones", fallar)
+
+    with pytest.raises(RuntimeError):
+        list(grobid_extractor.iterar_pdfs(str(directorio_pdfs), procesos_ner=2))
+    assert all(recurso.cerrado for recurso in RecursoFalso.creados)
+
+
+def test_iterar_tei_guardados_cierra_los_procesos_si_se_abandona(directorio_pdfs, monkeypatch):
+    # Las respuestas TEI quedan guardadas en la cache para el modo sin conexión
+    assert len(list(grobid_extractor.iterar_pdfs(str(directorio_pdfs), modo="completo"))) == 3
+
+    pools = []
+
+    class PoolRegistrado(grobid_extractor.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.cerrado = False
+            pools.append(self)
+
+        def shutdown(self, *args, **kwargs):
+            self.cerrado = True
+            super().shutdown(*args, **kwargs)
+
+    monkeypatch.setattr(grobid_extractor, "ProcessPoolExecutor", PoolRegistrado)
+    RecursoFalso.creados = []
+
+    registros = grobid_extractor.iterar_tei_guardados(str(directorio_pdfs), modo="completo", procesos=1,
+                                                      procesos_ner=2, tamano_lote_ner=1)
+    assert next(registros)["filename"] == "a.pdf"
+    registros.close()
+
+    assert [pool.cerrado for pool in pools] == [True]
+    assert len(RecursoFalso.creados) == 2
+    assert all(recurso.cerrado for recurso in RecursoFalso.creados)
@@ -0,0 +1,75 @@
+from extractors.manifiesto import ManifiestoPDF
+
+
+def test_pdf_modificado_que_pasa_a_ser_duplicado_se_informa(tmp_path):
+    directorio = tmp_path / "raw"
+    directorio.mkdir()
+    (directorio / "a.pdf").write_bytes(b"%PDF a")
+    (directorio / "b.pdf").write_bytes(b"%PDF distinto")
+    manifiesto = ManifiestoPDF(str(tmp_path / "manifiesto.json"))
+    for nombre, entrada in manifiesto.comparar(str(directorio), "v")["pendientes"].items():
+        manifiesto.registrar(nombre, entrada)
+
+    (directorio / "b.pdf").write_bytes(b"%PDF a")
+    cambios = manifiesto.comparar(str(directorio), "v")
+
+    assert cambios["modificados"] == ["b.pdf"]
+    assert cambios["duplicados"]["b.pdf"]["duplicado_de"] == "a.pdf"
+    assert cambios["pendientes"] == {}
+
+
+def procesar(manifiesto, directorio):
+    """Registra lo que `main` registraría tras una ejecución sin errores."""
+    cambios = manifiesto.comparar(str(directorio), "v")
+    for nombre in cambios["eliminados"]:
+        manifiesto.eliminar(nombre)
+    for nombre, entrada in {**cambios["duplicados"], **cambios["pendientes"]}.items():
+        manifiesto.registrar(nombre, entrada)
+    return cambios
+
+
+def manifiesto_con_duplicado(tmp_path):
+    directorio = tmp_path / "raw"
+    directorio.mkdir()
+    (directorio / "a.pdf").write_bytes(b"%PDF a")
+    (directorio / "b.pdf").write_bytes(b"%PDF a")
+    manifiesto = ManifiestoPDF(str(tmp_path / "manifiesto.json"))
+    primera = procesar(manifiesto, directorio)
+    assert list(primera["pendientes"]) == ["a.pdf"]
+    assert primera["duplicados"]["b.pdf"]["duplicado_de"] == "a.pdf"
+    assert procesar(manifiesto, directorio)["sin_cambios"] == ["a.pdf", "b.pdf"]
+    return manifiesto, directorio
+
+
+def test_duplicado_se_procesa_si_se_elimina_el_original(tmp_path):
+    manifiesto, directorio = manifiesto_con_duplicado(tmp_path)
+    (directorio / "a.pdf").unlink()
+
+    cambios = procesar(manifiesto, directorio)
+
+    assert cambios["eliminados"] == ["a.pdf"]
+    assert list(cambios["pendientes"]) == ["b.pdf"]
+    assert "duplicado_de" not in cambios["pendientes"]["b.pdf"]
+    assert cambios["modificados"] == []
+    assert procesar(manifiesto, directorio)["sin_cambios"] == ["b.pdf"]
+
+
+def test_duplicado_se_procesa_si_se_modifica_el_original(tmp_path):
+    manifiesto, directorio = manifiesto_con_duplicado(tmp_path)
+    (directorio / "a.pdf").write_bytes(b"%PDF a modificado")
+
+    cambios = procesar(manifiesto, directorio)
+
+    assert sorted(cambios["pendientes"]) == ["a.pdf", "b.pdf"]
+    assert cambios["modificados"] == ["a.pdf"]
+    assert cambios["duplicados"] == {}
+
+
+def test_duplicado_se_procesa_si_el_original_no_llego_a_registrarse(tmp_path):
+    manifiesto, directorio = manifiesto_con_duplicado(tmp_path)
+    manifiesto.eliminar("a.pdf")
+
+    cambios = manifiesto.comparar(str(directorio), "v")
+
+    assert list(cambios["pendientes"]) == ["a.pdf"]
+    assert cambios["duplicados"]["b.pdf"]["duplicado_de"] == "a.pdf"
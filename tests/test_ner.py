@@ -0,0 +1,48 @@
+from extractors.ner import dividir_en_ventanas, fusionar_entidades_de_ventanas
+
+
+class TokenizadorPorPalabras:
+    """Tokenizador de pruebas: un token por palabra."""
+
+    def __call__(self, textos, add_special_tokens=False):
+        return {"input_ids": [[0] * len(texto.split()) for texto in textos]}
+
+
+def org(nombre, score=0.99, start=None):
+    entidad = {"entity_group": "ORG", "word": nombre, "score": score}
+    if start is not None:
+        entidad.update(start=start, end=start + len(nombre))
+    return entidad
+
+
+def test_ventanas_son_fragmentos_del_texto_normalizado():
+    texto = "Agradecemos  al NIH. " + " ".join(f"p{i}" for i in range(30)) + ".  Y al NIHR por la beca."
+    normalizado = " ".join(texto.split())
+
+    ventanas = dividir_en_ventanas(texto, TokenizadorPorPalabras(), max_tokens=8, solapamiento=3)
+
+    assert len(ventanas) > 2
+    for texto_ventana, _, inicio in ventanas:
+        assert normalizado[inicio:inicio + len(texto_ventana)] == texto_ventana
+
+
+def test_organizaciones_contenidas_en_otras_se_conservan():
+    assert fusionar_entidades_de_ventanas([[org("NIH")], [org("NIHR")]]) == {"NIH", "NIHR"}
+    assert fusionar_entidades_de_ventanas([[org("NIH", start=0)], [org("NIHR", start=0)]],
+                                          inicios=[0, 100]) == {"NIH", "NIHR"}
+
+
+def test_fragmento_cortado_en_el_solapamiento_se_descarta():
+    # La primera ventana (0-40) corta "National Institutes of Health" en su borde;
+    # la segunda empieza en la posición 20 y la contiene entera
+    primera = [org("National Institutes", start=25)]
+    segunda = [org("National Institutes of Health", start=5, score=0.9)]
+
+    assert fusionar_entidades_de_ventanas([primera, segunda], inicios=[0, 20]) == {"National Institutes of Health"}
+
+
+def test_entidad_repetida_en_el_solapamiento_usa_su_mejor_puntuacion():
+    primera = [org("CSIC", score=0.5, start=30)]
+    segunda = [org("CSIC", score=0.95, start=10)]
+
+    assert fusionar_entidades_de_ventanas([primera, segunda], inicios=[0, 20]) == {"CSIC"}
@@ -0,0 +1,34 @@
+from extractors import ner_cache
+from extractors.ner_cache import CacheNER
+
+
+def test_guardar_y_obtener_entre_aperturas(tmp_path):
+    ruta = str(tmp_path / "ner.sqlite")
+    cache = CacheNER(ruta)
+    clave = CacheNER.clave("Financiado  por\nla Fundación", "modelo", 0.85, 512)
+    cache.guardar(clave, {"Fundación", "Ministerio"})
+    cache.cerrar()
+
+    cache = CacheNER(ruta)
+    # Los espacios no cambian la clave; el modelo, el umbral o la configuración sí
+    assert cache.obtener(CacheNER.clave("Financiado por la Fundación", "modelo", 0.85, 512)) == {"Fundación", "Ministerio"}
+    assert cache.obtener(CacheNER.clave("Financiado por la Fundación", "modelo", 0.9, 512)) is None
+    assert cache.obtener(CacheNER.clave("Financiado por la Fundación", "modelo", 0.85, 256)) is None
+    assert cache.estadisticas() == {"aciertos": 1, "fallos": 2, "entradas": 1}
+    cache.cerrar()
+
+
+def test_expulsa_las_entradas_usadas_hace_mas_tiempo(tmp_path, monkeypatch):
+    reloj = iter(range(100))
+    monkeypatch.setattr(ner_cache.time, "time", lambda: next(reloj))
+    cache = CacheNER(str(tmp_path / "ner.sqlite"), max_entradas=2)
+
+    cache.guardar("a", {"A"})
+    cache.guardar("b", {"B"})
+    # Consultar "a" lo convierte en la más reciente: al añadir "c" se expulsa "b"
+    assert cache.obtener("a") == {"A"}
+    cache.guardar("c", {"C"})
+
+    assert cache.obtener_varios(["a", "b", "c"]) == {"a": {"A"}, "c": {"C"}}
+    assert cache.estadisticas()["entradas"] == 2
+    cache.cerrar()
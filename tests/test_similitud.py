@@ -0,0 +1,108 @@
+import numpy as np
+
+from extractors.grobid_extractor import generar_embeddings_y_similitud
+from models.paper import Paper
+from similitud.almacen_embeddings import AlmacenEmbeddings
+from similitud.bloques import pares_similares
+from similitud.indices import IndiceExacto, IndiceIVF
+
+VECTORES = {
+    "resumen 1": [1.0, 0.1, 0.0],
+    "resumen 2": [1.0, 0.0, 0.1],
+    "resumen duplicado": [0.9, 0.2, 0.2],
+}
+
+
+def almacen_de_prueba(directorio):
+    almacen = AlmacenEmbeddings(str(directorio), "prueba")
+    if not len(almacen):
+        almacen.agregar([almacen.clave(t) for t in VECTORES], np.array(list(VECTORES.values()), dtype=np.float32))
+    return almacen
+
+
+def similares(paper):
+    return [similar.title for similar in paper.papersSimilares]
+
+
+def test_duplicado_nuevo_en_modo_incremental_no_repite_enlaces(tmp_path):
+    registros = [{"filename": nombre, "abstract": resumen} for nombre, resumen in
+                 [("a1", "resumen 1"), ("a2", "resumen 2"), ("dupA", "resumen duplicado"),
+                  ("dupB", "resumen duplicado")]]
+    papers = [Paper(registro["filename"]) for registro in registros]
+
+    generar_embeddings_y_similitud(registros[:3], papers[:3], umbral=0.5, almacen=almacen_de_prueba(tmp_path), k=2)
+    generar_embeddings_y_similitud(registros, papers, umbral=0.5, almacen=almacen_de_prueba(tmp_path), k=2,
+                                   nuevos=["dupB"])
+
+    a1, a2, dup_a, dup_b = papers
+    for paper in papers:
+        assert len(similares(paper)) == len(set(similares(paper)))
+    assert "dupB" in similares(dup_a) and "dupA" in similares(dup_b)
+    assert similares(a2).count("dupA") == 1
+
+
+def test_agregar_similar_es_idempotente():
+    a, b = Paper("a"), Paper("b")
+    a.agregar_similar(b, 0.5)
+    a.agregar_similar(b, 0.7)
+
+    assert a.papersSimilares == [b]
+    assert a.similitudes == {"b": 0.7}
+
+
+def test_modo_incremental_respeta_k(tmp_path):
+    rng = np.random.default_rng(0)
+    centros = rng.normal(size=(4, 16))
+    resumenes = [f"resumen {i}" for i in range(60)]
+    almacen = AlmacenEmbeddings(str(tmp_path), "prueba")
+    almacen.agregar([almacen.clave(t) for t in resumenes],
+                    np.array([centros[i % 4] + 0.3 * rng.normal(size=16) for i in range(60)], dtype=np.float32))
+    registros = [{"filename": t, "abstract": t} for t in resumenes]
+
+    for mutuos in (True, False):
+        papers = [Paper(t) for t in resumenes]
+        generar_embeddings_y_similitud(registros[:30], papers[:30], umbral=0.0, almacen=almacen, k=3,
+                                       mutuos=mutuos, indice="exacto")
+        for inicio in (30, 45):
+            generar_embeddings_y_similitud(registros[:inicio + 15], papers[:inicio + 15], umbral=0.0, almacen=almacen,
+                                           k=3, mutuos=mutuos, indice="exacto",
+                                           nuevos=resumenes[inicio:inicio + 15])
+        assert max(len(paper.papersSimilares) for paper in papers) <= 3
+
+
+def test_pares_similares_por_filas_equivale_a_copiar_la_matriz():
+    rng = np.random.default_rng(1)
+    matriz = rng.normal(size=(120, 8)).astype(np.float32)
+    filas = rng.permutation(120)[:100]
+    filas[10] = filas[20]
+
+    for consulta in (None, [3, 10, 20, 90]):
+        copiada = sorted((i, j, round(s, 5)) for i, j, s in pares_similares(matriz[filas], 0.3, 32, consulta))
+        por_filas = sorted((i, j, round(s, 5)) for i, j, s in pares_similares(matriz, 0.3, 32, consulta, filas=filas))
+        assert copiada == por_filas
+
+
+def test_ivf_sondeando_todas_las_listas_coincide_con_el_exacto():
+    rng = np.random.default_rng(2)
+    matriz = rng.normal(size=(500, 16)).astype(np.float32)
+    consultas = matriz[:50]
+
+    similitudes_exacto, vecinos_exacto = IndiceExacto().construir(matriz).buscar(consultas, 5)
+    ivf = IndiceIVF(listas=20, sondas=20).construir(matriz)
+    similitudes_ivf, vecinos_ivf = ivf.buscar(consultas, 5)
+
+    assert np.array_equal(vecinos_exacto, vecinos_ivf)
+    assert np.allclose(similitudes_exacto, similitudes_ivf, atol=1e-5)
+
+
+def test_cada_modelo_tiene_su_propio_indice(tmp_path):
+    registros = [{"filename": t, "abstract": t} for t in VECTORES]
+    for modelo, dimension in (("modelo-a", 3), ("modelo-b", 5)):
+        almacen = AlmacenEmbeddings(str(tmp_path), modelo)
+        vectores = np.eye(len(VECTORES), dimension, dtype=np.float32) + 0.5
+        almacen.agregar([almacen.clave(t) for t in VECTORES], vectores)
+        papers = [Paper(t) for t in VECTORES]
+        generar_embeddings_y_similitud(registros, papers, umbral=0.0, almacen=almacen, k=2, indice="exacto")
+        assert all(paper.papersSimilares for paper in papers)
+
+    assert sorted(p.name for p in (tmp_path / "indices").iterdir()) == ["modelo-a", "modelo-b"]
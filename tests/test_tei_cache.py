@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from extractors.tei_cache import CacheTEI, calcular_hash_pdf, leer_ubicacion
+
+URL = "http://localhost:8070/api/processFulltextDocument"
+
+
+@pytest.mark.parametrize("compresion", ["gzip", "zstd"])
+def test_paquete_guardar_reabrir_y_buscar(tmp_path, compresion):
+    if compresion == "zstd":
+        pytest.importorskip("zstandard")
+    cache = CacheTEI(str(tmp_path), compresion)
+    clave_0 = CacheTEI.clave("sha", URL, {"consolidateHeader": "0"})
+    clave_1 = CacheTEI.clave("sha", URL + "/", {"consolidateHeader": "1"})
+    otra = CacheTEI.clave("otro", URL)
+    cache.guardar(clave_0, b"<TEI>0</TEI>", {"archivo": "a.pdf", "sha256": "sha", "url": URL})
+    cache.guardar(otra, "<TEI>ñ</TEI>", {"archivo": "b.pdf", "sha256": "otro", "url": URL})
+    cache.guardar(clave_1, b"<TEI>1</TEI>", {"archivo": "a.pdf", "sha256": "sha", "url": URL})
+
+    reabierta = CacheTEI(str(tmp_path), compresion)
+
+    assert reabierta.obtener(clave_0) == b"<TEI>0</TEI>"
+    assert reabierta.obtener(otra) == "<TEI>ñ</TEI>".encode("utf-8")
+    assert leer_ubicacion(reabierta.ubicacion(clave_1)) == b"<TEI>1</TEI>"
+    # La última respuesta guardada del PDF en el endpoint, con cualquier opción
+    assert reabierta.buscar("sha", URL + "/") == clave_1
+    assert reabierta.buscar("sha", "http://localhost:8070/api/processHeaderDocument") is None
+    assert not reabierta.contiene(CacheTEI.clave("sha", URL, {"consolidateHeader": "2"}))
+    # Todo el corpus en dos archivos: el paquete y su índice
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["indice.jsonl", "tei.pack"]
+
+
+def test_linea_truncada_del_indice_no_invalida_el_resto(tmp_path):
+    cache = CacheTEI(str(tmp_path), "gzip")
+    cache.guardar("clave", b"<TEI/>")
+    with open(cache.ruta_indice, "a", encoding="utf-8") as f:
+        f.write('{"clave": "incompleta", "desplaz')
+
+    assert CacheTEI(str(tmp_path), "gzip").obtener("clave") == b"<TEI/>"
+
+
+def test_migrar_archivos_sueltos_por_clave(tmp_path):
+    clave = CacheTEI.clave("sha", URL)
+    (tmp_path / f"{clave}.xml").write_bytes(b"<TEI>suelto</TEI>")
+    (tmp_path / "indice.jsonl").write_text(
+        json.dumps({"clave": clave, "archivo": "a.pdf", "sha256": "sha", "url": URL}) + "\n", encoding="utf-8")
+
+    cache = CacheTEI(str(tmp_path), "gzip")
+    assert cache.obtener(clave) == b"<TEI>suelto</TEI>"
+    assert cache.migrar() == 1
+
+    reabierta = CacheTEI(str(tmp_path), "gzip")
+    assert not (tmp_path / f"{clave}.xml").exists()
+    assert reabierta.obtener(clave) == b"<TEI>suelto</TEI>"
+    assert reabierta.buscar("sha", URL) == clave
+
+
+def test_migrar_xml_con_el_nombre_del_pdf(tmp_path):
+    directorio_pdfs = tmp_path / "raw"
+    directorio_pdfs.mkdir()
+    (directorio_pdfs / "a.pdf").write_bytes(b"%PDF-1.4 contenido")
+    directorio_cache = tmp_path / "xml_responses"
+    directorio_cache.mkdir()
+    (directorio_cache / "a.xml").write_bytes(b"<TEI>original</TEI>")
+
+    cache = CacheTEI(str(directorio_cache), "gzip")
+    assert cache.migrar(borrar=False, directorio_pdfs=str(directorio_pdfs)) == 1
+    # Volver a migrar no duplica la entrada
+    assert cache.migrar(borrar=False, directorio_pdfs=str(directorio_pdfs)) == 1
+    assert len(cache.entradas()) == 1
+
+    sha256_pdf = calcular_hash_pdf(str(directorio_pdfs / "a.pdf"))
+    reabierta = CacheTEI(str(directorio_cache), "gzip")
+    clave = reabierta.buscar(sha256_pdf, URL)
+    assert clave == CacheTEI.clave(sha256_pdf, URL, {"consolidateHeader": "1"})
+    assert reabierta.obtener(clave) == b"<TEI>original</TEI>"
+    assert reabierta.entradas()[0]["archivo"] == "a.pdf"
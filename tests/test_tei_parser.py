@@ -0,0 +1,99 @@
+import xml.etree.ElementTree as ET
+
+from extractors.tei_parser import extraer_campos_tei
+
+TEI = """<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+  <teiHeader>
+    <fileDesc>
+      <titleStmt><title level="a" type="main"> Redes de conocimiento </title></titleStmt>
+      <sourceDesc><biblStruct><analytic>
+        <title level="a" type="main">Título de la referencia</title>
+        <author><persName><forename type="first">Ana</forename><surname>García</surname></persName>
+          <affiliation><orgName type="institution">Universidad de Ejemplo</orgName></affiliation></author>
+        <author><persName><forename type="first">Luis</forename><forename type="middle">M</forename><surname>Pérez</surname></persName>
+          <affiliation><orgName type="department">Departamento</orgName><orgName type="institution">Otra</orgName></affiliation>
+          <affiliation><orgName type="institution">Universidad de Ejemplo</orgName></affiliation></author>
+        <author><email>sin-nombre@example.org</email></author>
+      </analytic></biblStruct></sourceDesc>
+    </fileDesc>
+    <profileDesc><abstract><div><p>Primera frase.</p><p>Segunda <hi>frase</hi>.</p></div></abstract></profileDesc>
+  </teiHeader>
+  <text>
+    <body><div><head>Introducción</head><p>Texto del cuerpo.</p></div></body>
+    <back>
+      <div type="acknowledgement"><div><head>Agradecimientos</head><p>Financiado por la Fundación Ejemplo.</p></div></div>
+      <div type="acknowledgement"><p>Y por el proyecto PID2020.</p></div>
+      <div type="references"><listBibl><biblStruct><analytic>
+        <author><persName><forename>Otro</forename><surname>Autor</surname></persName></author>
+      </analytic></biblStruct></listBibl></div>
+    </back>
+  </text>
+</TEI>""".encode("utf-8")
+
+NS = {"tei": "http://www.tei-c.org/ns/1.0"}
+
+
+def extraer_como_el_original(contenido):
+    """Extracción con `find`/`findall` sobre el árbol completo, como hacía la versión original."""
+    root = ET.fromstring(contenido)
+    titulo = root.find(".//tei:titleStmt/tei:title", NS)
+    autores = []
+    for author in root.findall(".//tei:author", NS):
+        name_el = author.find(".//tei:persName", NS)
+        if name_el is not None:
+            full = " ".join(filter(None, [
+                name_el.findtext("tei:forename", default="", namespaces=NS),
+                name_el.findtext("tei:surname", default="", namespaces=NS)
+            ])).strip()
+            if full:
+                autores.append(full)
+    organizaciones = set()
+    for aff in root.findall(".//tei:affiliation", NS):
+        org_el = aff.find(".//tei:orgName", NS)
+        if org_el is not None and org_el.text:
+            organizaciones.add(org_el.text.strip())
+    agradecimientos = []
+    for div in root.findall(".//tei:div[@type='acknowledgement']", NS):
+        texto = " ".join(p.strip() for p in div.itertext())
+        if texto:
+            agradecimientos.append(texto.strip())
+    resumen = root.find(".//tei:abstract", NS)
+    return {
+        "title": titulo.text.strip() if titulo is not None and titulo.text else "Desconocido",
+        "authors": autores,
+        "affiliations": organizaciones,
+        "acknowledgment": " ".join(agradecimientos).strip(),
+        "abstract": " ".join(resumen.itertext()).strip() if resumen is not None else "",
+    }
+
+
+def test_coincide_con_la_extraccion_original():
+    campos = extraer_campos_tei(TEI)
+    original = extraer_como_el_original(TEI)
+
+    assert campos["title"] == original["title"] == "Redes de conocimiento"
+    assert campos["authors"] == original["authors"] == ["Ana García", "Luis Pérez", "Otro Autor"]
+    assert set(campos["affiliations"]) == original["affiliations"]
+    # Sin duplicados y en orden de aparición
+    assert campos["affiliations"] == ["Universidad de Ejemplo", "Departamento"]
+    assert campos["acknowledgment"] == original["acknowledgment"]
+    assert "Fundación Ejemplo" in campos["acknowledgment"] and "PID2020" in campos["acknowledgment"]
+    assert campos["abstract"] == original["abstract"]
+
+
+def test_acepta_ruta_y_archivo(tmp_path):
+    ruta = tmp_path / "a.xml"
+    ruta.write_bytes(TEI)
+
+    assert extraer_campos_tei(str(ruta)) == extraer_campos_tei(TEI)
+    with open(ruta, "rb") as f:
+        assert extraer_campos_tei(f) == extraer_campos_tei(TEI)
+
+
+def test_tei_sin_campos():
+    vacio = b'<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader/></TEI>'
+
+    assert extraer_campos_tei(vacio) == {"title": "Desconocido", "authors": [], "affiliations": [],
+                                         "acknowledgment": "", "abstract": ""}
+    assert extraer_como_el_original(vacio)["title"] == "Desconocido"